@@ -0,0 +1,319 @@
+import os
+import io
+import shutil
+import mimetypes
+import urllib.request
+from pathlib import Path
+
+if os.getenv("RAILWAY_ENVIRONMENT") is None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# cloudinary | local | s3
+ARTIFACT_BACKEND = os.getenv("ARTIFACT_BACKEND", "cloudinary").lower()
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", ".artifacts")
+# base URL the API is reachable at, used for links to locally stored artifacts
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "json": "application/json",
+    "json.gz": "application/json",
+}
+CONTENT_ENCODINGS = {
+    "json.gz": "gzip",
+}
+IMAGE_FORMATS = ("png", "svg", "jpg", "jpeg", "webp")
+
+
+def content_type_of(format: str) -> str:
+    return CONTENT_TYPES.get(format) or mimetypes.guess_type(f"x.{format}")[0] or "application/octet-stream"
+
+
+def format_of(name: str) -> str:
+    """
+    Artifact format from a key or file name ("a/b.json.gz" -> "json.gz").
+    """
+    for format in CONTENT_ENCODINGS:
+        if name.endswith(f".{format}"):
+            return format
+    return name.rpartition(".")[2]
+
+
+def artifact_url(key: str) -> str:
+    return f"{PUBLIC_BASE_URL}/artifacts/{key}"
+
+
+class CloudinaryStore:
+    """
+    Images (and raw figure specs) on Cloudinary; a run is deleted through its tag.
+
+    Every store implements put / info / get / delete / delete_run, with artifacts addressed
+    by a key without extension plus their format.
+    """
+    name = "cloudinary"
+    # Cloudinary accepts at most 100 public ids per delete_resources call
+    delete_batch_size = 100
+
+    def __init__(self):
+        import cloudinary
+        import cloudinary.exceptions
+
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+            secure=True
+        )
+
+    @staticmethod
+    def _resource(key: str, format: str) -> tuple:
+        # images are addressed without extension, raw files (figure specs) with it
+        if format in IMAGE_FORMATS:
+            return key, "image"
+        return f"{key}.{format}", "raw"
+
+    @staticmethod
+    def _metadata(response: dict, format: str) -> dict:
+        return {
+            "url": response["secure_url"],
+            "public_id": response["public_id"],
+            "format": response.get("format") or format,
+            "bytes": response["bytes"]
+        }
+
+    def put(self, key: str, data: bytes, format: str, tags: list = ()) -> dict:
+        import cloudinary.uploader
+
+        public_id, resource_type = self._resource(key, format)
+        response = cloudinary.uploader.upload(
+            io.BytesIO(data),
+            public_id=public_id,
+            tags=list(tags),
+            resource_type=resource_type
+        )
+        return self._metadata(response, format)
+
+    def info(self, key: str, format: str):
+        import cloudinary.api
+
+        public_id, resource_type = self._resource(key, format)
+        try:
+            return self._metadata(cloudinary.api.resource(public_id, resource_type=resource_type), format)
+        except cloudinary.exceptions.NotFound:
+            return None
+
+    def get(self, key: str, format: str):
+        info = self.info(key, format)
+        if info is None:
+            return None
+        with urllib.request.urlopen(info["url"], timeout=30) as response:
+            return response.read()
+
+    def delete(self, keys: list) -> int:
+        import cloudinary.api
+
+        deleted = 0
+        for resource_type in ("image", "raw"):
+            typed = [k for k in keys if (format_of(k) in CONTENT_ENCODINGS) == (resource_type == "raw")]
+            for start in range(0, len(typed), self.delete_batch_size):
+                response = cloudinary.api.delete_resources(
+                    typed[start:start + self.delete_batch_size], resource_type=resource_type
+                )
+                deleted += sum(1 for status in response.get("deleted", {}).values() if status == "deleted")
+        return deleted
+
+    def delete_run(self, run_id: str, prefix: str) -> int:
+        import cloudinary.api
+
+        deleted = 0
+        for resource_type in ("image", "raw"):
+            while True:
+                response = cloudinary.api.delete_resources_by_tag(run_id, resource_type=resource_type)
+                deleted += sum(1 for status in response.get("deleted", {}).values() if status == "deleted")
+                if not response.get("partial"):
+                    break
+        return deleted
+
+
+class LocalStore:
+    """
+    Artifacts on the local filesystem under `root`, served by GET /artifacts/{key}.
+    A run is deleted by removing its prefix directory.
+    """
+    name = "local"
+
+    def __init__(self, root: str = ARTIFACT_DIR):
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        """
+        Filesystem path of `key`; raises KeyError for keys outside the store.
+        """
+        path = (self.root / key).resolve()
+        if path == self.root or self.root not in path.parents:
+            raise KeyError(key)
+        return path
+
+    def put(self, key: str, data: bytes, format: str, tags: list = ()) -> dict:
+        key = f"{key}.{format}"
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write then rename so readers never see a partial file
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return {
+            "url": artifact_url(key),
+            "public_id": key,
+            "format": format,
+            "bytes": len(data)
+        }
+
+    def info(self, key: str, format: str):
+        key = f"{key}.{format}"
+        try:
+            path = self.path(key)
+        except KeyError:
+            return None
+        if not path.is_file():
+            return None
+        return {
+            "url": artifact_url(key),
+            "public_id": key,
+            "format": format,
+            "bytes": path.stat().st_size
+        }
+
+    def get(self, key: str, format: str):
+        info = self.info(key, format)
+        return None if info is None else self.path(info["public_id"]).read_bytes()
+
+    def delete(self, keys: list) -> int:
+        deleted = 0
+        for key in keys:
+            try:
+                self.path(key).unlink()
+                deleted += 1
+            except (KeyError, FileNotFoundError):
+                pass
+        return deleted
+
+    def delete_run(self, run_id: str, prefix: str) -> int:
+        try:
+            directory = self.path(prefix)
+        except KeyError:
+            return 0
+        if not directory.is_dir():
+            return 0
+        deleted = sum(1 for p in directory.rglob("*") if p.is_file())
+        shutil.rmtree(directory, ignore_errors=True)
+        return deleted
+
+
+class S3Store:
+    """
+    Artifacts in an S3-compatible bucket (AWS, MinIO, R2, ...). Needs boto3.
+    A run is deleted by listing its prefix.
+    """
+    name = "s3"
+    # DeleteObjects accepts at most 1000 keys
+    delete_batch_size = 1000
+
+    def __init__(self):
+        import boto3
+
+        self.bucket = os.environ["S3_BUCKET"]
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+            region_name=os.getenv("S3_REGION") or None,
+        )
+        self.public_url = os.getenv("S3_PUBLIC_URL", "").rstrip("/")
+
+    def _url(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=7 * 24 * 3600
+        )
+
+    def put(self, key: str, data: bytes, format: str, tags: list = ()) -> dict:
+        key = f"{key}.{format}"
+        extra = {"ContentEncoding": CONTENT_ENCODINGS[format]} if format in CONTENT_ENCODINGS else {}
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=data,
+            ContentType=content_type_of(format),
+            CacheControl="public, max-age=31536000, immutable",
+            **extra,
+        )
+        return {
+            "url": self._url(key),
+            "public_id": key,
+            "format": format,
+            "bytes": len(data)
+        }
+
+    def info(self, key: str, format: str):
+        from botocore.exceptions import ClientError
+
+        key = f"{key}.{format}"
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {
+            "url": self._url(key),
+            "public_id": key,
+            "format": format,
+            "bytes": head["ContentLength"]
+        }
+
+    def get(self, key: str, format: str):
+        if self.info(key, format) is None:
+            return None
+        return self.client.get_object(Bucket=self.bucket, Key=f"{key}.{format}")["Body"].read()
+
+    def delete(self, keys: list) -> int:
+        deleted = 0
+        for start in range(0, len(keys), self.delete_batch_size):
+            response = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": k} for k in keys[start:start + self.delete_batch_size]], "Quiet": False},
+            )
+            deleted += len(response.get("Deleted", []))
+        return deleted
+
+    def delete_run(self, run_id: str, prefix: str) -> int:
+        paginator = self.client.get_paginator("list_objects_v2")
+        keys = [
+            obj["Key"]
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix)
+            for obj in page.get("Contents", [])
+        ]
+        return self.delete(keys)
+
+
+ARTIFACT_BACKENDS = {
+    "cloudinary": CloudinaryStore,
+    "local": LocalStore,
+    "s3": S3Store,
+}
+
+
+def build_artifact_store(backend: str = ARTIFACT_BACKEND):
+    """
+    The artifact store selected by ARTIFACT_BACKEND.
+    """
+    if backend not in ARTIFACT_BACKENDS:
+        raise ValueError(f"Unknown ARTIFACT_BACKEND '{backend}', expected one of {sorted(ARTIFACT_BACKENDS)}")
+    return ARTIFACT_BACKENDS[backend]()
+
+
+ARTIFACT_STORE = build_artifact_store()
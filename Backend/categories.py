@@ -0,0 +1,113 @@
+import os
+import numpy as np
+import pandas as pd
+
+# plots and stored payloads keep this many categories, the rest is folded into OTHER_LABEL
+CATEGORY_TOP_K = int(os.getenv("CATEGORY_TOP_K", "30"))
+OTHER_LABEL = "(other)"
+
+
+class CategoryCounts:
+    """
+    Frequencies of one categorical column: one label per distinct value and an integer count
+    per label, missing values counted apart.
+
+    Built from a single factorization (integer codes + one bincount), so cardinality, rare
+    categories, dominance and the top-K all come from the same counts array and only the
+    labels that are actually reported are materialized.
+    """
+
+    def __init__(self, labels: pd.Index, counts: np.ndarray, null_count: int = 0):
+        counts = np.asarray(counts, dtype=np.int64)
+        keep = counts > 0
+        if not keep.all():
+            # unused categories of a `category` column
+            labels, counts = labels[keep], counts[keep]
+        self.labels = labels
+        self.null_count = int(null_count)
+        # NaN is the last entry, like a category of its own (value_counts(dropna=False))
+        self.counts = np.append(counts, self.null_count) if self.null_count else counts
+        self.total = int(self.counts.sum())
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "CategoryCounts":
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, labels = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, labels = pd.factorize(series, use_na_sentinel=True)
+        # missing values have code -1: shifted by one they land in bin 0
+        binned = np.bincount(codes.astype(np.int64) + 1, minlength=len(labels) + 1)
+        return cls(pd.Index(labels), binned[1:], null_count=binned[0])
+
+    @property
+    def cardinality(self) -> int:
+        """
+        Distinct values, NaN excluded.
+        """
+        return len(self.labels)
+
+    @property
+    def num_entries(self) -> int:
+        """
+        Distinct values, NaN counted as one when present.
+        """
+        return len(self.counts)
+
+    def dominance(self) -> float:
+        """
+        Share of the most frequent entry (NaN included).
+        """
+        return float(self.counts.max() / self.total) if self.total else 0.0
+
+    def _labels(self, entries: np.ndarray) -> np.ndarray:
+        # only the requested labels are gathered; the NaN entry is past the last label
+        labels = np.full(len(entries), np.nan, dtype=object)
+        known = entries < len(self.labels)
+        if known.any():
+            labels[known] = self.labels.take(entries[known]).to_numpy(dtype=object)
+        return labels
+
+    def _ranked(self, entries: np.ndarray, limit: int = None) -> np.ndarray:
+        # most frequent first, ties in order of first appearance
+        if limit is not None and limit < len(entries):
+            if limit <= 0:
+                return entries[:0]
+            entries = entries[np.argpartition(-self.counts[entries], limit - 1)[:limit]]
+        return entries[np.lexsort((entries, -self.counts[entries]))]
+
+    def top(self, k: int = CATEGORY_TOP_K, dropna: bool = False) -> pd.Series:
+        """
+        The `k` most frequent entries, with every other entry summed into OTHER_LABEL.
+        """
+        entries = np.arange(self.cardinality if dropna else self.num_entries)
+        top = self._ranked(entries, k)
+        labels, counts = self._labels(top), self.counts[top]
+        rest = int(self.counts[entries].sum() - counts.sum())
+        if rest:
+            labels, counts = np.append(labels, OTHER_LABEL), np.append(counts, rest)
+        return pd.Series(counts, index=pd.Index(labels, dtype=object), dtype="int64")
+
+    def rare(self, threshold: float, num_rows: int = None, decimals: int = None) -> np.ndarray:
+        """
+        Entries whose share of `num_rows` (default: all counted values) is below `threshold`,
+        optionally comparing percentages rounded to `decimals`.
+        """
+        n = num_rows if num_rows is not None else self.total
+        if not n:
+            return np.arange(0)
+        if decimals is None:
+            return np.flatnonzero(self.counts / n < threshold)
+        return np.flatnonzero(np.round(self.counts / n * 100, decimals) < threshold * 100)
+
+    def labels_of(self, entries: np.ndarray, limit: int = CATEGORY_TOP_K) -> list:
+        """
+        Labels of the `limit` most frequent of `entries`.
+        """
+        return self._labels(self._ranked(entries, limit)).tolist()
+
+
+def category_counts(series: pd.Series) -> CategoryCounts:
+    """
+    Factorize a column once and count every category.
+    """
+    return CategoryCounts.from_series(series)
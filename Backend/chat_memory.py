@@ -0,0 +1,165 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from Backend.prompt_digest import estimate_tokens
+
+CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "500"))
+CHAT_SESSION_TTL_SECONDS = int(os.getenv("CHAT_SESSION_TTL_SECONDS", str(6 * 3600)))
+CHAT_WINDOW_TOKENS = int(os.getenv("CHAT_WINDOW_TOKENS", "3000"))
+CHAT_MIN_RECENT_MESSAGES = 4
+
+
+def _message_tokens(messages: Sequence[BaseMessage]) -> int:
+    return sum(estimate_tokens(str(m.content)) for m in messages)
+
+
+class WindowedChatHistory(BaseChatMessageHistory):
+    """
+    Chat history with a fixed EDA context, a rolling summary of older turns and a token
+    window of recent messages. When the recent messages exceed `window_tokens` the oldest
+    ones are folded into the summary by `summarize(summary, messages) -> str`.
+    """
+
+    def __init__(self, context: str, summarize: Callable, window_tokens: int = CHAT_WINDOW_TOKENS):
+        self.context = context
+        self.summary = ""
+        self.recent = []
+        self.window_tokens = window_tokens
+        self._summarize = summarize
+        self._lock = threading.Lock()
+        self._folding = False
+        # bumped by clear(), so a fold started before it is dropped
+        self._generation = 0
+
+    @property
+    def messages(self) -> list:
+        with self._lock:
+            messages = [SystemMessage(content=self.context)]
+            if self.summary:
+                messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}"))
+            return messages + list(self.recent)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        with self._lock:
+            self.recent.extend(messages)
+            fold = self._plan_fold()
+        if fold is not None:
+            # the LLM call runs without the lock: readers and writers of this session never wait on it
+            self._fold(*fold)
+
+    def _plan_fold(self):
+        """
+        With the lock held: (summary, oldest messages to fold, generation) when the recent
+        messages overflow the window and no fold is running, else None.
+        """
+        if self._folding:
+            return None
+        if _message_tokens(self.recent) <= self.window_tokens:
+            return None
+        if len(self.recent) <= CHAT_MIN_RECENT_MESSAGES:
+            return None
+
+        # fold the oldest messages until the rest fits in half the window
+        keep = len(self.recent)
+        while keep > CHAT_MIN_RECENT_MESSAGES and _message_tokens(self.recent[-keep:]) > self.window_tokens // 2:
+            keep -= 1
+        self._folding = True
+        return self.summary, self.recent[:-keep], self._generation
+
+    def _fold(self, summary: str, folded: list, generation: int):
+        try:
+            new_summary = self._summarize(summary, folded)
+        except Exception as e:
+            print(f"[WARN] chat summarization failed → {e}")
+            new_summary = None
+        with self._lock:
+            self._folding = False
+            # folded messages stay in `recent` until here; unless the history was cleared,
+            # only appends happened meanwhile, so they are still the oldest ones
+            if new_summary is not None and generation == self._generation:
+                self.summary = new_summary
+                self.recent = self.recent[len(folded):]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.summary = ""
+            self.recent = []
+            self._generation += 1
+
+
+class ChatMemoryStore:
+    """
+    Chat histories by run_id with LRU eviction (`max_sessions`) and idle expiry (`ttl`).
+    Supports `in`, `store[run_id]` and `store[run_id] = history` like the old dict.
+    """
+
+    def __init__(self, max_sessions: int = CHAT_MAX_SESSIONS, ttl: int = CHAT_SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        expired = [k for k, (_, seen) in self._items.items() if now - seen > self.ttl]
+        for key in expired:
+            del self._items[key]
+        while len(self._items) > self.max_sessions:
+            self._items.popitem(last=False)
+
+    def get(self, run_id: str):
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            item = self._items.get(run_id)
+            if item is None:
+                return None
+            self._items[run_id] = (item[0], now)
+            self._items.move_to_end(run_id)
+            return item[0]
+
+    def put(self, run_id: str, history: BaseChatMessageHistory):
+        now = time.time()
+        with self._lock:
+            self._items[run_id] = (history, now)
+            self._items.move_to_end(run_id)
+            self._evict(now)
+
+    def get_or_create(self, run_id: str, factory: Callable):
+        """
+        Existing history for `run_id` or a new one from `factory()` (called without the lock held).
+        """
+        history = self.get(run_id)
+        if history is None:
+            history = factory()
+            with self._lock:
+                if run_id in self._items:
+                    return self._items[run_id][0]
+            self.put(run_id, history)
+        return history
+
+    def pop(self, run_id: str, default=None):
+        with self._lock:
+            item = self._items.pop(run_id, None)
+        return default if item is None else item[0]
+
+    def __contains__(self, run_id: str) -> bool:
+        return self.get(run_id) is not None
+
+    def __getitem__(self, run_id: str):
+        history = self.get(run_id)
+        if history is None:
+            raise KeyError(run_id)
+        return history
+
+    def __setitem__(self, run_id: str, history: BaseChatMessageHistory):
+        self.put(run_id, history)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
@@ -60,27 +60,34 @@ EDA Insight Summary:
 from langchain_core.chat_history import InMemoryChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import SystemMessage
-from Backend.models import llm_groq_1, llm_cohere
-from Backend.mongo import fetch_eda_data
-
-# Global in-memory store
-CHAT_STORE = {}
+from langchain_core.messages import AIMessage
+import asyncio
+from Backend.models import llm_groq_1, llm_cohere, LLM_POOL, invoke_with_fallback
+from Backend.mongo import fetch_eda_data, fetch_eda_data_async
+from Backend.prompt import chat_summary_prompt
+from Backend.chat_memory import ChatMemoryStore, WindowedChatHistory
+
+# Global in-memory store, bounded (LRU + idle TTL)
+CHAT_STORE = ChatMemoryStore()
+
+
+def summarize_chat(summary: str, messages: list) -> str:
+    """
+    Fold older chat messages into the rolling conversation summary.
+    """
+    prompt = chat_summary_prompt.format(
+        summary=summary or "(empty)",
+        messages="\n".join(f"{m.type}: {m.content}" for m in messages),
+    )
+    return invoke_with_fallback(llms=LLM_POOL, messages=prompt).content
 
-def chat_with_data(run_id: str, user_query: str) -> str:
-    # 1️⃣ Create or fetch history
-    if run_id not in CHAT_STORE:
-        # print(run_id)
-        CHAT_STORE[run_id] = InMemoryChatMessageHistory()
 
-        # Load EDA once
-        doc = fetch_eda_data(run_id)
-        if not doc:
-            raise ValueError("EDA data not found for this run_id")
+def chat_history_from_doc(doc: dict) -> WindowedChatHistory:
+    if not doc:
+        raise ValueError("EDA data not found for this run_id")
 
-        CHAT_STORE[run_id].add_message(
-            SystemMessage(
-                content=f"""
+    return WindowedChatHistory(
+        context=f"""
                     You are a senior data scientist.
                     You already analyzed this dataset.
 
@@ -92,20 +99,34 @@ def chat_with_data(run_id: str, user_query: str) -> str:
 
                     Answer user questions ONLY using this information.
                     Do NOT ask for the dataset again.
-                """
-            )
-        )
+                """,
+        summarize=summarize_chat,
+    )
+
+
+def new_chat_history(run_id: str) -> WindowedChatHistory:
+    # Load EDA once
+    return chat_history_from_doc(fetch_eda_data(run_id))
+
+
+CHAT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "{system}"),
+    ("placeholder", "{history}"),
+    ("human", "{input}")
+])
+
+
+def get_chat_history(run_id: str) -> WindowedChatHistory:
+    return CHAT_STORE.get_or_create(run_id, lambda: new_chat_history(run_id))
+
+
+def chat_with_data(run_id: str, user_query: str) -> str:
+    # 1️⃣ Create or fetch history
+    history = get_chat_history(run_id)
     print(run_id)
-    history = CHAT_STORE[run_id]
 
     # 2️⃣ Prompt
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "{system}"),
-        ("placeholder", "{history}"),
-        ("human", "{input}")
-    ])
-
-    chain = prompt | llm_cohere
+    chain = CHAT_PROMPT | llm_cohere
 
     # 3️⃣ Runnable with history
     runnable = RunnableWithMessageHistory(
@@ -124,3 +145,35 @@ def chat_with_data(run_id: str, user_query: str) -> str:
     )
     # print(CHAT_STORE[run_id])
     return response.content
+
+
+async def stream_chat_with_data(run_id: str, user_query: str):
+    """
+    Async generator of answer tokens as the model produces them.
+    The exchange is added to the history only once the answer is complete, so a
+    cancelled stream (client gone) leaves the history untouched.
+    """
+    history = CHAT_STORE.get(run_id)
+    if history is None:
+        doc = await fetch_eda_data_async(run_id)
+        history = CHAT_STORE.get_or_create(run_id, lambda: chat_history_from_doc(doc))
+
+    chain = CHAT_PROMPT | llm_cohere
+    inputs = {
+        "input": user_query,
+        "system": "You are a senior data scientist.",
+        "history": history.messages,
+    }
+
+    parts = []
+    async for chunk in chain.astream(inputs):
+        text = chunk.content if isinstance(chunk.content, str) else ""
+        if text:
+            parts.append(text)
+            yield text
+
+    # summarization of older turns may call an LLM, keep it off the event loop
+    await asyncio.to_thread(
+        history.add_messages,
+        [HumanMessage(content=user_query), AIMessage(content="".join(parts))],
+    )
@@ -0,0 +1,119 @@
+import os
+import asyncio
+import threading
+
+from pymongo import MongoClient, ASCENDING
+
+if os.getenv("RAILWAY_ENVIRONMENT") is None:
+    from dotenv import load_dotenv
+    load_dotenv()
+
+MONGO_URI = os.environ["MONGO_URI"]
+DB_NAME = os.environ["DB_NAME"]
+COLLECTION_NAME = os.environ["COLLECTION_NAME"]
+
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# Mongo's TTL monitor removes expired runs this long after `expires_at`, as a backstop
+# for the run reaper (which also deletes their images)
+RUN_EXPIRY_GRACE_SECONDS = int(os.getenv("RUN_EXPIRY_GRACE_SECONDS", str(24 * 3600)))
+
+# MONGO_URI=mongomock:// runs against an in-process stand-in (tests, offline runs)
+IN_PROCESS = MONGO_URI.startswith("mongomock://")
+
+# narrow projections for every read the API does
+PROJECTIONS = {
+    "chat_context": {"_id": 0, "llm_overview": 1, "eda_summary": 1},
+    "visual_outputs": {"_id": 0, "visual_outputs": 1, "digest": 1, "artifacts_run_id": 1},
+}
+
+_client = None
+_async_client = None
+_lock = threading.Lock()
+
+
+def _pool_options() -> dict:
+    return {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "retryWrites": True,
+    }
+
+
+def get_client():
+    """
+    The process-wide MongoClient (one connection pool shared by every module).
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            if IN_PROCESS:
+                import mongomock
+                _client = mongomock.MongoClient()
+            else:
+                _client = MongoClient(MONGO_URI, **_pool_options())
+        return _client
+
+
+def get_collection(name: str = None):
+    return get_client()[DB_NAME][name or COLLECTION_NAME]
+
+
+class _ThreadedAsyncCollection:
+    """
+    Async facade over a synchronous collection (used when motor is unavailable
+    or with the in-process stand-in).
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        return call
+
+
+def get_async_collection(name: str = None):
+    """
+    Collection for async FastAPI handlers: motor when installed, otherwise the
+    synchronous driver run in worker threads.
+    """
+    global _async_client
+    if IN_PROCESS:
+        return _ThreadedAsyncCollection(get_collection(name))
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient
+    except ImportError:
+        return _ThreadedAsyncCollection(get_collection(name))
+
+    with _lock:
+        if _async_client is None:
+            _async_client = AsyncIOMotorClient(MONGO_URI, **_pool_options())
+    return _async_client[DB_NAME][name or COLLECTION_NAME]
+
+
+def ensure_indexes():
+    """
+    Create the indexes the API relies on. Safe to call on every startup.
+    """
+    runs = get_collection()
+    try:
+        runs.create_index([("run_id", ASCENDING)], unique=True, name="run_id_unique")
+    except Exception as e:
+        # existing duplicates: fall back to a plain index so lookups stay indexed
+        print(f"[WARN] unique run_id index not created → {e}")
+        runs.create_index([("run_id", ASCENDING)], name="run_id")
+    runs.create_index([("digest", ASCENDING)], name="digest", sparse=True)
+    runs.create_index(
+        [("expires_at", ASCENDING)],
+        name="expires_at_ttl",
+        expireAfterSeconds=RUN_EXPIRY_GRACE_SECONDS,
+    )
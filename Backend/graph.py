@@ -1,26 +1,28 @@
 from langgraph.graph import StateGraph,START,END
 from Backend.state import SummaryState
 from Backend.main_nodes import Overview, quality, statistics, categorical_analysis, outlier, correlation, target_analysis, eda_insight_summary
+from Backend.telemetry import instrument_node
 
 graph = StateGraph(SummaryState)
 
-graph.add_node("overview",Overview)
-graph.add_node("quality",quality)
-graph.add_node("stat",statistics)
-graph.add_node("category",categorical_analysis)
-graph.add_node("outlier",outlier)
-graph.add_node("correlation",correlation)
-graph.add_node("target_analysis",target_analysis)
-graph.add_node("summary",eda_insight_summary)
+graph.add_node("overview",instrument_node("overview",Overview))
+graph.add_node("quality",instrument_node("quality",quality))
+graph.add_node("stat",instrument_node("stat",statistics))
+graph.add_node("category",instrument_node("category",categorical_analysis))
+graph.add_node("outlier",instrument_node("outlier",outlier))
+graph.add_node("correlation",instrument_node("correlation",correlation))
+graph.add_node("target_analysis",instrument_node("target_analysis",target_analysis))
+graph.add_node("summary",instrument_node("summary",eda_insight_summary))
+
+# quality, stat, category, outlier, correlation and target_analysis only read
+# state["data"], so they fan out from overview and run in the same superstep.
+# summary waits for all of them before it builds the report.
+ANALYSIS_NODES = ["quality","stat","category","outlier","correlation","target_analysis"]
 
 graph.set_entry_point("overview")
-graph.add_edge("overview","quality")
-graph.add_edge("quality","stat")
-graph.add_edge("stat","category")
-graph.add_edge("category","outlier")
-graph.add_edge("outlier","correlation")
-graph.add_edge("correlation","target_analysis")
-graph.add_edge("target_analysis","summary")
+for node in ANALYSIS_NODES:
+    graph.add_edge("overview",node)
+graph.add_edge(ANALYSIS_NODES,"summary")
 graph.add_edge("summary",END)
 
 eda_workflow = graph.compile()
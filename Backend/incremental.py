@@ -0,0 +1,528 @@
+import os
+import time
+import threading
+import uuid
+import zlib
+
+import bson
+import numpy as np
+import pandas as pd
+from pymongo import ASCENDING
+
+from Backend.db import get_collection, RUN_EXPIRY_GRACE_SECONDS
+from Backend.mongo import make_mongo_safe
+from Backend.sketches import CoMoments, HeavyHitters
+from Backend.categories import CategoryCounts
+from Backend.streaming import StreamingProfiler, DEFAULT_CHUNKSIZE
+from Backend.missingness import RowBinnedNulls, NullityCounts
+from Backend.main_nodes import MISSING_HEATMAP_BINS
+from Backend.plots import (
+    histogram_figure_from_counts, box_figure_from_summary, sketch_box_summary,
+    missing_heatmap_figure, correlation_heatmap_figure, category_bar_figure, target_class_figure,
+)
+from Backend.tools_functions import (
+    data_statistics, get_important_numerical_columns, data_categorical, analyze_categorical_columns,
+    high_correlation_pairs, vif_from_correlation, vif_entries,
+)
+from Backend.storage_graphs import submit_plotly_figure, resolve_figures, figure_public_id, versioned_plot_name
+from Backend.prompt_digest import compact_prompt_inputs
+
+# keep the mergeable state of every run so rows can be appended to it later
+APPEND_STATE = os.getenv("APPEND_STATE", "1") == "1"
+RUN_STATE_COLLECTION = os.getenv("RUN_STATE_COLLECTION", "eda_run_state")
+# a figure is redrawn once its content moved by more than this share of its scale
+# (axis range for numeric plots, 1 for shares / fractions / correlations)
+APPEND_FIGURE_TOLERANCE = float(os.getenv("APPEND_FIGURE_TOLERANCE", "0.01"))
+# category frequencies stay exact up to this many distinct values per column
+APPEND_CATEGORY_K = int(os.getenv("APPEND_CATEGORY_K", "1000"))
+# nullity pattern counts stay exact up to this many distinct patterns
+APPEND_NULLITY_K = int(os.getenv("APPEND_NULLITY_K", "1000"))
+# states larger than this are not stored (MongoDB rejects documents over 16 MB);
+# the correlation sums grow with the square of the numeric column count
+APPEND_STATE_MAX_BYTES = int(os.getenv("APPEND_STATE_MAX_BYTES", str(15 * 1024 * 1024)))
+
+# visual_outputs blocks in the order of the graph, single-figure blocks hold a dict or None
+VISUAL_OUTPUT_KEYS = [
+    "data_quality", "data_statistics_boxplot", "data_statistics_histogram", "categorical_analysis",
+    "data_outlier_plot", "data_correlation", "data_targer_analysis",
+]
+SINGLE_OUTPUT_KEYS = {"data_quality", "data_correlation", "data_targer_analysis"}
+
+# state section -> compact_prompt_inputs entry the summary prompt reads
+SECTION_INPUTS = {
+    "data_overview": "data_overview",
+    "data_quality_overview": "data_quality",
+    "data_stat_overview": "numerical_stats",
+    "categorical_analysis_overview": "categorical_analysis",
+    "data_outlier_overview": "outlier_analysis",
+    "data_correlation_overview": "correlation_analysis",
+    "data_target_overview": "target_analysis",
+}
+
+DECILES = np.linspace(0, 1, 11)
+
+# appends to one run are serialized in-process, `version` guards across processes
+_RUN_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+class AppendConflictError(RuntimeError):
+    pass
+
+
+class RunStateTooLargeError(ValueError):
+    pass
+
+
+def run_lock(run_id: str) -> threading.Lock:
+    return _RUN_LOCKS[zlib.crc32(run_id.encode()) % len(_RUN_LOCKS)]
+
+
+def _numeric_matrix(df: pd.DataFrame, columns: list) -> np.ndarray:
+    return np.column_stack([
+        pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        for col in columns
+    ]) if columns else np.zeros((len(df), 0))
+
+
+def _fingerprint(keys: list, values, scale: float = 1.0) -> dict:
+    return {
+        "keys": [str(k) for k in keys],
+        "values": np.nan_to_num(np.asarray(values, dtype=float).ravel()).tolist(),
+        "scale": float(scale),
+    }
+
+
+def _share_fingerprint(counts: pd.Series) -> dict:
+    counts = counts.sort_index(key=lambda index: index.map(str))
+    total = counts.sum()
+    return _fingerprint(counts.index, counts / total if total else counts)
+
+
+def _moved(previous: dict, current: dict, tolerance: float) -> bool:
+    """
+    True when a figure drawn from `previous` no longer represents `current`.
+    """
+    if previous is None or previous["keys"] != current["keys"] or len(previous["values"]) != len(current["values"]):
+        return True
+    delta = np.max(np.abs(np.subtract(previous["values"], current["values"])), initial=0.0)
+    return delta > tolerance * (previous["scale"] or 1.0)
+
+
+class RunState:
+    """
+    Mergeable state of a run: sketches per column (counts, moments, quantiles, distinct
+    counts, category frequencies), correlation sums of products, binned null counts, nullity
+    pattern and co-missing counts and the figures drawn so far. Every section and figure is recomputed from it, so appended
+    rows are read once and never the rows already analyzed.
+    """
+
+    def __init__(self, profiler: StreamingProfiler, comoments: CoMoments, nulls: RowBinnedNulls,
+                 target: dict = None, target_counts: HeavyHitters = None, nullity: NullityCounts = None):
+        self.profiler = profiler
+        self.comoments = comoments
+        self.nulls = nulls
+        # None for states stored before nullity patterns were kept
+        self.nullity = nullity
+        self.target = target or {}
+        self.target_counts = target_counts
+        self.version = 0
+        self.appended_rows = 0
+        # plot name -> {"key": visual output key, "fingerprint": ..., "output": stored metadata}
+        self.figures = {}
+        self.summary_inputs = {}
+        # row count the current summary was written for
+        self.summary_rows = None
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, target: dict = None) -> "RunState":
+        target = dict(target or {})
+        target_counts = None
+        if target.get("task_type") == "classification" and target.get("target_column") in df.columns:
+            target_counts = HeavyHitters(k=APPEND_CATEGORY_K)
+        state = cls(
+            StreamingProfiler(heavy_hitters_k=APPEND_CATEGORY_K),
+            None,
+            RowBinnedNulls(df.columns.tolist(), bins=MISSING_HEATMAP_BINS),
+            target=target,
+            target_counts=target_counts,
+            nullity=NullityCounts(df.columns.tolist(), k=APPEND_NULLITY_K),
+        )
+        state._update(df)
+        return state
+
+    @property
+    def columns(self) -> list:
+        return list(self.profiler.columns)
+
+    def _update(self, df: pd.DataFrame):
+        # at least one (possibly empty) chunk, so the profiler always knows the columns
+        for start in range(0, max(len(df), 1), DEFAULT_CHUNKSIZE):
+            chunk = df.iloc[start:start + DEFAULT_CHUNKSIZE]
+            self.profiler.update(chunk)
+            if self.comoments is None:
+                self.comoments = CoMoments(self.profiler.numerical_columns)
+            self.comoments.update(_numeric_matrix(chunk, self.comoments.columns))
+        self.nulls.update(df)
+        if self.nullity is not None:
+            self.nullity.update(df)
+        if self.target_counts is not None:
+            self.target_counts.update(df[self.target["target_column"]])
+
+    def update(self, df: pd.DataFrame) -> "RunState":
+        """
+        Merge appended rows. They must have every column of the run, other columns are ignored.
+        """
+        missing = [c for c in self.columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"Appended rows are missing columns of the run: {missing}")
+        self._update(df[self.columns])
+        self.appended_rows += int(df.shape[0])
+        return self
+
+    def correlation(self, threshold: float = 0.8) -> dict:
+        """
+        data_correlation layout from the merged sums of products. VIFs come from the inverse
+        of the pairwise correlation matrix (data_correlation uses complete rows only).
+        """
+        moments = self.profiler.moments
+        cols = [c for c in self.comoments.columns if moments[c].n > 1 and moments[c].m2 > 0]
+        if len(cols) < 2:
+            return {
+                "correlation_matrix": None,
+                "high_correlation_features": [],
+                "redundant_features": [],
+                "VIF_factor": [],
+                "note": "Not enough valid numeric columns for correlation analysis"
+            }
+        idx = [self.comoments.columns.index(c) for c in cols]
+        corr_matrix = pd.DataFrame(self.comoments.corr()[np.ix_(idx, idx)], index=cols, columns=cols).fillna(0)
+        high_corr_features = high_correlation_pairs(corr_matrix, threshold)
+        return {
+            "correlation_matrix": corr_matrix,
+            "high_correlation_features": high_corr_features,
+            "redundant_features": list(set(pair["feature_2"] for pair in high_corr_features)),
+            "VIF_factor": vif_entries(cols, vif_from_correlation(corr_matrix.to_numpy())),
+            "method": "pearson",
+        }
+
+    def sections(self, profile) -> dict:
+        """
+        Every EDA section in the layout of the graph nodes (profile = `profiler.column_profile()`).
+        Duplicates, distinct counts and outlier counts are sketch estimates, nullity pattern
+        counts too once there are more than APPEND_NULLITY_K distinct patterns.
+        """
+        outlier_report, anomaly_columns = self.profiler.outliers()
+        quality = self.profiler.quality()
+        if self.nullity is not None and sum(self.profiler.null_counts.values()) > 0:
+            quality["nullity_patterns"] = self.nullity.nullity_patterns()
+            quality["co_missingness"] = self.nullity.co_missingness().to_dict()
+        return {
+            # version / appended_rows are bookkeeping kept on the run document, not analysis
+            "data_overview": self.profiler.overview(),
+            "data_quality_overview": quality,
+            "data_stat_overview": data_statistics(None, profile=profile),
+            "categorical_analysis_overview": data_categorical(None, profile=profile),
+            "data_outlier_overview": [outlier_report, anomaly_columns],
+            "data_correlation_overview": self.correlation(),
+            "data_target_overview": self.target,
+        }
+
+    def _plottable(self, col) -> bool:
+        return col in self.profiler.moments and self.profiler.moments[col].n > 0
+
+    def _numeric_figure(self, col):
+        moments = self.profiler.moments[col]
+        sketch = self.profiler.quantiles[col]
+        deciles = [sketch.quantile(q) for q in DECILES[1:-1]]
+        fingerprint = _fingerprint(range(11), [moments.min, *deciles, moments.max], moments.max - moments.min)
+
+        def histogram(title):
+            counts, edges = sketch.histogram(bins=30, range=(moments.min, moments.max))
+            return histogram_figure_from_counts(counts, edges, name=str(col), title=title)
+
+        def box(title):
+            return box_figure_from_summary(sketch_box_summary(moments, sketch), name=str(col), title=title)
+
+        return fingerprint, histogram, box
+
+    def figure_specs(self, profile, sections: dict) -> dict:
+        """
+        {plot name: (visual output key, fingerprint, build())} of every figure the merged
+        data calls for, chosen by the same rules as the graph nodes.
+        """
+        specs = {}
+        if sum(self.profiler.null_counts.values()) > 0:
+            fractions, row_starts = self.nulls.fractions()
+            specs["missing_value_heatmap"] = (
+                "data_quality",
+                _fingerprint(row_starts, fractions),
+                lambda: missing_heatmap_figure(fractions, row_starts, self.nulls.columns),
+            )
+
+        for col in get_important_numerical_columns(None, top_k=5, profile=profile):
+            if not self._plottable(col):
+                continue
+            fingerprint, histogram, box = self._numeric_figure(col)
+            specs[f"boxplot_{col}"] = (
+                "data_statistics_boxplot", fingerprint, lambda box=box, col=col: box(f"Box Plot - {col}"),
+            )
+            specs[f"histogram_{col}"] = (
+                "data_statistics_histogram", fingerprint,
+                lambda histogram=histogram, col=col: histogram(f"Histogram - {col}"),
+            )
+
+        for item in analyze_categorical_columns(None, profile=profile):
+            col, value_counts = item["column"], item["value_counts"]
+            specs[f"count_plot_{col}"] = (
+                "categorical_analysis", _share_fingerprint(value_counts),
+                lambda value_counts=value_counts, col=col: category_bar_figure(value_counts, col),
+            )
+
+        for col in sections["data_outlier_overview"][1]:
+            if not self._plottable(col):
+                continue
+            fingerprint, _, box = self._numeric_figure(col)
+            specs[f"outlier_box_plot_{col}"] = (
+                "data_outlier_plot", fingerprint, lambda box=box, col=col: box(f"Outlier Box Plot - {col}"),
+            )
+
+        corr_matrix = sections["data_correlation_overview"]["correlation_matrix"]
+        if corr_matrix is not None:
+            specs["corr_heatmap"] = (
+                "data_correlation",
+                _fingerprint(corr_matrix.columns, corr_matrix.to_numpy()),
+                lambda: correlation_heatmap_figure(corr_matrix),
+            )
+
+        col = self.target.get("target_column")
+        if self.target_counts is not None:
+            top = self.target_counts.top()
+            counts = CategoryCounts(
+                pd.Index([k for k, _ in top], dtype=object), np.array([c for _, c in top], dtype=np.int64),
+            ).top(dropna=True)
+            specs["target_distribution"] = (
+                "data_targer_analysis", _share_fingerprint(counts),
+                lambda: target_class_figure(counts, col),
+            )
+        elif self._plottable(col):
+            fingerprint, histogram, _ = self._numeric_figure(col)
+            specs["target_distribution"] = (
+                "data_targer_analysis", fingerprint, lambda: histogram(f"Target Distribution - {col}"),
+            )
+        return specs
+
+    def adopt_figures(self, run_id: str, visual_outputs: list, specs: dict):
+        """
+        Record the figures a full run already stored (matched by their run-scoped key).
+        """
+        outputs = []
+        for block in visual_outputs or []:
+            for value in block.values():
+                outputs.extend(v for v in (value if isinstance(value, list) else [value]) if isinstance(v, dict))
+
+        for plot, (key, fingerprint, _) in specs.items():
+            public_id = figure_public_id(plot, run_id=run_id)
+            for output in outputs:
+                if output.get("public_id") == public_id or str(output.get("public_id")).startswith(f"{public_id}."):
+                    self.figures[plot] = {"key": key, "fingerprint": fingerprint, "output": output}
+                    break
+
+    def refresh_figures(self, run_id: str, specs: dict, tolerance: float = APPEND_FIGURE_TOLERANCE) -> list:
+        """
+        Redraw the figures that are new or moved by more than `tolerance` since they were
+        drawn, drop the ones the data no longer calls for. Returns the redrawn plot names.
+        """
+        pending = {}
+        # one key per attempt: a failed append does not move the version, and its retry must not
+        # overwrite figures that are already served as immutable
+        attempt = uuid.uuid4().hex[:8]
+        for plot, (key, fingerprint, build) in specs.items():
+            previous = self.figures.get(plot)
+            if previous is not None and not _moved(previous["fingerprint"], fingerprint, tolerance):
+                continue
+            pending[plot] = submit_plotly_figure(
+                build(), plot_name=versioned_plot_name(plot, self.version, attempt), run_id=run_id
+            )
+
+        figures = {}
+        redrawn = []
+        for plot, (key, fingerprint, _) in specs.items():
+            if plot in pending:
+                output = resolve_figures([{key: pending[plot]}])[0][key]
+                if output is not None:
+                    figures[plot] = {"key": key, "fingerprint": fingerprint, "output": output}
+                    redrawn.append(plot)
+                    continue
+            if plot in self.figures:
+                # unchanged, or the upload failed: keep what is there
+                figures[plot] = self.figures[plot]
+        self.figures = figures
+        return redrawn
+
+    def visual_outputs(self) -> list:
+        blocks = {key: (None if key in SINGLE_OUTPUT_KEYS else []) for key in VISUAL_OUTPUT_KEYS}
+        for figure in self.figures.values():
+            if figure["key"] in SINGLE_OUTPUT_KEYS:
+                blocks[figure["key"]] = figure["output"]
+            else:
+                blocks[figure["key"]].append(figure["output"])
+        return [{key: value} for key, value in blocks.items()]
+
+    def changed_sections(self, sections: dict) -> list:
+        """
+        Sections whose summary prompt input differs from the last summarized one; remembers the new inputs.
+        A row count within APPEND_FIGURE_TOLERANCE of the summarized one does not count as a change.
+        """
+        overview = sections["data_overview"]
+        rows = self.summary_rows
+        if not rows or abs(overview["num_rows"] - rows) > APPEND_FIGURE_TOLERANCE * rows:
+            rows = overview["num_rows"]
+        self.summary_rows = rows
+        inputs, _ = compact_prompt_inputs({**sections, "data_overview": {**overview, "num_rows": rows}})
+        current = {name: inputs[SECTION_INPUTS[name]] for name in sections}
+        changed = [name for name in sections if current[name] != self.summary_inputs.get(name)]
+        self.summary_inputs = current
+        return changed
+
+    def to_dict(self) -> dict:
+        return {
+            "profiler": self.profiler.to_dict(),
+            "comoments": self.comoments.to_dict(),
+            "nulls": self.nulls.to_dict(),
+            "nullity": None if self.nullity is None else self.nullity.to_dict(),
+            "target": self.target,
+            "target_counts": None if self.target_counts is None else self.target_counts.to_dict(),
+            "appended_rows": self.appended_rows,
+            # plot names carry column names, which are not always valid document keys
+            "figures": [{"plot": plot, **figure} for plot, figure in self.figures.items()],
+            "summary_inputs": self.summary_inputs,
+            "summary_rows": self.summary_rows,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict, version: int = 0) -> "RunState":
+        run_state = cls(
+            StreamingProfiler.from_dict(state["profiler"]),
+            CoMoments.from_dict(state["comoments"]),
+            RowBinnedNulls.from_dict(state["nulls"]),
+            target=state.get("target"),
+            target_counts=None if state.get("target_counts") is None else HeavyHitters.from_dict(state["target_counts"]),
+            nullity=None if state.get("nullity") is None else NullityCounts.from_dict(state["nullity"]),
+        )
+        run_state.version = version
+        run_state.appended_rows = state.get("appended_rows", 0)
+        run_state.figures = {
+            figure["plot"]: {k: v for k, v in figure.items() if k != "plot"}
+            for figure in state.get("figures", [])
+        }
+        run_state.summary_inputs = state.get("summary_inputs", {})
+        run_state.summary_rows = state.get("summary_rows")
+        return run_state
+
+
+def build_run_state(df: pd.DataFrame, run_id: str, target: dict, visual_outputs: list) -> RunState:
+    """
+    Mergeable state of a finished full run, linked to the figures it stored.
+    """
+    state = RunState.build(df, target)
+    profile = state.profiler.column_profile()
+    sections = state.sections(profile)
+    state.adopt_figures(run_id, visual_outputs, state.figure_specs(profile, sections))
+    state.changed_sections(sections)
+    return state
+
+
+def _state_collection():
+    return get_collection(RUN_STATE_COLLECTION)
+
+
+def ensure_state_indexes():
+    collection = _state_collection()
+    collection.create_index([("run_id", ASCENDING)], unique=True, name="run_id_unique")
+    # same backstop as the runs: the reaper deletes the state together with its run
+    collection.create_index(
+        [("expires_at", ASCENDING)],
+        name="expires_at_ttl",
+        expireAfterSeconds=RUN_EXPIRY_GRACE_SECONDS,
+    )
+
+
+def _state_document(run_id: str, state: RunState) -> dict:
+    """
+    Mongo-ready state, raises RunStateTooLargeError above APPEND_STATE_MAX_BYTES.
+    """
+    document = make_mongo_safe(state.to_dict())
+    size = len(bson.encode(document))
+    if size > APPEND_STATE_MAX_BYTES:
+        raise RunStateTooLargeError(
+            f"Append state of run {run_id} is {size / 2 ** 20:.1f} MB "
+            f"({len(state.comoments.columns)} numeric columns), over the "
+            f"{APPEND_STATE_MAX_BYTES / 2 ** 20:.1f} MB limit: rows cannot be appended to this run"
+        )
+    return document
+
+
+def store_run_state(run_id: str, state: RunState, expires_at=None):
+    _state_collection().replace_one(
+        {"run_id": run_id},
+        {
+            "run_id": run_id,
+            "version": state.version,
+            "expires_at": expires_at,
+            "updated_at": time.time(),
+            "state": _state_document(run_id, state),
+        },
+        upsert=True,
+    )
+
+
+def load_run_state(run_id: str):
+    """
+    The run's RunState (its `version` is the stored one), None when the run has none.
+    """
+    doc = _state_collection().find_one({"run_id": run_id}, {"_id": 0, "version": 1, "state": 1})
+    if doc is None:
+        return None
+    return RunState.from_dict(doc["state"], version=doc["version"])
+
+
+def save_run_state(run_id: str, state: RunState, expected_version: int):
+    """
+    Replace the stored state if it is still at `expected_version`, otherwise raise AppendConflictError.
+    Raises RunStateTooLargeError, before writing anything, when the state outgrew the size limit.
+    """
+    document = _state_document(run_id, state)
+    result = _state_collection().update_one(
+        {"run_id": run_id, "version": expected_version},
+        {"$set": {"version": state.version, "updated_at": time.time(), "state": document}},
+    )
+    if result.matched_count == 0:
+        raise AppendConflictError(f"Run {run_id} was updated concurrently, retry the append")
+
+
+def run_state_columns(run_id: str):
+    """
+    Columns of the run (None when it has no state), without loading the sketches.
+    """
+    doc = _state_collection().find_one({"run_id": run_id}, {"_id": 0, "state.profiler.columns": 1})
+    return None if doc is None else doc["state"]["profiler"]["columns"]
+
+
+def copy_run_state(source_run_id: str, run_id: str, expires_at=None) -> bool:
+    """
+    Give a run created from a cached result the state of the run it was computed by,
+    as long as nothing was appended to that run since.
+    """
+    doc = _state_collection().find_one({"run_id": source_run_id, "version": 0}, {"_id": 0})
+    if doc is None:
+        return False
+    _state_collection().replace_one(
+        {"run_id": run_id},
+        {**doc, "run_id": run_id, "expires_at": expires_at, "updated_at": time.time()},
+        upsert=True,
+    )
+    return True
+
+
+def delete_run_state(run_id: str):
+    _state_collection().delete_one({"run_id": run_id})
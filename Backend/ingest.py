@@ -0,0 +1,275 @@
+import os
+import numpy as np
+import pandas as pd
+
+# string columns with at most this share of distinct values become `category`
+CATEGORY_MAX_UNIQUE_RATIO = float(os.getenv("CATEGORY_MAX_UNIQUE_RATIO", "0.5"))
+# set to 0 to keep high-cardinality text as Python objects
+ARROW_STRINGS = os.getenv("ARROW_STRINGS", "1") == "1"
+# CSV files are parsed and compacted this many rows at a time
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "200000"))
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+# upload extension -> reader
+UPLOAD_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",  # Arrow IPC file format (= Feather v2)
+    ".ipc": "feather",
+    ".arrows": "arrow_stream",  # Arrow IPC stream format
+}
+
+
+def _memory_mb(df: pd.DataFrame) -> float:
+    return round(float(df.memory_usage(deep=True).sum()) / (1024 ** 2), 2)
+
+
+def _downcast_integer(series: pd.Series) -> pd.Series:
+    # narrow integers wrap in elementwise integer arithmetic, signed or not
+    # (int8(99) * int8(99) == 121): the analysis only reads them through pandas reductions,
+    # which accumulate in 64 bits, or after converting them to float
+    return pd.to_numeric(series, downcast="integer")
+
+
+def _is_text(series: pd.Series) -> bool:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    if pd.api.types.is_object_dtype(series.dtype):
+        # mixed objects (numbers, dates, lists, ...) are left alone
+        return pd.api.types.infer_dtype(series, skipna=True) == "string"
+    # dedicated string dtypes (pandas >= 3 reads text as `str`)
+    return pd.api.types.is_string_dtype(series.dtype)
+
+
+def _compact_strings(series: pd.Series, category_max_ratio: float, arrow_strings: bool) -> pd.Series:
+    non_null = int(series.notna().sum())
+    if non_null and series.nunique(dropna=True) / non_null <= category_max_ratio:
+        return series.astype("category")
+    if arrow_strings and ARROW_AVAILABLE and pd.api.types.is_object_dtype(series.dtype):
+        return series.astype("string[pyarrow]")
+    return series
+
+
+def _compact_columns(df: pd.DataFrame, category_max_ratio: float, arrow_strings: bool, text: bool = True) -> tuple:
+    columns = {}
+    converted = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series.dtype):
+            continue
+        if pd.api.types.is_integer_dtype(series.dtype):
+            new = _downcast_integer(series)
+        elif text and _is_text(series):
+            new = _compact_strings(series, category_max_ratio, arrow_strings)
+        else:
+            continue
+        if new.dtype != series.dtype:
+            columns[col] = new
+            converted[str(col)] = f"{series.dtype} -> {new.dtype}"
+    return columns, converted
+
+
+def _memory_report(before: float, after: float, converted: dict) -> dict:
+    return {
+        "memory_before_mb": before,
+        "memory_after_mb": after,
+        "memory_saved_percent": round((1 - after / before) * 100, 1) if before else 0.0,
+        "converted_columns": converted,
+    }
+
+
+def optimize_dtypes(
+    df: pd.DataFrame,
+    category_max_ratio: float = CATEGORY_MAX_UNIQUE_RATIO,
+    arrow_strings: bool = ARROW_STRINGS,
+    inplace: bool = False,
+) -> tuple:
+    """
+    Shrink a freshly loaded frame without changing any value:
+    - integers downcast to the smallest signed type that holds them
+    - low-cardinality strings to `category`, other strings to Arrow-backed `string[pyarrow]`
+
+    With `inplace` the columns of `df` itself are replaced, so each original column is freed
+    as soon as its compact copy exists (when nothing else references the frame).
+    Floats stay float64 even when float32 holds every value: pandas reduces float32
+    columns in float32, so means and higher moments would no longer match the original.
+    Returns (optimized frame, report with memory before / after and the converted columns).
+    """
+    before = _memory_mb(df)
+    columns, converted = _compact_columns(df, category_max_ratio, arrow_strings)
+
+    optimized = df
+    if columns:
+        optimized = df if inplace else df.copy(deep=False)
+        for col, new in columns.items():
+            optimized[col] = new
+    del columns
+    after = _memory_mb(optimized) if converted else before
+    return optimized, _memory_report(before, after, converted)
+
+
+def _common_dtype(dtypes: set) -> str:
+    # what a single read of the whole file would have produced
+    if len(dtypes) == 1:
+        return str(next(iter(dtypes)))
+    if all(isinstance(d, np.dtype) for d in dtypes):
+        return str(np.result_type(*dtypes))
+    return "object"
+
+
+def _read_csv_compact(path: str, columns: list = None, chunk_rows: int = CSV_CHUNK_ROWS) -> tuple:
+    """
+    Parse a CSV chunk by chunk and compact each chunk's numbers before the next one is read,
+    so the uncompacted frame never exists as a whole. Text is compacted once on the whole
+    frame (category codes must be shared by every row).
+    Returns (frame, memory report of the whole conversion).
+    """
+    before = 0.0
+    raw_dtypes = {}
+    chunks = []
+    for chunk in pd.read_csv(path, usecols=columns, chunksize=chunk_rows):
+        before += _memory_mb(chunk)
+        for col, dtype in chunk.dtypes.items():
+            raw_dtypes.setdefault(col, set()).add(dtype)
+        numbers, _ = _compact_columns(chunk, CATEGORY_MAX_UNIQUE_RATIO, ARROW_STRINGS, text=False)
+        for col, new in numbers.items():
+            chunk[col] = new
+        del numbers
+        chunks.append(chunk)
+    if not chunks:
+        # header only
+        df = pd.read_csv(path, usecols=columns)
+        return df, _memory_report(_memory_mb(df), _memory_mb(df), {})
+    # chunk dtypes are promoted to the widest one (int8 + int16 -> int16)
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    del chunks
+
+    strings, _ = _compact_columns(df, CATEGORY_MAX_UNIQUE_RATIO, ARROW_STRINGS)
+    for col, new in strings.items():
+        df[col] = new
+    del strings
+
+    converted = {}
+    for col, dtype in df.dtypes.items():
+        raw = _common_dtype(raw_dtypes[col])
+        if raw != str(dtype):
+            converted[str(col)] = f"{raw} -> {dtype}"
+    return df, _memory_report(round(before, 2), _memory_mb(df), converted)
+
+
+def upload_format(filename: str):
+    """
+    Reader name for an uploaded file name, None when the extension is not supported.
+    """
+    return UPLOAD_FORMATS.get(os.path.splitext(filename.lower())[1])
+
+
+def _analyzable(arrow_type) -> bool:
+    # nested and binary columns cannot be profiled, do not even read them
+    t = pa.types
+    if isinstance(arrow_type, pa.DictionaryType):
+        return _analyzable(arrow_type.value_type)
+    return not (
+        t.is_nested(arrow_type)
+        or t.is_binary(arrow_type) or t.is_large_binary(arrow_type) or t.is_fixed_size_binary(arrow_type)
+        or t.is_null(arrow_type)
+    )
+
+
+def _arrow_schema(path: str, format: str):
+    import pyarrow.parquet as pq
+
+    if format == "parquet":
+        return pq.read_schema(path, memory_map=True)
+    with pa.memory_map(path) as source:
+        if format == "arrow_stream":
+            return pa.ipc.open_stream(source).schema
+        return pa.ipc.open_file(source).schema
+
+
+def _select_columns(schema, columns: list = None) -> tuple:
+    wanted = columns or schema.names
+    missing = [c for c in wanted if c not in schema.names]
+    if missing:
+        raise ValueError(f"Columns not found in the file: {missing}")
+    keep = [c for c in wanted if _analyzable(schema.field(c).type)]
+    skipped = {c: str(schema.field(c).type) for c in wanted if c not in keep}
+    return keep, skipped
+
+
+def _string_types_mapper(arrow_type):
+    # keep text Arrow-backed instead of materializing Python objects
+    if arrow_type in (pa.string(), pa.large_string()):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def _read_arrow(path: str, format: str, columns: list):
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+
+    if format == "parquet":
+        return pq.read_table(path, columns=columns, memory_map=True)
+    if format == "arrow_stream":
+        # the stream format has no footer to seek columns from: batches are pruned as they
+        # are read, so skipped columns are never gathered into a table
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_stream(source)
+            schema = pa.schema([reader.schema.field(name) for name in columns])
+            return pa.Table.from_batches(
+                (batch.select(columns) for batch in reader), schema=schema
+            )
+    # uncompressed IPC files are read zero-copy from the memory map
+    return feather.read_table(path, columns=columns, memory_map=True)
+
+
+def read_dataset(path: str, format: str = None, columns: list = None, optimize: bool = True) -> pd.DataFrame:
+    """
+    Load an uploaded CSV / Parquet / Feather / Arrow IPC file.
+
+    Arrow formats are memory-mapped, only the requested (or all) columns of a type the
+    analysis can use are read (nested and binary columns are skipped) and the table is
+    converted without materializing text as Python objects.
+    With `optimize` the dtypes are compacted while reading (see `optimize_dtypes`): CSV chunk
+    by chunk, Arrow column by column, so the uncompacted frame is never kept alongside.
+    What was read is recorded in `df.attrs["ingest"]`, the compaction in
+    `df.attrs["memory_optimization"]`.
+    """
+    format = format or upload_format(path) or "csv"
+    if format == "csv":
+        if optimize:
+            df, report = _read_csv_compact(path, columns)
+            df.attrs["memory_optimization"] = report
+        else:
+            df = pd.read_csv(path, usecols=columns)
+        df.attrs["ingest"] = {"format": "csv", "columns_read": int(df.shape[1])}
+        return df
+
+    if not ARROW_AVAILABLE:
+        raise ValueError(f"Reading {format} files requires pyarrow")
+
+    keep, skipped = _select_columns(_arrow_schema(path, format), columns)
+    table = _read_arrow(path, format, keep)
+    df = table.to_pandas(
+        split_blocks=True,
+        self_destruct=True,
+        types_mapper=_string_types_mapper,
+    )
+    del table
+    if optimize:
+        # one block per column (split_blocks): each original column is freed once replaced
+        df, report = optimize_dtypes(df, inplace=True)
+        df.attrs["memory_optimization"] = report
+    df.attrs["ingest"] = {
+        "format": format,
+        "columns_read": len(keep),
+        "columns_skipped": skipped,
+    }
+    return df
@@ -0,0 +1,255 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+from Backend.mongo import to_jsonable
+from Backend.pipeline import run_eda_pipeline, store_run_from_cache, append_to_run
+from Backend.incremental import run_state_columns
+from Backend.result_cache import get_cached_result
+from Backend.telemetry import span
+from Backend.ingest import read_dataset, upload_format
+
+EDA_MAX_WORKERS = int(os.getenv("EDA_MAX_WORKERS", "2"))
+EDA_MAX_QUEUED = int(os.getenv("EDA_MAX_QUEUED", "50"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+# keys of a node update that are not sent to clients
+PRIVATE_STATE_KEYS = {"data", "profile"}
+
+EXECUTOR = ThreadPoolExecutor(max_workers=EDA_MAX_WORKERS, thread_name_prefix="eda-job")
+JOB_STORE = {}
+JOB_LOCK = threading.Lock()
+# dataset digest -> job_id of the run computing it (single-flight)
+INFLIGHT_DIGESTS = {}
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+def _prune_jobs(now: float):
+    expired = [
+        job_id for job_id, job in JOB_STORE.items()
+        if job["status"] in ("completed", "failed") and now - job["updated_at"] > JOB_TTL_SECONDS
+    ]
+    for job_id in expired:
+        del JOB_STORE[job_id]
+
+
+def _update_job(job_id: str, **fields):
+    with JOB_LOCK:
+        job = JOB_STORE[job_id]
+        job.update(fields)
+        job["updated_at"] = time.time()
+
+
+def _add_event(job_ids: list, event: str, data):
+    with JOB_LOCK:
+        for job_id in job_ids:
+            job = JOB_STORE[job_id]
+            job["events"].append({"event": event, "data": data, "at": time.time()})
+            job["updated_at"] = time.time()
+
+
+def _job_and_followers(job_id: str) -> list:
+    with JOB_LOCK:
+        return [job_id] + list(JOB_STORE[job_id]["followers"])
+
+
+def _finish_followers(job_id: str, digest: str, error: str = None):
+    """
+    Complete the jobs that joined an in-flight run of the same digest.
+    """
+    with JOB_LOCK:
+        if INFLIGHT_DIGESTS.get(digest) == job_id:
+            del INFLIGHT_DIGESTS[digest]
+        followers = list(JOB_STORE[job_id]["followers"])
+
+    for follower_id in followers:
+        follower = JOB_STORE[follower_id]
+        try:
+            if error is not None:
+                raise RuntimeError(error)
+            cached = get_cached_result(digest)
+            if cached is None:
+                raise RuntimeError("Result of the shared run is not available")
+            result = to_jsonable(store_run_from_cache(follower["run_id"], follower["filename"], cached))
+            _add_event([follower_id], "completed", result)
+            _update_job(follower_id, status="completed", result=result)
+        except Exception as e:
+            _add_event([follower_id], "failed", {"error": str(e)})
+            _update_job(follower_id, status="failed", error=str(e))
+
+
+def _read_upload(run_id: str, path: str, filename: str, columns: list = None) -> tuple:
+    """
+    (dataframe, size in bytes) of a spooled upload, which is removed once read.
+    """
+    try:
+        bytes_in = os.path.getsize(path)
+        with span("ingest.read", run_id=run_id, bytes_in=bytes_in, format=upload_format(filename)) as attributes:
+            df = read_dataset(path, format=upload_format(filename), columns=columns)
+            attributes.update(rows=int(df.shape[0]), columns=int(df.shape[1]))
+        return df, bytes_in
+    finally:
+        os.remove(path)
+
+
+def _run_job(job_id: str, path: str, filename: str, digest: str, columns: list = None):
+    job = JOB_STORE[job_id]
+    for running_id in _job_and_followers(job_id):
+        _update_job(running_id, status="running")
+    error = None
+    try:
+        df, bytes_in = _read_upload(job["run_id"], path, filename, columns=columns)
+
+        def on_event(node, update):
+            public = {k: v for k, v in update.items() if k not in PRIVATE_STATE_KEYS}
+            _add_event(_job_and_followers(job_id), node, to_jsonable(public))
+
+        result = to_jsonable(run_eda_pipeline(
+            df, run_id=job["run_id"], filename=filename, on_event=on_event, digest=digest, bytes_in=bytes_in
+        ))
+        _add_event([job_id], "completed", result)
+        _update_job(job_id, status="completed", result=result)
+
+    except Exception as e:
+        error = str(e)
+        _add_event([job_id], "failed", {"error": error})
+        _update_job(job_id, status="failed", error=error)
+
+    _finish_followers(job_id, digest, error=error)
+
+
+def _run_append_job(job_id: str, path: str, filename: str):
+    job = JOB_STORE[job_id]
+    _update_job(job_id, status="running")
+    try:
+        # only the run's columns are read (pruned at the reader for Arrow formats)
+        df, _ = _read_upload(job["run_id"], path, filename, columns=run_state_columns(job["run_id"]))
+
+        def on_event(section, update):
+            _add_event([job_id], section, to_jsonable(update))
+
+        result = to_jsonable(append_to_run(job["run_id"], df, on_event=on_event))
+        _add_event([job_id], "completed", result)
+        _update_job(job_id, status="completed", result=result)
+
+    except Exception as e:
+        _add_event([job_id], "failed", {"error": str(e)})
+        _update_job(job_id, status="failed", error=str(e))
+
+
+def _new_job(filename: str, digest: str, now: float, run_id: str = None) -> dict:
+    job_id = f"job_{uuid.uuid4().hex[:10]}"
+    JOB_STORE[job_id] = {
+        "job_id": job_id,
+        "run_id": run_id or f"eda_{uuid.uuid4().hex[:10]}",
+        "filename": filename,
+        "digest": digest,
+        "status": "queued",
+        "events": [],
+        "followers": [],
+        "follower_of": None,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    return JOB_STORE[job_id]
+
+
+def _check_queue(path: str):
+    # caller holds JOB_LOCK
+    active = sum(1 for job in JOB_STORE.values() if job["status"] in ("queued", "running"))
+    if active >= EDA_MAX_QUEUED:
+        os.remove(path)
+        raise QueueFullError("Too many EDA jobs in progress, try again later")
+
+
+def submit_eda_job(path: str, filename: str, digest: str, columns: list = None) -> dict:
+    """
+    Queue an EDA run of the uploaded file at `path` and return the job record right away.
+    Only `columns` are analyzed when given (the digest must then cover them too).
+    If the same digest is already being computed the new job joins that run instead.
+    The job removes `path` once it has been read.
+    """
+    now = time.time()
+    with JOB_LOCK:
+        _prune_jobs(now)
+        leader_id = INFLIGHT_DIGESTS.get(digest)
+
+        if leader_id is None:
+            _check_queue(path)
+
+        job = _new_job(filename, digest, now)
+        if leader_id is not None:
+            leader = JOB_STORE[leader_id]
+            leader["followers"].append(job["job_id"])
+            job["follower_of"] = leader_id
+            job["status"] = leader["status"]
+            job["events"] = list(leader["events"])
+        else:
+            INFLIGHT_DIGESTS[digest] = job["job_id"]
+
+    if leader_id is not None:
+        os.remove(path)
+    else:
+        EXECUTOR.submit(_run_job, job["job_id"], path, filename, digest, columns)
+    return get_job(job["job_id"])
+
+
+def submit_append_job(run_id: str, path: str, filename: str) -> dict:
+    """
+    Queue appending the rows of the uploaded file at `path` to an existing run.
+    The job keeps the run's run_id; its events are the sections that changed.
+    """
+    now = time.time()
+    with JOB_LOCK:
+        _prune_jobs(now)
+        _check_queue(path)
+        job = _new_job(filename, None, now, run_id=run_id)
+
+    EXECUTOR.submit(_run_append_job, job["job_id"], path, filename)
+    return get_job(job["job_id"])
+
+
+def completed_job_from_cache(filename: str, digest: str, cached: dict) -> dict:
+    """
+    Record an already finished job for an upload whose result was cached.
+    """
+    with JOB_LOCK:
+        job = _new_job(filename, digest, time.time())
+
+    result = to_jsonable(store_run_from_cache(job["run_id"], filename, cached))
+    _add_event([job["job_id"]], "completed", result)
+    _update_job(job["job_id"], status="completed", result=result)
+    return get_job(job["job_id"])
+
+
+def get_job(job_id: str, include_events: bool = False):
+    with JOB_LOCK:
+        job = JOB_STORE.get(job_id)
+        if job is None:
+            return None
+        snapshot = {k: v for k, v in job.items() if k not in ("events", "followers")}
+        snapshot["completed_nodes"] = [
+            e["event"] for e in job["events"] if e["event"] not in ("completed", "failed")
+        ]
+        if include_events:
+            snapshot["events"] = list(job["events"])
+        return snapshot
+
+
+def get_job_events(job_id: str, start: int = 0):
+    """
+    Return (events from index `start`, finished flag) for a job, or (None, True) if unknown.
+    """
+    with JOB_LOCK:
+        job = JOB_STORE.get(job_id)
+        if job is None:
+            return None, True
+        return list(job["events"][start:]), job["status"] in ("completed", "failed")
@@ -0,0 +1,89 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from Backend.db import get_collection
+from Backend.result_cache import invalidate_cached_result
+from Backend.storage_graphs import delete_run_artifacts
+from Backend.incremental import delete_run_state
+
+# runs (documents + images) expire this long after creation, 0 keeps them forever
+RUN_TTL_SECONDS = int(os.getenv("RUN_TTL_SECONDS", str(7 * 24 * 3600)))
+RUN_REAPER_INTERVAL_SECONDS = int(os.getenv("RUN_REAPER_INTERVAL_SECONDS", "600"))
+RUN_REAPER_BATCH = int(os.getenv("RUN_REAPER_BATCH", "100"))
+
+_reaper = None
+_stop = threading.Event()
+
+
+def run_expiry(created_at: float = None):
+    """
+    `expires_at` for a run created at `created_at` (epoch seconds), None when runs never expire.
+    """
+    if RUN_TTL_SECONDS <= 0:
+        return None
+    created = datetime.fromtimestamp(created_at, timezone.utc) if created_at else datetime.now(timezone.utc)
+    return created + timedelta(seconds=RUN_TTL_SECONDS)
+
+
+def delete_run(run_id: str, doc: dict = None) -> dict:
+    """
+    Delete a run's images, its cached result, its append state and its document.
+    """
+    collection = get_collection()
+    if doc is None:
+        doc = collection.find_one({"run_id": run_id}, {"_id": 0, "visual_outputs": 1, "digest": 1, "artifacts_run_id": 1})
+    if doc is None:
+        return {"run_id": run_id, "deleted_images": 0, "deleted": False}
+
+    deleted_images = delete_run_artifacts(run_id, doc.get("visual_outputs"), doc.get("artifacts_run_id"))
+    if doc.get("digest"):
+        invalidate_cached_result(doc["digest"])
+    delete_run_state(run_id)
+    result = collection.delete_one({"run_id": run_id})
+    return {"run_id": run_id, "deleted_images": deleted_images, "deleted": result.deleted_count == 1}
+
+
+def reap_expired_runs(limit: int = RUN_REAPER_BATCH) -> int:
+    """
+    Delete up to `limit` runs whose `expires_at` has passed. Returns the number reaped.
+    """
+    now = datetime.now(timezone.utc)
+    docs = get_collection().find(
+        {"expires_at": {"$lt": now}},
+        {"_id": 0, "run_id": 1, "visual_outputs": 1, "digest": 1, "artifacts_run_id": 1},
+    ).limit(limit)
+
+    reaped = 0
+    for doc in docs:
+        try:
+            delete_run(doc["run_id"], doc)
+            reaped += 1
+        except Exception as e:
+            print(f"[WARN] could not reap run {doc.get('run_id')} → {e}")
+    return reaped
+
+
+def _reaper_loop(interval: int):
+    while not _stop.wait(interval):
+        try:
+            while reap_expired_runs() >= RUN_REAPER_BATCH:
+                pass
+        except Exception as e:
+            print(f"[WARN] run reaper failed → {e}")
+
+
+def start_reaper(interval: int = RUN_REAPER_INTERVAL_SECONDS):
+    """
+    Start the background thread that expires old runs (no-op if already running or disabled).
+    """
+    global _reaper
+    if RUN_TTL_SECONDS <= 0 or (_reaper is not None and _reaper.is_alive()):
+        return
+    _stop.clear()
+    _reaper = threading.Thread(target=_reaper_loop, args=(interval,), name="run-reaper", daemon=True)
+    _reaper.start()
+
+
+def stop_reaper():
+    _stop.set()
@@ -0,0 +1,250 @@
+import os
+import re
+import time
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "sqlite")  # memory | sqlite | mongo | none
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MEMORY_ITEMS = int(os.getenv("LLM_CACHE_MEMORY_ITEMS", "256"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite"))
+
+LLM_CACHE_STATS = {"hits": 0, "misses": 0, "memory_hits": 0, "persistent_hits": 0, "stores": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def _count(*names):
+    with _STATS_LOCK:
+        for name in names:
+            LLM_CACHE_STATS[name] += 1
+
+
+def normalize_prompt(messages) -> str:
+    """
+    Text form of a prompt (str, PromptValue or list of messages) with whitespace collapsed.
+    """
+    if hasattr(messages, "to_messages"):
+        messages = messages.to_messages()
+    if isinstance(messages, (list, tuple)):
+        parts = []
+        for m in messages:
+            if isinstance(m, tuple):
+                role, content = m
+            else:
+                role, content = getattr(m, "type", "human"), getattr(m, "content", m)
+            if not isinstance(content, str):
+                content = json.dumps(content, sort_keys=True, default=str)
+            parts.append(f"{role}: {content}")
+        text = "\n".join(parts)
+    else:
+        text = str(messages)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    """
+    In-process LRU with TTL.
+    """
+
+    def __init__(self, max_items: int, ttl: int):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            content, created_at = item
+            if time.time() - created_at > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return content
+
+    def put(self, key: str, model: str, content: str, created_at: float = None):
+        with self._lock:
+            self._items[key] = (content, created_at or time.time())
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class SqliteTier:
+    """
+    On-disk tier with TTL and a total size limit (oldest entries are evicted first).
+    """
+
+    def __init__(self, path: str, ttl: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, model TEXT, content TEXT, size INTEGER, created_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_created ON llm_cache(created_at)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row
+
+    def put(self, key: str, model: str, content: str, created_at: float = None):
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                (key, model, content, size, created_at or time.time()),
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._conn.execute("SELECT key, size FROM llm_cache ORDER BY created_at").fetchall()
+                evict = []
+                for old_key, old_size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    evict.append((old_key,))
+                    total -= old_size
+                self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", evict)
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+class MongoTier:
+    """
+    MongoDB tier, expiry handled by a TTL index on `created_at`.
+    Size is bounded by the TTL only.
+    """
+
+    def __init__(self, ttl: int):
+        from Backend.db import get_collection
+
+        self.ttl = ttl
+        self.collection = get_collection(os.getenv("LLM_CACHE_COLLECTION", "llm_cache"))
+        self.collection.create_index("created_at", expireAfterSeconds=ttl)
+
+    def get(self, key: str):
+        doc = self.collection.find_one({"_id": key}, {"_id": 0, "content": 1, "created_at": 1})
+        if doc is None:
+            return None
+        # pymongo returns naive UTC datetimes
+        created_at = doc["created_at"].replace(tzinfo=timezone.utc).timestamp()
+        if time.time() - created_at > self.ttl:
+            return None
+        return doc["content"], created_at
+
+    def put(self, key: str, model: str, content: str, created_at: float = None):
+        self.collection.replace_one(
+            {"_id": key},
+            {"_id": key, "model": model, "content": content, "created_at": datetime.now(timezone.utc)},
+            upsert=True,
+        )
+
+    def clear(self):
+        self.collection.delete_many({})
+
+
+class LLMCache:
+    """
+    Two-tier LLM response cache keyed by model name and normalized prompt hash.
+    """
+
+    def __init__(self, memory: MemoryTier, persistent=None):
+        self.memory = memory
+        self.persistent = persistent
+
+    def _lookup(self, model: str, prompt: str):
+        key = cache_key(model, prompt)
+        content = self.memory.get(key)
+        if content is not None:
+            return content, "memory_hits"
+
+        if self.persistent is not None:
+            try:
+                row = self.persistent.get(key)
+            except Exception as e:
+                print(f"[WARN] llm cache read failed → {e}")
+                row = None
+            if row is not None:
+                content, created_at = row
+                self.memory.put(key, model, content, created_at)
+                return content, "persistent_hits"
+        return None, None
+
+    def get_any(self, models: list, prompt: str) -> Optional[str]:
+        """
+        Cached answer to `prompt` from the first of `models` that has one.
+        """
+        for model in models:
+            content, tier = self._lookup(model, prompt)
+            if content is not None:
+                _count("hits", tier)
+                return content
+        _count("misses")
+        return None
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        return self.get_any([model], prompt)
+
+    def put(self, model: str, prompt: str, content: str):
+        key = cache_key(model, prompt)
+        self.memory.put(key, model, content)
+        if self.persistent is not None:
+            try:
+                self.persistent.put(key, model, content)
+            except Exception as e:
+                print(f"[WARN] llm cache write failed → {e}")
+        _count("stores")
+
+    def clear(self):
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+
+def build_llm_cache() -> Optional[LLMCache]:
+    if LLM_CACHE_BACKEND == "none":
+        return None
+    memory = MemoryTier(LLM_CACHE_MEMORY_ITEMS, LLM_CACHE_TTL_SECONDS)
+    if LLM_CACHE_BACKEND == "sqlite":
+        return LLMCache(memory, SqliteTier(LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_BYTES))
+    if LLM_CACHE_BACKEND == "mongo":
+        return LLMCache(memory, MongoTier(LLM_CACHE_TTL_SECONDS))
+    return LLMCache(memory)
+
+
+LLM_CACHE = build_llm_cache()
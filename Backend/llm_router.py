@@ -0,0 +1,206 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from Backend.telemetry import record_llm_call, LLM_FALLBACKS, LLM_HEDGES, LLM_COOLDOWNS
+
+COOLDOWN_SECONDS = 120  # 2 minutes
+MAX_COOLDOWN_SECONDS = 30 * 60
+FAILURE_THRESHOLD = int(os.getenv("LLM_FAILURE_THRESHOLD", "3"))
+EWMA_ALPHA = 0.2
+LATENCY_WINDOW = 100
+DEFAULT_LATENCY_SECONDS = float(os.getenv("LLM_DEFAULT_LATENCY_SECONDS", "10"))
+HEDGE_MIN_SAMPLES = 5
+HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "1") == "1"
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return "RESOURCE_EXHAUSTED" in str(error) or "429" in str(error)
+
+
+class ModelStats:
+    """
+    Latency / error tracking and circuit breaker of one model.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.ewma_latency = None
+        self.ewma_error = 0.0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_until = 0.0
+        self.cooldown = COOLDOWN_SECONDS
+        self.probe_in_flight = False
+
+    def expected_latency(self) -> float:
+        with self.lock:
+            latency = self.ewma_latency if self.ewma_latency is not None else DEFAULT_LATENCY_SECONDS
+            # a model that fails often costs a retry on top of its own latency
+            return latency / max(0.05, 1.0 - self.ewma_error)
+
+    def hedge_delay(self) -> float:
+        """p95 latency, or the default latency until enough samples were seen."""
+        with self.lock:
+            if len(self.latencies) < HEDGE_MIN_SAMPLES:
+                return DEFAULT_LATENCY_SECONDS
+            return float(np.percentile(self.latencies, 95))
+
+    def try_acquire(self, now: float) -> bool:
+        """
+        Whether a request may be sent now. An open breaker lets one probe through
+        (half-open) once its cooldown has passed.
+        """
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now >= self.opened_until:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency: float):
+        with self.lock:
+            self.latencies.append(latency)
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency
+            self.ewma_error = (1 - EWMA_ALPHA) * self.ewma_error
+            self.consecutive_failures = 0
+            self.state = CLOSED
+            self.cooldown = COOLDOWN_SECONDS
+            self.probe_in_flight = False
+
+    def record_failure(self, error: Exception) -> bool:
+        """
+        Returns True when this failure opened the breaker.
+        """
+        with self.lock:
+            self.ewma_error = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.ewma_error
+            self.consecutive_failures += 1
+            was_half_open = self.state == HALF_OPEN
+            self.probe_in_flight = False
+
+            if was_half_open or is_rate_limited(error) or self.consecutive_failures >= FAILURE_THRESHOLD:
+                if was_half_open:
+                    # failed probe: back off further
+                    self.cooldown = min(self.cooldown * 2, MAX_COOLDOWN_SECONDS)
+                self.state = OPEN
+                self.opened_until = time.time() + self.cooldown
+                return True
+            return False
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "state": self.state,
+                "ewma_latency": self.ewma_latency,
+                "ewma_error": round(self.ewma_error, 4),
+                "consecutive_failures": self.consecutive_failures,
+                "samples": len(self.latencies),
+            }
+
+
+class LLMRouter:
+    """
+    Orders candidate models by expected latency, skips models with an open circuit
+    breaker and hedges: when the running request has not answered by its model's p95
+    latency the next candidate is started too and the first success wins.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+
+    def stats_for(self, name: str) -> ModelStats:
+        with self._lock:
+            if name not in self._stats:
+                self._stats[name] = ModelStats(name)
+            return self._stats[name]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            names = list(self._stats)
+        return {name: self.stats_for(name).snapshot() for name in names}
+
+    def _call(self, llm, name: str, messages):
+        stats = self.stats_for(name)
+        start = time.perf_counter()
+        try:
+            response = llm.invoke(messages)
+        except Exception as e:
+            record_llm_call(name, time.perf_counter() - start, error=e)
+            if stats.record_failure(e):
+                LLM_COOLDOWNS.labels(model=name).inc()
+                print(f"[WARN] {name} circuit opened")
+            raise
+        latency = time.perf_counter() - start
+        stats.record_success(latency)
+        record_llm_call(name, latency, response=response)
+        return response
+
+    def invoke(self, llms: list, messages, name_of) -> tuple:
+        """
+        Returns (model name, response) of the first successful candidate.
+        """
+        ordered = sorted(
+            enumerate(llms),
+            key=lambda item: (self.stats_for(name_of(item[1])).expected_latency(), item[0]),
+        )
+        candidates = iter([llm for _, llm in ordered])
+        pending = {}
+        last_error = None
+
+        def launch_next():
+            # name of the model the request went to, None when no candidate is left
+            now = time.time()
+            for llm in candidates:
+                name = name_of(llm)
+                if self.stats_for(name).try_acquire(now):
+                    pending[self._executor.submit(self._call, llm, name, messages)] = name
+                    return name
+            return None
+
+        launch_next()
+        hedged = False
+        while pending:
+            timeout = None
+            if HEDGE_ENABLED and not hedged and len(pending) == 1:
+                timeout = self.stats_for(next(iter(pending.values()))).hedge_delay()
+
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                hedge = launch_next()
+                if hedge is not None:
+                    LLM_HEDGES.labels(model=hedge).inc()
+                continue
+
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    return name, future.result()
+                except Exception as e:
+                    last_error = e
+                    print(f"[WARN] {name} failed → {e}")
+
+            if not pending and launch_next() is not None:
+                LLM_FALLBACKS.labels(model=name).inc()
+
+        raise RuntimeError("All LLMs failed") from last_error
+
+
+ROUTER = LLMRouter()
@@ -1,30 +1,48 @@
-from Backend.models import LLM_POOL, invoke_with_fallback
+from Backend.models import LLM_POOL, invoke_with_fallback, llm_name_of
+from Backend.prompt_digest import compact_prompt_inputs, estimate_tokens, select_llms_for_prompt
 
 from Backend.state import SummaryState
 from Backend.tools_functions import data_overview,data_quality,data_statistics,get_important_numerical_columns, data_categorical, analyze_categorical_columns, data_outlier, data_correlation, data_target_analysis
 from Backend.prompt import target_identify_prompt,eda_insight_summary_prompt
-from Backend.storage_graphs import save_plotly_figure
+from Backend.storage_graphs import submit_plotly_figure, resolve_figures, figure_references, restore_figure_urls
+from Backend.profile import build_column_profile
+from Backend.ingest import optimize_dtypes, read_dataset
+from Backend.missingness import binned_null_fraction
+from Backend.categories import category_counts
+from Backend.plots import box_figure, histogram_figure, missing_heatmap_figure, correlation_heatmap_figure, category_bar_figure, target_class_figure
 
 import json 
 import re
-import pandas as pd
-import plotly.express as px
+
+MISSING_HEATMAP_BINS = 200
 
 def Overview(state:SummaryState):
     """
     Compute high-level dataset overview including shape, data types, and memory usage.
+    Also compacts the dtypes (Backend.ingest) unless they were compacted while reading, and
+    builds the column profile that every following node reads from.
     """
     print("Analyzing overall data !!\n")
+    update = {}
     if state.get("data") is None:
-        df = pd.read_csv(state["dataset_path"])
-        state["data"] = df
+        df = read_dataset(state["dataset_path"])
     else:
         df = state["data"]
-    data = df
+    ingest = df.attrs.get("ingest")
+    memory_report = df.attrs.get("memory_optimization")
+    if memory_report is None:
+        # compact dtypes once, every following node works on the smaller frame
+        data, memory_report = optimize_dtypes(df)
+    else:
+        data = df
+    update["data"] = data
     overview = data_overview(data)
-    return {
-        "data_overview":overview,
-    }
+    overview["memory_optimization"] = memory_report
+    if ingest:
+        overview["ingest"] = ingest
+    update["data_overview"] = overview
+    update["profile"] = build_column_profile(data)
+    return update
 
 def quality(state:SummaryState):
     """
@@ -32,26 +50,24 @@ def quality(state:SummaryState):
     """
     print("Analyzing the quality of the data !!\n")
     data = state["data"]
-    quality = data_quality(data)
+    profile = state.get("profile") or build_column_profile(data)
+    quality = data_quality(data, profile=profile)
     heatmap_path = None
     if quality["missing_value"].sum() > 0:
-        heatmap_df = data.isnull().astype(int)
+        # null fraction per row bin: size is columns x bins whatever the row count
+        fractions, row_starts = binned_null_fraction(profile.null_masks, bins=MISSING_HEATMAP_BINS)
 
-        fig = px.imshow(
-            heatmap_df.T,
-            color_continuous_scale="Blues",
-            title="Missing Value Heatmap",
-            aspect="auto"
-        )
+        fig = missing_heatmap_figure(fractions, row_starts, profile.null_masks.columns)
 
-        heatmap_path = save_plotly_figure(
+        heatmap_path = submit_plotly_figure(
             fig,
-            plot_name="missing_value_heatmap"
+            plot_name="missing_value_heatmap",
+            run_id=state.get("run_id")
         )
 
-    state["graph_file_path"].append({"data_quality":heatmap_path})
     return {
         "data_quality_overview":quality,
+        "graph_file_path":[{"data_quality":heatmap_path}],
     }
 
 def statistics(state:SummaryState):
@@ -62,27 +78,30 @@ def statistics(state:SummaryState):
     data = state["data"]
     box_path =[]
     hist_path=[]
-    stat = data_statistics(data)
-    important_cols = get_important_numerical_columns(data, top_k=5)
+    profile = state.get("profile")
+    stat = data_statistics(data, profile=profile)
+    important_cols = get_important_numerical_columns(data, top_k=5, profile=profile)
     for col in important_cols:
         try:
-            fig_box = px.box(data,y=col,title=f"Box Plot - {col}")
-            boxplot_path = save_plotly_figure(fig_box,plot_name=f"boxplot_{col}")
+            fig_box = box_figure(data[col],title=f"Box Plot - {col}")
+            boxplot_path = submit_plotly_figure(fig_box,plot_name=f"boxplot_{col}",run_id=state.get("run_id"))
             box_path.append(boxplot_path)
         except Exception:
             pass
 
         try:
-            fig_hist = px.histogram(data,x=col,nbins=30,title=f"Histogram - {col}")
-            histogram_path = save_plotly_figure(fig_hist,plot_name=f"histogram_{col}")
+            fig_hist = histogram_figure(data[col],nbins=30,title=f"Histogram - {col}")
+            histogram_path = submit_plotly_figure(fig_hist,plot_name=f"histogram_{col}",run_id=state.get("run_id"))
             hist_path.append(histogram_path)
         except Exception:
             pass
 
-    state["graph_file_path"].append({"data_statistics_boxplot":box_path})
-    state["graph_file_path"].append({"data_statistics_histogram":hist_path})
     return{
         "data_stat_overview" : stat,
+        "graph_file_path" : [
+            {"data_statistics_boxplot":box_path},
+            {"data_statistics_histogram":hist_path},
+        ],
     }
 
 def categorical_analysis(state : SummaryState) -> dict:
@@ -91,28 +110,19 @@ def categorical_analysis(state : SummaryState) -> dict:
     """
     print("Analyzing the categorical features !!\n")
     data = state["data"]
-    result = data_categorical(data)
-    analyzed = analyze_categorical_columns(data)
+    profile = state.get("profile")
+    result = data_categorical(data, profile=profile)
+    analyzed = analyze_categorical_columns(data, profile=profile)
     bar_path = []
     for item in analyzed:
         col = item["column"]
-        value_counts = item["value_counts"]
-
-        plot_df = value_counts.reset_index()
-        plot_df.columns = [col, "count"]
-
-        fig = px.bar(
-            plot_df,
-            x=col,
-            y="count",
-            title=f"Category Distribution - {col}"
-        )
-        path = save_plotly_figure(fig,plot_name=f"count_plot_{col}")
+        fig = category_bar_figure(item["value_counts"], col)
+        path = submit_plotly_figure(fig,plot_name=f"count_plot_{col}",run_id=state.get("run_id"))
         bar_path.append(path)
 
-    state["graph_file_path"].append({"categorical_analysis":bar_path})
     return{
         "categorical_analysis_overview" : result,
+        "graph_file_path" : [{"categorical_analysis":bar_path}],
     }
 
 def outlier (state:SummaryState) -> dict:
@@ -121,20 +131,19 @@ def outlier (state:SummaryState) -> dict:
     """
     print("Analyzing the outliers in the data !!\n")
     df = state["data"]
-    outlier_data,anomaly_columns = data_outlier(df)
+    outlier_data,anomaly_columns = data_outlier(df, profile=state.get("profile"))
     outlier_path = []
     for col in anomaly_columns:
-        fig = px.box(
-            df,
-            y=col,
+        fig = box_figure(
+            df[col],
             title=f"Outlier Box Plot - {col}"
         )
-        path = save_plotly_figure(fig,plot_name=f"outlier_box_plot_{col}")
+        path = submit_plotly_figure(fig,plot_name=f"outlier_box_plot_{col}",run_id=state.get("run_id"))
         outlier_path.append(path)
 
-    state["graph_file_path"].append({"data_outlier_plot":outlier_path})
     return{
         "data_outlier_overview" : [outlier_data,anomaly_columns],
+        "graph_file_path" : [{"data_outlier_plot":outlier_path}],
     }
 
 def correlation(state:SummaryState)->dict:
@@ -143,20 +152,17 @@ def correlation(state:SummaryState)->dict:
     """
     print("Analyzing the correlation among the columns in the data !!\n")
     df = state["data"]
-    corr_data = data_correlation(df)
-    fig = px.imshow(
-        corr_data["correlation_matrix"],
-        text_auto=".2f",
-        color_continuous_scale="RdBu",
-        zmin=-1,
-        zmax=1,
-        title="Correlation Heatmap"
-    )
-    path = save_plotly_figure(fig,plot_name=f"corr_heatmap")
-    state["graph_file_path"].append({"data_correlation":path})
-
+    corr_data = data_correlation(df, profile=state.get("profile"))
+    if corr_data["correlation_matrix"] is None:
+        return{
+            "data_correlation_overview" : corr_data,
+            "graph_file_path" : [{"data_correlation":None}],
+        }
+    fig = correlation_heatmap_figure(corr_data["correlation_matrix"])
+    path = submit_plotly_figure(fig,plot_name=f"corr_heatmap",run_id=state.get("run_id"))
     return{
         "data_correlation_overview" : corr_data,
+        "graph_file_path" : [{"data_correlation":path}],
     }
 
 def target_analysis(state: SummaryState) -> dict:
@@ -166,7 +172,7 @@ def target_analysis(state: SummaryState) -> dict:
     print("Analyzing the target node in the data !!\n")
     df = state["data"]
 
-    column_metadata = data_target_analysis(df)
+    column_metadata = data_target_analysis(df, profile=state.get("profile"))
 
     prompt_text = target_identify_prompt.format(
         column_metadata=column_metadata
@@ -183,43 +189,52 @@ def target_analysis(state: SummaryState) -> dict:
     task_type = response["task_type"]
 
     if task_type == "classification":
-        fig = px.bar(
-            df[col].value_counts(),
-            title=f"Target Class Distribution - {col}"
-        )
+        profile = state.get("profile")
+        counts = profile.categories.get(col) if profile is not None else None
+        if counts is None:
+            counts = category_counts(df[col])
+        fig = target_class_figure(counts.top(dropna=True), col)
     else:
-        fig = px.histogram(
-            df, x=col, nbins=30,
+        fig = histogram_figure(
+            df[col], nbins=30,
             title=f"Target Distribution - {col}"
         )
 
-    path = save_plotly_figure(fig, "target_distribution")
-    state["graph_file_path"].append({"data_targer_analysis":path})
-
-    return {"data_target_overview": response}
+    path = submit_plotly_figure(fig, "target_distribution", run_id=state.get("run_id"))
+    return {
+        "data_target_overview": response,
+        "graph_file_path": [{"data_targer_analysis":path}],
+    }
 
 def eda_insight_summary(state: SummaryState) -> dict:
     """
     Generate a comprehensive, human-readable EDA insight summary using all prior analysis outputs.
     """
     print("Generating summary of the overall analysis !!")
-    # print(state["graph_file_path"],"\n\n")
+    # figures were submitted by the analysis nodes, wait for their URLs here
+    visual_outputs = resolve_figures(state["graph_file_path"])
+    # figure URLs differ per run: the prompt carries references, so the same analysis is a cache hit
+    references, urls = figure_references(visual_outputs)
+    # compact ranked digests instead of raw per-row series / full matrices
+    inputs, _ = compact_prompt_inputs(state)
     prompt = eda_insight_summary_prompt.format(
-        data_overview=state["data_overview"],
-        data_quality=state["data_quality_overview"],
-        numerical_stats=state["data_stat_overview"],
-        categorical_analysis=state["categorical_analysis_overview"],
-        outlier_analysis=state["data_outlier_overview"],
-        correlation_analysis=state["data_correlation_overview"],
-        target_analysis=state["data_target_overview"],
-        visual_outputs = state["graph_file_path"],
+        data_overview=inputs["data_overview"],
+        data_quality=inputs["data_quality"],
+        numerical_stats=inputs["numerical_stats"],
+        categorical_analysis=inputs["categorical_analysis"],
+        outlier_analysis=inputs["outlier_analysis"],
+        correlation_analysis=inputs["correlation_analysis"],
+        target_analysis=inputs["target_analysis"],
+        visual_outputs = references,
     )
+    prompt_tokens = estimate_tokens(prompt)
+    print(f"Summary prompt ~{prompt_tokens} tokens")
 
     response = invoke_with_fallback(
-        llms=LLM_POOL,
+        llms=select_llms_for_prompt(LLM_POOL, prompt_tokens, name_of=llm_name_of),
         messages=prompt
     )
 
     return {
-        "eda_insight_summary": response.content
+        "eda_insight_summary": restore_figure_urls(response.content, urls)
     }
\ No newline at end of file
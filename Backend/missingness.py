@@ -0,0 +1,303 @@
+import numpy as np
+import pandas as pd
+
+from Backend.sketches import HeavyHitters
+
+# number of set bits of every byte value
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class PackedNullMasks:
+    """
+    Null masks of every column stored as bit-packed uint8 rows (one bit per cell).
+    `bits[j]` is the packed mask of `columns[j]`.
+    """
+
+    def __init__(self, columns: list, n_rows: int, bits: np.ndarray):
+        self.columns = list(columns)
+        self.n_rows = n_rows
+        self.bits = bits
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.bits.nbytes)
+
+    def counts(self) -> pd.Series:
+        if not self.columns:
+            return pd.Series(dtype="int64")
+        return pd.Series(
+            POPCOUNT[self.bits].sum(axis=1, dtype=np.int64),
+            index=self.columns,
+        )
+
+    def column(self, col) -> np.ndarray:
+        """Unpacked boolean mask of one column."""
+        j = self.columns.index(col)
+        return np.unpackbits(self.bits[j], count=self.n_rows).astype(bool)
+
+
+def pack_null_masks(df: pd.DataFrame) -> PackedNullMasks:
+    """
+    Bit-pack the null mask of every column, one column at a time, so no full
+    boolean copy of the dataset is ever held.
+    """
+    n_rows = int(df.shape[0])
+    bits = np.zeros((df.shape[1], (n_rows + 7) // 8), dtype=np.uint8)
+    for j, col in enumerate(df.columns):
+        bits[j] = np.packbits(df[col].isna().to_numpy())
+    return PackedNullMasks(df.columns.tolist(), n_rows, bits)
+
+
+def binned_null_fraction(masks: PackedNullMasks, bins: int = 200) -> tuple:
+    """
+    Fraction of nulls per column in `bins` consecutive row ranges.
+    Returns (fractions of shape columns x bins, first row of every bin).
+    Bins are aligned to whole bytes, so the work is columns x rows / 8 byte lookups.
+    """
+    n_bytes = masks.bits.shape[1]
+    if n_bytes == 0:
+        return np.zeros((len(masks.columns), 0)), np.zeros(0, dtype=int)
+
+    bytes_per_bin = max(1, -(-n_bytes // bins))
+    byte_starts = np.arange(0, n_bytes, bytes_per_bin)
+    null_counts = np.add.reduceat(POPCOUNT[masks.bits].astype(np.uint32), byte_starts, axis=1)
+
+    row_starts = byte_starts * 8
+    row_ends = np.minimum(np.append(row_starts[1:], masks.n_rows), masks.n_rows)
+    return null_counts / (row_ends - row_starts), row_starts
+
+
+def _void_keys(rows: np.ndarray) -> np.ndarray:
+    # every row of a uint8 matrix as one opaque fixed-size key, compared and sorted as bytes
+    rows = np.ascontiguousarray(rows)
+    return rows.view(np.dtype((np.void, rows.shape[1]))).ravel()
+
+
+def pattern_counts(masks: PackedNullMasks) -> tuple:
+    """
+    (distinct row patterns, rows per pattern). A pattern is the packed null mask of a row
+    over all `masks.columns` (bit 7 - j % 8 of byte j // 8 = column j) as a bytes key;
+    patterns are sorted by key and every count is positive.
+
+    Works on the packed bytes: byte i of every column with nulls covers the same 8 rows,
+    so the column bytes at position i are hashed as one key and only the distinct 8-row
+    blocks (usually a handful) are expanded into row patterns, weighted by how often
+    each block occurs.
+    """
+    counts = masks.counts()
+    null_cols = [j for j, c in enumerate(masks.columns) if counts.iloc[j] > 0]
+    n = masks.n_rows
+    width = max(1, (len(masks.columns) + 7) // 8)
+    if not null_cols or n == 0:
+        keys = _void_keys(np.zeros((1, width), dtype=np.uint8))
+        return (keys, np.array([n], dtype=np.int64)) if n else (keys[:0], np.zeros(0, dtype=np.int64))
+
+    # n_bytes x columns: the mask bytes of 8 consecutive rows
+    blocks = masks.bits[null_cols].T
+    _, first, block_freq = np.unique(_void_keys(blocks), return_index=True, return_counts=True)
+
+    # distinct blocks -> 8 packed row patterns each, moved bit by bit so no unpacked
+    # row x column matrix is built
+    distinct = blocks[first]
+    rows = np.zeros((len(first), 8, width), dtype=np.uint8)
+    for k, j in enumerate(null_cols):
+        column = distinct[:, k]
+        for b in range(8):
+            rows[:, b, j // 8] |= ((column >> np.uint8(7 - b)) & np.uint8(1)) << np.uint8(7 - j % 8)
+    patterns, inverse = np.unique(_void_keys(rows.reshape(-1, width)), return_inverse=True)
+    freq = np.bincount(inverse.ravel(), weights=np.repeat(block_freq, 8)).astype(np.int64)
+    padding = masks.bits.shape[1] * 8 - n
+    if padding:
+        # the padding bits after the last row read as "nothing missing", the all-zero key sorts first
+        freq[0] -= padding
+    keep = freq > 0
+    return patterns[keep], freq[keep]
+
+
+def _describe_patterns(columns: list, ranked: list, n: int) -> list:
+    # ranked: (packed pattern bytes, rows) pairs, most frequent first
+    result = []
+    for key, rows in ranked:
+        present = np.unpackbits(np.frombuffer(key, dtype=np.uint8), count=len(columns)).astype(bool)
+        result.append({
+            "missing_columns": [c for c, p in zip(columns, present) if p],
+            "rows": int(rows),
+            "percent": round(float(rows) / n * 100, 2),
+        })
+    return result
+
+
+def nullity_patterns(masks: PackedNullMasks, top_k: int = 10) -> list:
+    """
+    Most frequent combinations of missing columns across rows (see `pattern_counts`).
+    """
+    n = masks.n_rows
+    if n == 0 or not masks.counts().any():
+        return [{"missing_columns": [], "rows": n, "percent": 100.0 if n else 0.0}]
+    patterns, freq = pattern_counts(masks)
+    # ties keep the key order
+    order = np.argsort(-freq, kind="stable")[:top_k]
+    return _describe_patterns(masks.columns, [(patterns[i].tobytes(), freq[i]) for i in order], n)
+
+
+def _co_missing_counts(bits: np.ndarray) -> np.ndarray:
+    # rows where both columns are missing, from the packed masks of the columns
+    matrix = np.zeros((len(bits), len(bits)), dtype=np.int64)
+    for i in range(len(bits)):
+        matrix[i, i:] = POPCOUNT[bits[i] & bits[i:]].sum(axis=1, dtype=np.int64)
+        matrix[i:, i] = matrix[i, i:]
+    return matrix
+
+
+def co_missingness(masks: PackedNullMasks) -> pd.DataFrame:
+    """
+    Number of rows where both columns are missing, for every pair of columns with nulls.
+    """
+    counts = masks.counts()
+    null_cols = [j for j, c in enumerate(masks.columns) if counts.iloc[j] > 0]
+    names = [masks.columns[j] for j in null_cols]
+    return pd.DataFrame(_co_missing_counts(masks.bits[null_cols]), index=names, columns=names)
+
+
+class NullityCounts:
+    """
+    Nullity patterns and co-missingness of a fixed set of columns, kept up to date as rows
+    are appended. Pattern counts are a Misra-Gries summary keyed by the packed row mask
+    (hex), exact while there are at most `k` distinct patterns; co-missing counts are exact.
+    """
+
+    def __init__(self, columns: list, k: int = 1000):
+        self.columns = list(columns)
+        self.n_rows = 0
+        self.patterns = HeavyHitters(k=k)
+        self.both = np.zeros((len(self.columns), len(self.columns)), dtype=np.int64)
+
+    def update(self, df: pd.DataFrame) -> "NullityCounts":
+        masks = pack_null_masks(df[self.columns])
+        if masks.n_rows == 0:
+            return self
+        patterns, freq = pattern_counts(masks)
+        self.patterns.update_counts(pd.Series(freq, index=[p.tobytes().hex() for p in patterns], dtype="int64"))
+        null_cols = np.flatnonzero(masks.counts().to_numpy())
+        self.both[np.ix_(null_cols, null_cols)] += _co_missing_counts(masks.bits[null_cols])
+        self.n_rows += masks.n_rows
+        return self
+
+    def _null_columns(self) -> np.ndarray:
+        # a column's co-missing count with itself is its null count
+        return np.flatnonzero(np.diagonal(self.both))
+
+    def nullity_patterns(self, top_k: int = 10) -> list:
+        """
+        Same layout and order as `nullity_patterns` of the merged rows.
+        """
+        n = self.n_rows
+        if n == 0 or not self._null_columns().size:
+            return [{"missing_columns": [], "rows": n, "percent": 100.0 if n else 0.0}]
+        # hex keys compare like the packed bytes
+        ranked = sorted(self.patterns.counters.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]
+        return _describe_patterns(self.columns, [(bytes.fromhex(key), rows) for key, rows in ranked], n)
+
+    def co_missingness(self) -> pd.DataFrame:
+        null_cols = self._null_columns()
+        names = [self.columns[j] for j in null_cols]
+        return pd.DataFrame(self.both[np.ix_(null_cols, null_cols)], index=names, columns=names)
+
+    def to_dict(self) -> dict:
+        # only columns with nulls have non-zero co-missing counts: their upper triangle, packed
+        null_cols = self._null_columns()
+        both = self.both[np.ix_(null_cols, null_cols)]
+        return {
+            "columns": list(self.columns),
+            "n_rows": self.n_rows,
+            "patterns": self.patterns.to_dict(),
+            "null_columns": null_cols.tolist(),
+            "both": both[np.triu_indices(len(null_cols))].tobytes(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "NullityCounts":
+        nullity = cls(state["columns"])
+        nullity.n_rows = state["n_rows"]
+        nullity.patterns = HeavyHitters.from_dict(state["patterns"])
+        null_cols = np.asarray(state["null_columns"], dtype=np.int64)
+        both = np.zeros((len(null_cols), len(null_cols)), dtype=np.int64)
+        both[np.triu_indices(len(null_cols))] = np.frombuffer(state["both"], dtype=np.int64)
+        nullity.both[np.ix_(null_cols, null_cols)] = both + np.triu(both, 1).T
+        return nullity
+
+
+class RowBinnedNulls:
+    """
+    Null counts per column in consecutive bins of `bin_rows` rows, kept up to date as rows
+    are appended (the missing-value heatmap of a growing dataset).
+    When the number of bins passes 2 x `bins`, neighbouring bins are merged pairwise and
+    `bin_rows` doubles. The first update uses the same byte-aligned bins as `binned_null_fraction`.
+    """
+
+    def __init__(self, columns: list, bins: int = 200):
+        self.columns = list(columns)
+        self.bins = bins
+        self.bin_rows = None
+        self.counts = np.zeros((len(self.columns), 0), dtype=np.int64)
+        self.rows = np.zeros(0, dtype=np.int64)
+
+    def _bin_nulls(self, df: pd.DataFrame, starts: np.ndarray) -> np.ndarray:
+        counts = np.zeros((len(self.columns), starts.size), dtype=np.int64)
+        for j, col in enumerate(self.columns):
+            counts[j] = np.add.reduceat(df[col].isna().to_numpy().astype(np.int64), starts)
+        return counts
+
+    def update(self, df: pd.DataFrame) -> "RowBinnedNulls":
+        n = int(df.shape[0])
+        if n == 0:
+            return self
+        if self.bin_rows is None:
+            self.bin_rows = max(1, -(-((n + 7) // 8) // self.bins)) * 8
+
+        start = 0
+        if self.rows.size and self.rows[-1] < self.bin_rows:
+            # top up the last, partially filled bin
+            start = int(min(self.bin_rows - self.rows[-1], n))
+            self.counts[:, -1] += self._bin_nulls(df.iloc[:start], np.zeros(1, dtype=int))[:, 0]
+            self.rows[-1] += start
+        if start < n:
+            starts = np.arange(0, n - start, self.bin_rows)
+            self.counts = np.concatenate([self.counts, self._bin_nulls(df.iloc[start:], starts)], axis=1)
+            self.rows = np.concatenate([self.rows, np.diff(np.append(starts, n - start))])
+
+        while self.rows.size > 2 * self.bins:
+            self._merge_pairs()
+        return self
+
+    def _merge_pairs(self):
+        if self.rows.size % 2:
+            self.counts = np.concatenate([self.counts, np.zeros((len(self.columns), 1), dtype=np.int64)], axis=1)
+            self.rows = np.append(self.rows, 0)
+        self.counts = self.counts[:, 0::2] + self.counts[:, 1::2]
+        self.rows = self.rows[0::2] + self.rows[1::2]
+        self.bin_rows *= 2
+
+    def fractions(self) -> tuple:
+        """
+        (null fraction of shape columns x bins, first row of every bin), like `binned_null_fraction`.
+        """
+        row_starts = np.concatenate([[0], np.cumsum(self.rows)[:-1]]).astype(int) if self.rows.size else np.zeros(0, dtype=int)
+        return self.counts / np.maximum(self.rows, 1), row_starts
+
+    def to_dict(self) -> dict:
+        return {
+            "columns": list(self.columns),
+            "bins": self.bins,
+            "bin_rows": self.bin_rows,
+            "counts": self.counts.tolist(),
+            "rows": self.rows.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "RowBinnedNulls":
+        binned = cls(state["columns"], bins=state["bins"])
+        binned.bin_rows = state["bin_rows"]
+        binned.rows = np.asarray(state["rows"], dtype=np.int64)
+        binned.counts = np.asarray(state["counts"], dtype=np.int64).reshape(len(binned.columns), binned.rows.size)
+        return binned
@@ -4,10 +4,11 @@ from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 import os
 import logging
-import time
+from langchain_core.messages import AIMessage
+from Backend.llm_cache import LLM_CACHE, normalize_prompt
+from Backend.llm_router import ROUTER
+from Backend.telemetry import record_cache_lookup
 
-LLM_COOLDOWN = {}
-COOLDOWN_SECONDS = 120  # 2 minutes
 
 load_dotenv()
 
@@ -47,29 +48,26 @@ llm_groq_2 = ChatGroq(
 )
 LLM_POOL = [llm_cohere, llm_google_3, llm_google_2, llm_google_1, llm_groq_1, llm_groq_2]
 
-def invoke_with_fallback(llms, messages):
-    last_error = None
-    now = time.time()
+def llm_name_of(llm) -> str:
+    return llm.model if hasattr(llm, "model") else str(llm)
 
-    for llm in llms:
-        llm_name = llm.model if hasattr(llm, "model") else str(llm)
+def invoke_with_fallback(llms, messages, use_cache: bool = True):
+    """
+    Invoke the LLMs of `llms` through the router: fastest expected model first, models with
+    an open circuit breaker skipped, a hedge request after the primary's p95 latency and
+    fallback to the next model on failure.
+    A cached answer for the same model and prompt is returned without calling any provider,
+    pass use_cache=False to always call one.
+    """
+    cache = LLM_CACHE if use_cache else None
+    if cache is not None:
+        prompt_text = normalize_prompt(messages)
+        cached = cache.get_any([llm_name_of(llm) for llm in llms], prompt_text)
+        record_cache_lookup("llm", cached is not None)
+        if cached is not None:
+            return AIMessage(content=cached)
 
-        # Skip LLM if in cooldown
-        if llm_name in LLM_COOLDOWN:
-            if now < LLM_COOLDOWN[llm_name]:
-                continue
-            else:
-                del LLM_COOLDOWN[llm_name]
-
-        try:
-            return llm.invoke(messages)
-
-        except Exception as e:
-            last_error = e
-            print(f"[WARN] {llm_name} failed → {e}")
-
-            # Put LLM in cooldown
-            if "RESOURCE_EXHAUSTED" in str(e) or "429" in str(e):
-                LLM_COOLDOWN[llm_name] = now + COOLDOWN_SECONDS
-
-    raise RuntimeError("All LLMs failed") from last_error
+    llm_name, response = ROUTER.invoke(llms, messages, name_of=llm_name_of)
+    if cache is not None and isinstance(response.content, str):
+        cache.put(llm_name, prompt_text, response.content)
+    return response
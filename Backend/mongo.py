@@ -1,12 +1,10 @@
-import os
+import math
+from concurrent.futures import Future
 import numpy as np
 import pandas as pd
 from typing import Dict, Any, Optional,List
 
-from pymongo import MongoClient
-
-client = MongoClient(os.environ["MONGO_URI"])
-collection = client[os.environ["DB_NAME"]][os.environ["COLLECTION_NAME"]]
+from Backend.db import get_collection, get_async_collection, PROJECTIONS
 
 def make_mongo_safe(obj):
     if isinstance(obj, dict):
@@ -38,13 +36,33 @@ def make_mongo_safe(obj):
     return obj
 
 
+def to_jsonable(obj):
+    """
+    Mongo-safe conversion plus string keys and NaN/inf -> None, so the result is valid JSON.
+    Pending figure futures are reported as {"status": "pending"}.
+    """
+    if isinstance(obj, Future):
+        # figure still rendering / uploading
+        return {"status": "pending"}
+    obj = make_mongo_safe(obj)
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [to_jsonable(v) for v in obj]
+    if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
+        return None
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        return obj
+    return str(obj)
+
+
 def store_eda_data(data: Dict[str, Any]) -> str:
     """
     Store EDA overview + summary in MongoDB
     Returns inserted document ID
     """
     safe_data = make_mongo_safe(data)
-    result = collection.insert_one(safe_data)
+    result = get_collection().insert_one(safe_data)
     return str(result.inserted_id)
 
 def fetch_eda_data(run_id: str) -> Optional[Dict[str, Any]]:
@@ -52,16 +70,26 @@ def fetch_eda_data(run_id: str) -> Optional[Dict[str, Any]]:
     Fetch stored EDA data using document ID
     """
 
-    return collection.find_one(
-        {"run_id": run_id},
-        {"llm_overview": 1, "eda_summary":1}
-    )
+    return get_collection().find_one({"run_id": run_id}, PROJECTIONS["chat_context"])
 
-def delete_all_data(run_id : str):
-    doc = collection.update_one({"run_id": run_id},{"$unset": {"llm_overview": "", "eda_summary": ""}})
+async def fetch_eda_data_async(run_id: str) -> Optional[Dict[str, Any]]:
+    """
+    fetch_eda_data for async handlers (does not block the event loop)
+    """
+    return await get_async_collection().find_one({"run_id": run_id}, PROJECTIONS["chat_context"])
+
+def _delete_result(run_id: str, doc) -> dict:
     return {
         "success": True,
         "run_id": run_id,
         "matched": doc.matched_count,
         "modified": doc.modified_count
-    }
\ No newline at end of file
+    }
+
+def delete_all_data(run_id : str):
+    doc = get_collection().update_one({"run_id": run_id},{"$unset": {"llm_overview": "", "eda_summary": ""}})
+    return _delete_result(run_id, doc)
+
+async def delete_all_data_async(run_id: str):
+    doc = await get_async_collection().update_one({"run_id": run_id},{"$unset": {"llm_overview": "", "eda_summary": ""}})
+    return _delete_result(run_id, doc)
\ No newline at end of file
@@ -0,0 +1,255 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import pandas as pd
+
+from Backend.graph import eda_workflow
+from Backend.db import get_collection
+from Backend.mongo import store_eda_data
+from Backend.prompt import mongo_prompt
+from Backend.models import llm_cohere, invoke_with_fallback
+from Backend.storage_graphs import resolve_figures, discard_figures
+from Backend.result_cache import store_cached_result
+from Backend.prompt_digest import compact_prompt_inputs
+from Backend.lifecycle import run_expiry
+from Backend.telemetry import span, RUN_DURATION
+from Backend.main_nodes import eda_insight_summary
+from Backend.incremental import (
+    APPEND_STATE, build_run_state, store_run_state, load_run_state, save_run_state, copy_run_state, run_lock,
+)
+
+# builds the append state of finished runs while their overview LLM call is in flight
+STATE_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="append-state")
+
+
+def initial_eda_state(df: pd.DataFrame, run_id: str = None) -> dict:
+    return {
+        "run_id": run_id,
+        "data": df,
+
+        "graph_file_path": [],
+        "data_overview": {},
+        "data_quality_overview": {},
+        "data_stat_overview": {},
+        "categorical_analysis_overview": {},
+        "data_outlier_overview": [],
+        "data_correlation_overview": {},
+        "data_target_overview": {},
+        "eda_insight_summary": ""
+    }
+
+
+def run_eda_pipeline(df: pd.DataFrame, run_id: str, filename: str, on_event=None, digest: str = None,
+                     bytes_in: int = None) -> dict:
+    """
+    Run the EDA workflow on a dataframe, store the run in MongoDB and return its summary.
+    `on_event(node, update)` is called with each LangGraph node's output as soon as it finishes.
+    When the upload `digest` is given the finished result is cached under it.
+    The run is traced as an "eda_run" span (run_id, dataset shape, uploaded bytes).
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        with span("eda_run", run_id=run_id, rows=int(df.shape[0]), columns=int(df.shape[1]),
+                  bytes_in=bytes_in, digest=digest):
+            return _run_eda_pipeline(df, run_id, filename, on_event=on_event, digest=digest)
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        RUN_DURATION.labels(status=status).observe(time.perf_counter() - start)
+
+
+def _build_run_state(df: pd.DataFrame, run_id: str, target: dict, visual_outputs: list):
+    with span("append_state.build", run_id=run_id, rows=int(df.shape[0])):
+        return build_run_state(df, run_id, target, visual_outputs)
+
+
+def _llm_overview(sections: dict, summary: str, visual_outputs: list, run_id: str):
+    inputs, _ = compact_prompt_inputs(sections)
+    prompt = mongo_prompt.format_prompt(mongo_doc={
+        **inputs,
+        "EDA_summary": summary,
+        "visual_outputs": visual_outputs,
+    })
+    with span("llm.overview", run_id=run_id):
+        return invoke_with_fallback(llms=[llm_cohere], messages=prompt)
+
+
+def _run_eda_pipeline(df: pd.DataFrame, run_id: str, filename: str, on_event=None, digest: str = None) -> dict:
+    final_state = None
+    for mode, chunk in eda_workflow.stream(initial_eda_state(df, run_id), stream_mode=["updates", "values"]):
+        if mode == "updates":
+            if on_event is not None:
+                for node, update in chunk.items():
+                    on_event(node, update)
+        else:
+            final_state = chunk
+
+    with span("figures.resolve", run_id=run_id):
+        visual_outputs = resolve_figures(final_state["graph_file_path"])
+
+    mongo_doc = {
+        "dataset_overview": final_state["data_overview"],
+        "data_quality": final_state["data_quality_overview"],
+        "numerical_statistics": final_state["data_stat_overview"],
+        "categorical_analysis": final_state["categorical_analysis_overview"],
+        "outlier_analysis": final_state["data_outlier_overview"],
+        "correlation_analysis": final_state["data_correlation_overview"],
+        "target_analysis": final_state["data_target_overview"],
+        "EDA_summary": final_state["eda_insight_summary"],
+        "visual_outputs": visual_outputs,
+    }
+
+    state_future = None
+    if APPEND_STATE:
+        state_future = STATE_EXECUTOR.submit(
+            _build_run_state, final_state["data"], run_id, final_state["data_target_overview"], visual_outputs
+        )
+    llm_response = _llm_overview(final_state, final_state["eda_insight_summary"], visual_outputs, run_id)
+    # prompt_html = html_prompt.format_prompt(eda_summary_html = final_state["eda_insight_summary"])
+    # llm_response_html = llm_google_2.invoke(prompt_html)
+
+    created_at = time.time()
+    expires_at = run_expiry(created_at)
+    document = {
+        "run_id": run_id,
+        "created_at": created_at,
+        "expires_at": expires_at,
+        "original_filename": filename,
+        "digest": digest,
+        "llm_overview": llm_response.content,
+        "eda_summary": final_state["eda_insight_summary"],
+        # "eda_summary_html": llm_response_html.content,
+        "visual_outputs": visual_outputs,
+    }
+
+    with span("mongo.store", run_id=run_id):
+        mongo_id = store_eda_data(document)
+
+    if state_future is not None:
+        try:
+            state = state_future.result()
+            with span("append_state.store", run_id=run_id):
+                store_run_state(run_id, state, expires_at)
+        except Exception as e:
+            # the run is complete, it just cannot take appended rows
+            print(f"[WARN] append state of run {run_id} not stored → {e}")
+
+    if digest:
+        # the figures belong to this run, so cached copies expire with it
+        store_cached_result(digest, {
+            "run_id": run_id,
+            "expires_at": expires_at.timestamp() if expires_at else None,
+            "sections": mongo_doc,
+            "llm_overview": llm_response.content,
+            "eda_summary": final_state["eda_insight_summary"],
+            "visual_outputs": visual_outputs,
+        })
+
+    return {
+        "run_id": run_id,
+        "mongo_id": mongo_id,
+        "summary": final_state["eda_insight_summary"],
+        # "html": llm_response_html.content,
+    }
+
+
+def store_run_from_cache(run_id: str, filename: str, cached: dict) -> dict:
+    """
+    Create a run document from a cached result of an identical upload.
+    It shares the original run's figures and expires with it.
+    """
+    created_at = time.time()
+    expires_at = run_expiry(created_at)
+    if cached.get("expires_at"):
+        expires_at = datetime.fromtimestamp(cached["expires_at"], timezone.utc)
+    document = {
+        "run_id": run_id,
+        "created_at": created_at,
+        "expires_at": expires_at,
+        "original_filename": filename,
+        "digest": cached["digest"],
+        "from_cache": True,
+        "artifacts_run_id": cached.get("run_id"),
+        "llm_overview": cached["llm_overview"],
+        "eda_summary": cached["eda_summary"],
+        "visual_outputs": cached["visual_outputs"],
+    }
+
+    mongo_id = store_eda_data(document)
+    if APPEND_STATE and cached.get("run_id"):
+        try:
+            copy_run_state(cached["run_id"], run_id, expires_at)
+        except Exception as e:
+            print(f"[WARN] append state of run {run_id} not copied → {e}")
+
+    return {
+        "run_id": run_id,
+        "mongo_id": mongo_id,
+        "summary": cached["eda_summary"],
+        "cached": True,
+    }
+
+
+def append_to_run(run_id: str, df: pd.DataFrame, on_event=None) -> dict:
+    """
+    Merge appended rows into a run's stored state and update the run in place: sections are
+    recomputed from the merged sketches, only figures that moved more than
+    APPEND_FIGURE_TOLERANCE are redrawn and the summary is regenerated only when a section's
+    summary input changed. `on_event(section, update)` is called for every changed section.
+    Raises KeyError when the run has no stored state.
+    """
+    with run_lock(run_id), span("append_run", run_id=run_id, rows=int(df.shape[0])):
+        state = load_run_state(run_id)
+        if state is None:
+            raise KeyError(run_id)
+        stored_version = state.version
+
+        with span("append_state.update", run_id=run_id):
+            state.update(df)
+        state.version += 1
+
+        profile = state.profiler.column_profile()
+        sections = state.sections(profile)
+        changed = state.changed_sections(sections)
+        for name in changed:
+            if on_event is not None:
+                on_event(name, {name: sections[name]})
+
+        with span("figures.refresh", run_id=run_id) as attributes:
+            redrawn = state.refresh_figures(run_id, state.figure_specs(profile, sections))
+            attributes["redrawn"] = len(redrawn)
+        visual_outputs = state.visual_outputs()
+
+        update = {
+            "visual_outputs": visual_outputs,
+            "num_rows": state.profiler.num_rows,
+            "version": state.version,
+            "appended_rows": state.appended_rows,
+            "appended_at": time.time(),
+        }
+        try:
+            if changed:
+                summary = eda_insight_summary({**sections, "graph_file_path": visual_outputs})["eda_insight_summary"]
+                update["eda_summary"] = summary
+                update["llm_overview"] = _llm_overview(sections, summary, visual_outputs, run_id).content
+
+            # fails if another process appended meanwhile, before the run document is touched
+            save_run_state(run_id, state, stored_version)
+        except Exception:
+            # the stored state still points at the previous figures
+            discard_figures([state.figures[plot]["output"] for plot in redrawn])
+            raise
+        with span("mongo.store", run_id=run_id):
+            get_collection().update_one({"run_id": run_id}, {"$set": update})
+
+    return {
+        "run_id": run_id,
+        "version": state.version,
+        "rows_appended": int(df.shape[0]),
+        "num_rows": state.profiler.num_rows,
+        "changed_sections": changed,
+        "redrawn_figures": redrawn,
+        "summary_regenerated": bool(changed),
+    }
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+MAX_OUTLIER_POINTS = 500
+
+
+def _finite_values(series: pd.Series) -> np.ndarray:
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+def histogram_figure(series: pd.Series, title: str, nbins: int = 30) -> go.Figure:
+    """
+    Histogram built from NumPy bin counts, so the figure holds `nbins` bars whatever the row count.
+    """
+    values = _finite_values(series)
+    counts, edges = np.histogram(values, bins=nbins) if values.size else (np.zeros(0), np.zeros(1))
+    return histogram_figure_from_counts(counts, edges, name=str(series.name), title=title)
+
+
+def histogram_figure_from_counts(counts: np.ndarray, edges: np.ndarray, name: str, title: str) -> go.Figure:
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        name=name,
+    ))
+    fig.update_layout(
+        title=title,
+        bargap=0,
+        xaxis_title=name,
+        yaxis_title="count",
+    )
+    return fig
+
+
+def box_summary(series: pd.Series, max_outliers: int = MAX_OUTLIER_POINTS, seed: int = 0) -> dict:
+    """
+    Five-number summary with Tukey fences plus a capped sample of the points beyond them.
+    The most extreme point on each side is always part of the sample.
+    """
+    values = _finite_values(series)
+    if values.size == 0:
+        return None
+
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    inside = values[(values >= lower) & (values <= upper)]
+    outliers = values[(values < lower) | (values > upper)]
+    n_outliers = int(outliers.size)
+
+    if n_outliers > max_outliers:
+        rng = np.random.default_rng(seed)
+        sample = rng.choice(outliers, size=max_outliers - 2, replace=False)
+        outliers = np.concatenate([[outliers.min(), outliers.max()], sample])
+
+    return {
+        "q1": float(q1),
+        "median": float(median),
+        "q3": float(q3),
+        "mean": float(values.mean()),
+        "lowerfence": float(inside.min()) if inside.size else float(q1),
+        "upperfence": float(inside.max()) if inside.size else float(q3),
+        "outliers": outliers,
+        "n_outliers": n_outliers,
+    }
+
+
+def box_figure(series: pd.Series, title: str, max_outliers: int = MAX_OUTLIER_POINTS) -> go.Figure:
+    """
+    Box plot drawn from precomputed quartiles/fences and a capped outlier sample.
+    """
+    return box_figure_from_summary(box_summary(series, max_outliers=max_outliers), name=str(series.name), title=title)
+
+
+def sketch_box_summary(moments, sketch, max_outliers: int = MAX_OUTLIER_POINTS) -> dict:
+    """
+    `box_summary` from a column's RunningMoments and QuantileSketch (Backend.sketches):
+    quartiles within the sketch's rank error, fences and outlier points taken from the
+    sketch items, the outlier count estimated from ranks.
+    """
+    if sketch.n == 0:
+        return None
+    q1, median, q3 = (sketch.quantile(q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    items = np.concatenate(sketch.levels)
+    inside = items[(items >= lower) & (items <= upper)]
+    outliers = np.unique(np.concatenate([
+        items[(items < lower) | (items > upper)],
+        [v for v in (moments.min, moments.max) if v < lower or v > upper],
+    ]))
+    if outliers.size > max_outliers:
+        rng = np.random.default_rng(0)
+        outliers = np.concatenate([[outliers[0], outliers[-1]], rng.choice(outliers[1:-1], size=max_outliers - 2, replace=False)])
+
+    return {
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "mean": moments.mean,
+        "lowerfence": float(inside.min()) if inside.size else q1,
+        "upperfence": float(inside.max()) if inside.size else q3,
+        "outliers": outliers,
+        "n_outliers": int(round(sketch.rank(lower) + sketch.n - sketch.rank(upper, inclusive=True))),
+    }
+
+
+def box_figure_from_summary(summary: dict, name: str, title: str) -> go.Figure:
+    fig = go.Figure()
+    if summary is not None:
+        fig.add_trace(go.Box(
+            x=[name],
+            q1=[summary["q1"]],
+            median=[summary["median"]],
+            q3=[summary["q3"]],
+            mean=[summary["mean"]],
+            lowerfence=[summary["lowerfence"]],
+            upperfence=[summary["upperfence"]],
+            name=name,
+            boxpoints=False,
+        ))
+        if summary["outliers"].size:
+            fig.add_trace(go.Scatter(
+                x=[name] * summary["outliers"].size,
+                y=summary["outliers"],
+                mode="markers",
+                name=f"outliers ({summary['n_outliers']})",
+                marker={"size": 4},
+            ))
+    fig.update_layout(title=title, yaxis_title=name, showlegend=False)
+    return fig
+
+
+def missing_heatmap_figure(fractions: np.ndarray, row_starts: np.ndarray, columns: list) -> go.Figure:
+    return px.imshow(
+        fractions,
+        x=row_starts,
+        y=columns,
+        zmin=0,
+        zmax=1,
+        labels={"x": "Row", "y": "Column", "color": "Missing fraction"},
+        color_continuous_scale="Blues",
+        title="Missing Value Heatmap",
+        aspect="auto"
+    )
+
+
+def correlation_heatmap_figure(corr_matrix: pd.DataFrame) -> go.Figure:
+    return px.imshow(
+        corr_matrix,
+        text_auto=".2f",
+        color_continuous_scale="RdBu",
+        zmin=-1,
+        zmax=1,
+        title="Correlation Heatmap"
+    )
+
+
+def category_bar_figure(value_counts: pd.Series, col) -> go.Figure:
+    plot_df = value_counts.reset_index()
+    plot_df.columns = [col, "count"]
+    return px.bar(
+        plot_df,
+        x=col,
+        y="count",
+        title=f"Category Distribution - {col}"
+    )
+
+
+def target_class_figure(value_counts: pd.Series, col) -> go.Figure:
+    return px.bar(
+        value_counts,
+        title=f"Target Class Distribution - {col}"
+    )
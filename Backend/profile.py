@@ -0,0 +1,52 @@
+import pandas as pd
+
+from Backend.missingness import pack_null_masks
+from Backend.categories import CategoryCounts
+
+
+class ColumnProfile:
+    """
+    Per-dataset column primitives computed once and shared by every EDA node.
+
+    - dtype groups (numerical / categorical)
+    - bit-packed null masks, null counts and null fractions
+    - distinct counts (nunique, NaN excluded)
+    - numerical moments (describe, var, skew, kurt)
+    - category counts of categorical / bool columns (each column factorized once)
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.num_rows = int(df.shape[0])
+
+        self.numerical_columns = df.select_dtypes(include="number").columns.tolist()
+        # "string" covers Arrow-backed text columns produced by Backend.ingest
+        self.categorical_columns = df.select_dtypes(include=["object", "category", "string"]).columns.tolist()
+        self.categorical_bool_columns = df.select_dtypes(include=["object", "category", "string", "bool"]).columns.tolist()
+
+        self.null_masks = pack_null_masks(df)
+        self.null_counts = self.null_masks.counts()
+        self.null_fraction = self.null_counts / self.num_rows if self.num_rows else self.null_counts.astype(float)
+
+        self.categories = {
+            col: CategoryCounts.from_series(df[col])
+            for col in self.categorical_bool_columns
+        }
+        # categorical columns reuse their factorization instead of hashing every value again
+        others = df.columns.difference(self.categorical_bool_columns, sort=False)
+        distinct = df[others].nunique()
+        for col, counts in self.categories.items():
+            distinct[col] = counts.cardinality
+        self.distinct_counts = distinct.reindex(df.columns).astype("int64")
+
+        num_df = df[self.numerical_columns]
+        self.describe = num_df.describe().T if self.numerical_columns else pd.DataFrame()
+        self.var = num_df.var()
+        self.skew = num_df.skew()
+        self.kurt = num_df.kurt()
+
+
+def build_column_profile(df: pd.DataFrame) -> ColumnProfile:
+    """
+    Build the shared column profile for a dataset.
+    """
+    return ColumnProfile(df)
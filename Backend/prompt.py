@@ -275,4 +275,22 @@ EDA SUMMARY:
 {{eda_summary_text}}
 """,
 input_variables=["eda_summary_text"]
-)
\ No newline at end of file
+)
+chat_summary_prompt = PromptTemplate(
+    template="""
+You are maintaining the memory of a conversation between a user and a senior data scientist about a dataset.
+
+Update the running summary with the new messages below.
+Keep every fact, number, column name, decision and open question that may matter later.
+Drop greetings and repetition. Write plain text, at most 200 words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:
+""",
+input_variables=["summary","messages"]
+)
@@ -0,0 +1,213 @@
+import os
+import json
+import math
+import numpy as np
+import pandas as pd
+
+from Backend.mongo import to_jsonable
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "12000"))
+OUTPUT_TOKEN_RESERVE = int(os.getenv("OUTPUT_TOKEN_RESERVE", "8192"))
+CHARS_PER_TOKEN = 4
+
+# detail levels tried from the richest to the most compact
+DETAIL_LEVELS = [25, 15, 10, 5, 3, 1]
+
+CONTEXT_WINDOWS = {
+    "command-a-03-2025": 256_000,
+    "gemini-2.5-pro": 1_048_576,
+    "gemini-2.5-flash": 1_048_576,
+    "gemini-2.5-flash-lite": 1_048_576,
+    "llama-3.3-70b-versatile": 128_000,
+    "llama-3.1-8b-instant": 128_000,
+}
+DEFAULT_CONTEXT_WINDOW = 32_000
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap pre-flight token estimate (~4 characters per token).
+    """
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def _dumps(obj) -> str:
+    return json.dumps(to_jsonable(obj), separators=(",", ":"), ensure_ascii=False)
+
+
+def _round(value, digits: int = 3):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return value
+    return None if math.isnan(value) or math.isinf(value) else round(value, digits)
+
+
+def digest_overview(overview: dict, top_n: int) -> dict:
+    columns = overview.get("column_names", [])
+    data_types = overview.get("data_types", {})
+    digest = {k: v for k, v in overview.items() if k not in ("column_names", "data_types")}
+    digest["dtype_counts"] = pd.Series(data_types, dtype=object).value_counts().to_dict() if data_types else {}
+    digest["columns"] = {col: data_types.get(col) for col in columns[:top_n * 4]}
+    if len(columns) > top_n * 4:
+        digest["columns_omitted"] = len(columns) - top_n * 4
+    return digest
+
+
+def digest_quality(quality: dict, top_n: int) -> dict:
+    pct = pd.Series(quality.get("percentage_missing_data", {}), dtype=float)
+    missing = pct[pct > 0].sort_values(ascending=False)
+    constant = list(quality.get("constant_columns", []))
+    digest = {k: v for k, v in quality.items()
+              if k not in ("missing_value", "percentage_missing_data", "constant_columns",
+                           "nullity_patterns", "co_missingness")}
+    if quality.get("nullity_patterns"):
+        digest["top_nullity_patterns"] = quality["nullity_patterns"][:min(top_n, 5)]
+    digest.update({
+        "columns_with_missing": int(missing.size),
+        "top_missing_percent": {str(k): _round(v, 2) for k, v in missing.head(top_n).items()},
+        "constant_columns": constant[:top_n],
+    })
+    return digest
+
+
+def digest_statistics(stat: dict, top_n: int) -> dict:
+    if not stat:
+        return {}
+    df = pd.DataFrame(stat)
+    rank = df.get("skewness", pd.Series(0, index=df.index)).abs().fillna(0) + \
+        df.get("kurtosis", pd.Series(0, index=df.index)).abs().fillna(0)
+    keep = rank.sort_values(ascending=False).index[:top_n]
+    fields = [f for f in ["mean", "std", "min", "50%", "max", "skewness", "kurtosis"] if f in df.columns]
+    digest = {
+        str(col): {f: _round(df.at[col, f]) for f in fields}
+        for col in keep
+    }
+    if len(df.index) > top_n:
+        digest["_omitted_columns"] = int(len(df.index) - top_n)
+    return digest
+
+
+def digest_categorical(categorical: dict, top_n: int) -> dict:
+    items = []
+    for col, info in categorical.items():
+        cardinality = info.get("Cardinality", {})
+        n_unique = cardinality.get(col) if isinstance(cardinality, dict) else cardinality
+        counts = info.get("unique_values_in_column")
+        if isinstance(counts, dict):
+            counts = pd.Series(counts)
+        top = {}
+        if isinstance(counts, pd.Series) and counts.size:
+            total = counts.sum()
+            top = {str(k): _round(v / total * 100, 1) for k, v in counts.head(min(top_n, 10)).items()}
+        rare = info.get("rare_categories", [])
+        items.append((col, {
+            "cardinality": n_unique,
+            "top_categories_percent": top,
+            "rare_category_count": info.get("rare_category_count", len(rare)),
+            "possible_encoding": info.get("possible_encoding"),
+        }))
+    items.sort(key=lambda kv: kv[1]["rare_category_count"], reverse=True)
+    digest = dict(items[:top_n])
+    if len(items) > top_n:
+        digest["_omitted_columns"] = len(items) - top_n
+    return digest
+
+
+def _zscore_count(value, threshold: float = 3.0):
+    if isinstance(value, (pd.Series, np.ndarray, list)):
+        return int((np.asarray(value, dtype=float) > threshold).sum())
+    return value
+
+
+def digest_outliers(outliers, top_n: int) -> dict:
+    if not outliers:
+        return {}
+    report, anomaly_columns = outliers[0], outliers[1]
+    rows = []
+    for col, info in report.items():
+        row = {
+            k: (_zscore_count(v) if k == "zscore_outliers" else v)
+            for k, v in info.items()
+            if not isinstance(v, (list, dict)) or k == "zscore_outliers"
+        }
+        rows.append((col, row))
+    rows.sort(key=lambda kv: kv[1].get("iqr_percent", 0) or 0, reverse=True)
+    return {
+        "columns_with_anomalies": len(anomaly_columns),
+        "top_anomalies": dict(rows[:top_n]),
+    }
+
+
+def digest_correlation(correlation: dict, top_n: int) -> dict:
+    if not isinstance(correlation, dict):
+        return {"note": correlation}
+    # timings_ms is wall-clock telemetry: it would make every run's prompt unique
+    digest = {k: v for k, v in correlation.items()
+              if k not in ("correlation_matrix", "high_correlation_features", "VIF_factor", "redundant_features",
+                           "timings_ms")}
+
+    pairs = list(correlation.get("high_correlation_features", []))
+    matrix = correlation.get("correlation_matrix")
+    if isinstance(matrix, pd.DataFrame) and matrix.shape[0] > 1:
+        values = matrix.to_numpy(dtype=float)
+        upper = np.triu_indices_from(values, k=1)
+        strength = np.abs(values[upper])
+        order = np.argsort(-strength)[:top_n]
+        pairs = [{
+            "feature_1": matrix.columns[upper[0][i]],
+            "feature_2": matrix.columns[upper[1][i]],
+            "correlation": _round(values[upper[0][i], upper[1][i]]),
+        } for i in order]
+    digest["strongest_correlations"] = sorted(
+        pairs, key=lambda p: abs(p.get("correlation") or 0), reverse=True
+    )[:top_n]
+
+    vif = [v for v in correlation.get("VIF_factor", []) if "vif" in v]
+    digest["highest_vif"] = sorted(vif, key=lambda v: v["vif"], reverse=True)[:top_n]
+    redundant = list(correlation.get("redundant_features", []))
+    digest["redundant_features"] = redundant[:top_n]
+    return digest
+
+
+def digest_sections(state: dict, top_n: int) -> dict:
+    return {
+        "data_overview": digest_overview(state.get("data_overview", {}), top_n),
+        "data_quality": digest_quality(state.get("data_quality_overview", {}), top_n),
+        "numerical_stats": digest_statistics(state.get("data_stat_overview", {}), top_n),
+        "categorical_analysis": digest_categorical(state.get("categorical_analysis_overview", {}), top_n),
+        "outlier_analysis": digest_outliers(state.get("data_outlier_overview", []), top_n),
+        "correlation_analysis": digest_correlation(state.get("data_correlation_overview", {}), top_n),
+        "target_analysis": state.get("data_target_overview", {}),
+    }
+
+
+def compact_prompt_inputs(state: dict, token_budget: int = PROMPT_TOKEN_BUDGET) -> tuple:
+    """
+    Serialize every EDA section into a compact ranked digest (top anomalies, strongest
+    correlations, top categories, ...) that fits `token_budget`.
+    Returns ({section: json string}, estimated tokens).
+    """
+    for top_n in DETAIL_LEVELS:
+        inputs = {name: _dumps(section) for name, section in digest_sections(state, top_n).items()}
+        tokens = sum(estimate_tokens(text) for text in inputs.values())
+        if tokens <= token_budget:
+            break
+    return inputs, tokens
+
+
+def context_window(model_name: str) -> int:
+    return CONTEXT_WINDOWS.get(model_name, DEFAULT_CONTEXT_WINDOW)
+
+
+def select_llms_for_prompt(llms: list, prompt_tokens: int, name_of, reserve: int = OUTPUT_TOKEN_RESERVE) -> list:
+    """
+    Keep the whole pool when the prompt fits every model, otherwise only the models whose
+    context window can hold it (the largest ones if none can).
+    """
+    needed = prompt_tokens + reserve
+    fitting = [llm for llm in llms if context_window(name_of(llm)) >= needed]
+    if fitting:
+        return fitting
+    largest = max(context_window(name_of(llm)) for llm in llms)
+    return [llm for llm in llms if context_window(name_of(llm)) == largest]
@@ -0,0 +1,82 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import plotly.io as pio
+import plotly.graph_objects as go
+
+from Backend.telemetry import FIGURE_RENDER
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def _warm_up():
+    """
+    Runs once in every render worker so kaleido's browser process is already up
+    when the first real figure arrives.
+    """
+    pio.to_image(go.Figure(), format="png", width=10, height=10)
+
+
+def _render(fig_json: str, format: str) -> tuple:
+    start = time.perf_counter()
+    fig = pio.from_json(fig_json)
+    image = pio.to_image(fig, format=format)
+    return image, time.perf_counter() - start
+
+
+def _unwrap(source: Future, target: Future, format: str):
+    # runs in the pool's result thread: record the worker-side render time, pass the bytes on
+    try:
+        image, seconds = source.result()
+    except BaseException as e:
+        target.set_exception(e)
+        return
+    FIGURE_RENDER.labels(format=format).observe(seconds)
+    target.set_result(image)
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_up,
+            )
+        return _POOL
+
+
+def render_figure(fig, format: str = "png"):
+    """
+    Render a Plotly figure to in-memory image bytes on the warm worker pool.
+    Returns a Future of the bytes.
+    """
+    return render_figure_json(fig.to_json(), format=format)
+
+
+def render_figure_json(fig_json: str, format: str = "png"):
+    """
+    render_figure for an already serialized figure (Plotly JSON).
+    """
+    global _POOL
+    pool = get_render_pool()
+    try:
+        rendered = pool.submit(_render, fig_json, format)
+    except BrokenProcessPool:
+        # a worker died (e.g. the renderer crashed): start a fresh pool once
+        with _POOL_LOCK:
+            if _POOL is pool:
+                _POOL = None
+        rendered = get_render_pool().submit(_render, fig_json, format)
+
+    image = Future()
+    rendered.add_done_callback(lambda f: _unwrap(f, image, format))
+    return image
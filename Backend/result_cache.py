@@ -0,0 +1,72 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from Backend.db import get_collection
+from Backend.mongo import to_jsonable
+from Backend.telemetry import record_cache_lookup
+
+# bump when the pipeline output changes so old entries are not served
+RESULT_CACHE_VERSION = "1"
+RESULT_CACHE_MEMORY_ITEMS = int(os.getenv("RESULT_CACHE_MEMORY_ITEMS", "64"))
+
+RESULT_CACHE_COLLECTION = os.getenv("RESULT_CACHE_COLLECTION", "eda_result_cache")
+
+_MEMORY = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _key(digest: str) -> str:
+    return f"v{RESULT_CACHE_VERSION}:{digest}"
+
+
+def get_cached_result(digest: str) -> Optional[dict]:
+    """
+    Completed EDA result for a dataset digest (memory first, then MongoDB).
+    """
+    key = _key(digest)
+    with _LOCK:
+        doc = _MEMORY.get(key)
+        if doc is not None:
+            _MEMORY.move_to_end(key)
+
+    if doc is None:
+        doc = get_collection(RESULT_CACHE_COLLECTION).find_one({"_id": key}, {"_id": 0})
+        if doc:
+            _remember(key, doc)
+    if doc and _expired(doc):
+        # the run that owns the figures is about to be reaped
+        doc = None
+    record_cache_lookup("result", doc is not None)
+    return doc
+
+
+def _expired(entry: dict) -> bool:
+    return bool(entry.get("expires_at")) and entry["expires_at"] <= time.time()
+
+
+def _remember(key: str, entry: dict):
+    with _LOCK:
+        _MEMORY[key] = entry
+        _MEMORY.move_to_end(key)
+        while len(_MEMORY) > RESULT_CACHE_MEMORY_ITEMS:
+            _MEMORY.popitem(last=False)
+
+
+def store_cached_result(digest: str, entry: dict):
+    """
+    Store the mongo_doc sections, figure metadata and LLM outputs of a finished run.
+    """
+    key = _key(digest)
+    entry = to_jsonable({**entry, "digest": digest, "cached_at": time.time()})
+    get_collection(RESULT_CACHE_COLLECTION).replace_one({"_id": key}, {"_id": key, **entry}, upsert=True)
+    _remember(key, entry)
+
+
+def invalidate_cached_result(digest: str):
+    key = _key(digest)
+    with _LOCK:
+        _MEMORY.pop(key, None)
+    get_collection(RESULT_CACHE_COLLECTION).delete_one({"_id": key})
@@ -0,0 +1,439 @@
+import math
+import zlib
+import numpy as np
+import pandas as pd
+
+
+class RunningMoments:
+    """
+    Mergeable count / mean / M2 / M3 / M4 / min / max (Welford, Chan & Pébay updates).
+    Statistics derived from it are exact up to floating point error.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values) -> "RunningMoments":
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+
+        batch = RunningMoments()
+        batch.n = int(values.size)
+        batch.mean = float(values.mean())
+        d = values - batch.mean
+        d2 = d * d
+        batch.m2 = float(d2.sum())
+        batch.m3 = float((d2 * d).sum())
+        batch.m4 = float((d2 * d2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        return self.merge(batch)
+
+    def merge(self, other: "RunningMoments") -> "RunningMoments":
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        delta2 = delta * delta
+
+        m4 = (
+            self.m4 + other.m4
+            + delta2 * delta2 * na * nb * (na * na - na * nb + nb * nb) / n ** 3
+            + 6.0 * delta2 * (na * na * other.m2 + nb * nb * self.m2) / n ** 2
+            + 4.0 * delta * (na * other.m3 - nb * self.m3) / n
+        )
+        m3 = (
+            self.m3 + other.m3
+            + delta2 * delta * na * nb * (na - nb) / n ** 2
+            + 3.0 * delta * (na * other.m2 - nb * self.m2) / n
+        )
+        m2 = self.m2 + other.m2 + delta2 * na * nb / n
+
+        self.mean = self.mean + delta * nb / n
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in ("n", "mean", "m2", "m3", "m4", "min", "max")}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "RunningMoments":
+        moments = cls()
+        moments.__dict__.update(state)
+        return moments
+
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else float("nan")
+
+    def skew(self) -> float:
+        """Bias-corrected skewness, same definition as pandas `Series.skew`."""
+        n = self.n
+        if n < 3 or self.m2 == 0:
+            return float("nan") if n < 3 else 0.0
+        g1 = (self.m3 / n) / (self.m2 / n) ** 1.5
+        return math.sqrt(n * (n - 1)) / (n - 2) * g1
+
+    def kurt(self) -> float:
+        """Bias-corrected excess kurtosis, same definition as pandas `Series.kurt`."""
+        n = self.n
+        if n < 4 or self.m2 == 0:
+            return float("nan") if n < 4 else 0.0
+        g2 = (self.m4 / n) / (self.m2 / n) ** 2 - 3.0
+        return ((n + 1) * g2 + 6.0) * (n - 1) / ((n - 2) * (n - 3))
+
+
+class QuantileSketch:
+    """
+    KLL-style mergeable quantile sketch.
+
+    Keeps O(k log(n/k)) items. While nothing has been compacted the answers are exact,
+    afterwards the normalized rank error is about 1.7 / k (≈0.85% for k=200).
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.seed = seed
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = items[:1] if items.size % 2 else items[:0]
+                pairs = items[keep.size:]
+                offset = int(self._rng.integers(0, 2))
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], pairs[offset::2]])
+            level += 1
+
+    def update(self, values) -> "QuantileSketch":
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.n += int(values.size)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(level_items.size, 2 ** level, dtype=float)
+            for level, level_items in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind="mergesort")
+        return items[order], weights[order]
+
+    def quantile(self, q: float) -> float:
+        if self.n == 0:
+            return float("nan")
+        items, weights = self._weighted_items()
+        if len(self.levels) == 1:
+            # nothing compacted yet: exact, same linear interpolation as pandas
+            return float(np.quantile(items, q))
+        cumulative = np.cumsum(weights)
+        idx = int(np.searchsorted(cumulative, q * cumulative[-1], side="left"))
+        return float(items[min(idx, items.size - 1)])
+
+    def rank(self, value: float, inclusive: bool = False) -> float:
+        """Approximate number of items strictly below `value` (or <= when inclusive)."""
+        if self.n == 0:
+            return 0.0
+        items, weights = self._weighted_items()
+        side = "right" if inclusive else "left"
+        idx = int(np.searchsorted(items, value, side=side))
+        return float(weights[:idx].sum())
+
+    def rank_error(self) -> float:
+        """Normalized rank error of `quantile` / `rank` answers."""
+        return 0.0 if len(self.levels) == 1 else 1.7 / self.k
+
+    def histogram(self, bins: int = 30, range: tuple = None) -> tuple:
+        """
+        (counts, edges) of the sketched values, counts scaled to sum to `n`.
+        """
+        if self.n == 0:
+            return np.zeros(0), np.zeros(1)
+        items, weights = self._weighted_items()
+        return np.histogram(items, bins=bins, range=range, weights=weights)
+
+    def to_dict(self) -> dict:
+        return {
+            "k": self.k,
+            "seed": self.seed,
+            "n": self.n,
+            "levels": [items.tolist() for items in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "QuantileSketch":
+        # the compaction coin flips restart from the seed, answers keep the same error bound
+        sketch = cls(k=state["k"], seed=state.get("seed", 0) + state["n"])
+        sketch.n = state["n"]
+        sketch.levels = [np.asarray(items, dtype=float) for items in state["levels"]]
+        return sketch
+
+
+def _leading_zeros_64(x: np.ndarray) -> np.ndarray:
+    # 32-bit halves convert to float64 exactly, frexp's exponent is then the bit length
+    x = np.asarray(x, dtype=np.uint64)
+    _, high_bits = np.frexp((x >> np.uint64(32)).astype(np.float64))
+    _, low_bits = np.frexp((x & np.uint64(0xFFFFFFFF)).astype(np.float64))
+    return np.where(high_bits > 0, 32 - high_bits, 64 - low_bits).astype(np.uint8)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter over pandas' 64-bit value hashes.
+    Relative standard error is 1.04 / sqrt(2 ** p) (≈0.81% for p=14).
+    """
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if hashes.size == 0:
+            return self
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes << np.uint64(self.p)
+        rank = np.minimum(_leading_zeros_64(rest) + 1, 64 - self.p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def update(self, values: pd.Series) -> "HyperLogLog":
+        values = values.dropna()
+        return self.update_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> float:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return float(estimate)
+
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def to_dict(self) -> dict:
+        # registers of low-cardinality columns are mostly zeros and compress well
+        return {"p": self.p, "registers": zlib.compress(self.registers.tobytes(), 1), "compressed": True}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "HyperLogLog":
+        hll = cls(p=state["p"])
+        registers = state["registers"]
+        if state.get("compressed"):
+            registers = zlib.decompress(registers)
+        hll.registers = np.frombuffer(registers, dtype=np.uint8).copy()
+        return hll
+
+
+class HeavyHitters:
+    """
+    Misra-Gries frequent items summary with `k` counters.
+    Every reported count underestimates the true count by at most `error_bound()`.
+    """
+
+    def __init__(self, k: int = 100):
+        self.k = k
+        self.n = 0
+        self.counters = {}
+
+    def _absorb(self, counts: pd.Series):
+        # add exact counts of a batch, then keep the k largest counters minus the (k+1)-th count
+        counts = counts[counts > 0]
+        if self.counters:
+            counts = counts.add(pd.Series(self.counters, dtype="int64"), fill_value=0)
+        if len(counts) > self.k:
+            cut = counts.nlargest(self.k + 1).iloc[-1]
+            counts = counts[counts > cut] - cut
+        self.counters = {key: int(count) for key, count in counts.items()}
+
+    def update(self, values: pd.Series) -> "HeavyHitters":
+        counts = values.value_counts(dropna=True)
+        counts.index = counts.index.astype(object)
+        return self.update_counts(counts)
+
+    def update_counts(self, counts: pd.Series) -> "HeavyHitters":
+        """
+        Add the exact counts (item -> count) of a batch that was aggregated elsewhere.
+        """
+        self.n += int(counts.sum())
+        self._absorb(counts)
+        return self
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        self.n += other.n
+        self._absorb(pd.Series(other.counters, dtype="int64"))
+        return self
+
+    def top(self, n: int = None) -> list:
+        items = sorted(self.counters.items(), key=lambda kv: kv[1], reverse=True)
+        return items if n is None else items[:n]
+
+    def error_bound(self) -> float:
+        return (self.n - sum(self.counters.values())) / (self.k + 1)
+
+    def to_dict(self) -> dict:
+        # (key, count) pairs: category values are not valid document keys
+        return {
+            "k": self.k,
+            "n": self.n,
+            "counters": [
+                [key if isinstance(key, (str, int, float, bool)) else str(key), count]
+                for key, count in self.counters.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "HeavyHitters":
+        hitters = cls(k=state["k"])
+        hitters.n = state["n"]
+        hitters.counters = {key: count for key, count in state["counters"]}
+        return hitters
+
+
+class CoMoments:
+    """
+    Mergeable sufficient statistics of pairwise-complete Pearson correlations.
+
+    For every pair of columns (i, j) keeps, over the rows where both are present, the row
+    count and the sums of x_i, x_i² and x_i·x_j. Values are shifted by the first batch's
+    means so the sums stay well conditioned. `corr()` matches `DataFrame.corr()`.
+    """
+
+    def __init__(self, columns: list):
+        k = len(columns)
+        self.columns = list(columns)
+        self.shift = None
+        self.n = np.zeros((k, k))
+        # sx[i, j]: sum of column i over the rows where column j is present too
+        self.sx = np.zeros((k, k))
+        self.sxx = np.zeros((k, k))
+        self.sxy = np.zeros((k, k))
+
+    def update(self, X) -> "CoMoments":
+        """
+        Add the rows of a float matrix with one column per `columns` entry (NaN = missing).
+        """
+        X = np.asarray(X, dtype=float)
+        if X.shape[0] == 0:
+            return self
+        valid = ~np.isnan(X)
+        if self.shift is None:
+            counts = valid.sum(axis=0)
+            sums = np.where(valid, X, 0.0).sum(axis=0)
+            self.shift = np.divide(sums, counts, out=np.zeros(len(self.columns)), where=counts > 0)
+
+        shifted = np.where(valid, X - self.shift, 0.0)
+        present = valid.astype(float)
+        self.n += present.T @ present
+        self.sx += shifted.T @ present
+        self.sxx += (shifted * shifted).T @ present
+        self.sxy += shifted.T @ shifted
+        return self
+
+    def merge(self, other: "CoMoments") -> "CoMoments":
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.__dict__.update({k: (v.copy() if isinstance(v, np.ndarray) else v) for k, v in other.__dict__.items()})
+            return self
+
+        # move the other sums to this shift: x -> x + d
+        d = other.shift - self.shift
+        di, dj = d[:, None], d[None, :]
+        sx = other.sx + di * other.n
+        self.sxx += other.sxx + 2 * di * other.sx + di * di * other.n
+        self.sxy += other.sxy + dj * other.sx + di * other.sx.T + di * dj * other.n
+        self.sx += sx
+        self.n += other.n
+        return self
+
+    def corr(self) -> np.ndarray:
+        """
+        Correlation matrix, NaN where a pair has fewer than two rows or no variance.
+        """
+        sy = self.sx.T
+        syy = self.sxx.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = self.n * self.sxy - self.sx * sy
+            var_x = self.n * self.sxx - self.sx * self.sx
+            var_y = self.n * syy - sy * sy
+            r = cov / np.sqrt(var_x * var_y)
+        r[(self.n < 2) | ~np.isfinite(r)] = np.nan
+        np.fill_diagonal(r, np.where(np.diag(self.n) >= 2, 1.0, np.nan))
+        return np.clip(r, -1.0, 1.0)
+
+    def to_dict(self) -> dict:
+        # packed float64 bytes: nested lists of doubles make BSON documents several times larger;
+        # n and sxy are symmetric, so only their upper triangle is kept
+        upper = np.triu_indices(len(self.columns))
+        return {
+            "columns": list(self.columns),
+            "shift": None if self.shift is None else self.shift.tobytes(),
+            "n": self.n[upper].tobytes(),
+            "sx": self.sx.tobytes(),
+            "sxx": self.sxx.tobytes(),
+            "sxy": self.sxy[upper].tobytes(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "CoMoments":
+        comoments = cls(state["columns"])
+        k = len(comoments.columns)
+        upper = np.triu_indices(k)
+        if state["shift"] is not None:
+            comoments.shift = np.frombuffer(state["shift"], dtype=float).copy()
+        for name in ("sx", "sxx"):
+            setattr(comoments, name, np.frombuffer(state[name], dtype=float).reshape(k, k).copy())
+        for name in ("n", "sxy"):
+            matrix = np.zeros((k, k))
+            matrix[upper] = np.frombuffer(state[name], dtype=float)
+            setattr(comoments, name, matrix + np.triu(matrix, 1).T)
+        return comoments
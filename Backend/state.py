@@ -1,13 +1,17 @@
-from typing import TypedDict, List, Optional
+from typing import TypedDict, List, Optional, Annotated
+import operator
 import pandas as pd
 from pydantic import BaseModel
+from Backend.profile import ColumnProfile
 
 class DataState(TypedDict):
+    run_id: Optional[str]
     dataset_path: Optional[str]
     data: Optional[pd.DataFrame]
+    profile: Optional[ColumnProfile]
 
 class SummaryState(DataState):
-    graph_file_path: List[dict]
+    graph_file_path: Annotated[List[dict], operator.add]
     data_overview: dict
     data_quality_overview: dict
     data_stat_overview : dict
@@ -1,77 +1,309 @@
 import os
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
-from pymongo import MongoClient
+import re
 
-import tempfile
-import plotly.io as pio
+import gzip
+import time
+import uuid
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from Backend.rendering import render_figure, render_figure_json
+from Backend.db import get_collection, PROJECTIONS
+from Backend.artifact_store import ARTIFACT_STORE, PUBLIC_BASE_URL
+from Backend.telemetry import FIGURE_RENDER, FIGURE_UPLOAD, FIGURE_BYTES
 from datetime import datetime
+from urllib.parse import quote
 
-if os.getenv("RAILWAY_ENVIRONMENT") is None:
-    from dotenv import load_dotenv
-    load_dotenv()
+PLOT_FOLDER = "eda_outputs/plots"
+# json: gzip Plotly specs rendered by the frontend (PNG on demand), png: rasterize during the run
+FIGURE_FORMAT = os.getenv("FIGURE_FORMAT", "json").lower()
+SPEC_FORMAT = "json.gz"
+# run-independent stand-in for a figure URL in LLM prompts (see `figure_references`)
+FIGURE_REFERENCE = "figure://"
+# `{plot}_v{version}_{attempt}`: figures redrawn by an append
+_VERSIONED_SUFFIX = re.compile(r"_v\d+_[0-9a-f]{8}$")
 
-client = MongoClient(os.environ["MONGO_URI"])
-collection = client[os.environ["DB_NAME"]][os.environ["COLLECTION_NAME"]]
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "8"))
+MAX_INFLIGHT_FIGURES = int(os.getenv("MAX_INFLIGHT_FIGURES", "32"))
+
+UPLOAD_EXECUTOR = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="figure-upload")
+INFLIGHT_FIGURES = threading.BoundedSemaphore(MAX_INFLIGHT_FIGURES)
+
+
+def _store(public_id: str, data: bytes, format: str, tags: list) -> dict:
+    start = time.perf_counter()
+    metadata = ARTIFACT_STORE.put(public_id, data, format=format, tags=tags)
+    FIGURE_UPLOAD.labels(backend=ARTIFACT_STORE.name).observe(time.perf_counter() - start)
+    FIGURE_BYTES.labels(format=format).observe(len(data))
+    return metadata
+
+
+def _upload_rendered(render_future: Future, public_id: str, format: str, tags: list) -> dict:
+    image = render_future.result()
+    return _store(public_id, image, format, tags)
+
+
+def figure_spec(fig) -> bytes:
+    """
+    Gzip-compressed Plotly JSON of a figure.
+    """
+    return gzip.compress(fig.to_json().encode("utf-8"), compresslevel=6)
+
+
+def png_url(spec_id: str) -> str:
+    return f"{PUBLIC_BASE_URL}/figures/png/{spec_id}"
+
+
+def _upload_spec(fig, public_id: str, tags: list) -> dict:
+    start = time.perf_counter()
+    spec = figure_spec(fig)
+    FIGURE_RENDER.labels(format=SPEC_FORMAT).observe(time.perf_counter() - start)
+    metadata = _store(public_id, spec, SPEC_FORMAT, tags)
+    metadata["png_url"] = png_url(metadata["public_id"])
+    return metadata
+
+
+def figure_public_id(plot_name: str, run_id: str = None, folder: str = PLOT_FOLDER) -> str:
+    """
+    `{folder}/{run_id}/{plot_name}` for run-scoped figures, otherwise a unique timestamped id.
+    """
+    if run_id:
+        return f"{folder}/{run_id}/{plot_name}"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{folder}/{plot_name}_{timestamp}_{uuid.uuid4().hex[:8]}"
+
+
+def versioned_plot_name(plot_name: str, version: int, attempt: str) -> str:
+    return f"{plot_name}_v{version}_{attempt}"
+
+
+def figure_name(public_id: str, format: str = None) -> str:
+    """
+    Plot name of a stored figure, without folder, run, append version or extension.
+    """
+    name = public_id
+    if _run_scoped(name):
+        name = name[len(PLOT_FOLDER) + 1:].split("/", 1)[1]
+    if format and name.endswith(f".{format}"):
+        name = name[:-len(format) - 1]
+    return _VERSIONED_SUFFIX.sub("", name)
+
+
+def submit_plotly_figure(
+    fig,
+    plot_name: str,
+    run_id: str = None,
+    folder: str = PLOT_FOLDER,
+    format: str = None
+) -> Future:
+    """
+    Uploads a Plotly figure to the artifact store (ARTIFACT_BACKEND) in the background.
+    With format "json" (FIGURE_FORMAT default) the gzip Plotly spec is stored and a PNG is
+    only rendered when `png_url` is requested; other formats are rendered on the warm render pool.
+    Figures of a run live under `{folder}/{run_id}/` and are tagged with the run_id.
+    Returns a Future of the stored metadata (url + public_id).
+    Blocks while MAX_INFLIGHT_FIGURES figures are still being rendered or uploaded.
+    """
+    format = format or FIGURE_FORMAT
+    public_id = figure_public_id(plot_name, run_id=run_id, folder=folder)
+    tags = [run_id] if run_id else []
+
+    INFLIGHT_FIGURES.acquire()
+    try:
+        if format == "json":
+            future = UPLOAD_EXECUTOR.submit(_upload_spec, fig, public_id, tags)
+        else:
+            render_future = render_figure(fig, format=format)
+            future = UPLOAD_EXECUTOR.submit(_upload_rendered, render_future, public_id, format, tags)
+    except Exception:
+        INFLIGHT_FIGURES.release()
+        raise
+    future.add_done_callback(lambda _: INFLIGHT_FIGURES.release())
+    return future
 
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
 
 def save_plotly_figure(
     fig,
     plot_name: str,
-    folder: str = "eda_outputs/plots",
-    format: str = "png"
+    run_id: str = None,
+    folder: str = PLOT_FOLDER,
+    format: str = None
 ) -> dict:
     """
-    Saves a Plotly figure to Cloudinary.
-    Returns Cloudinary metadata (url + public_id).
+    Saves a Plotly figure to the artifact store.
+    Returns the stored metadata (url + public_id).
     """
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    public_id = f"{folder}/{plot_name}_{timestamp}"
+    return submit_plotly_figure(fig, plot_name, run_id=run_id, folder=folder, format=format).result()
 
-    with tempfile.NamedTemporaryFile(suffix=f".{format}", delete=False) as tmp:
-        temp_path = tmp.name
-    pio.write_image(fig, temp_path, format=format)
 
-    response = cloudinary.uploader.upload(
-        temp_path,
-        public_id=public_id,
-        resource_type="image"
-    )
-    os.remove(temp_path)
+_PNG_LOCK = threading.Lock()
+_PNG_INFLIGHT = {}
 
-    return {
-        "url": response["secure_url"],
-        "public_id": response["public_id"],
-        "format": response["format"],
-        "bytes": response["bytes"]
-    }
 
-def delete_all_visual_outputs(run_id: str):
-    doc = collection.find_one({"run_id": run_id}, {"visual_outputs": 1})
-    if not doc or not doc.get("visual_outputs"):
-        return {"deleted": 0}
+def _run_tags(key: str) -> list:
+    # `{PLOT_FOLDER}/{run_id}/{plot_name}` -> [run_id]
+    parts = key[len(PLOT_FOLDER) + 1:].split("/") if key.startswith(f"{PLOT_FOLDER}/") else []
+    return parts[:1] if len(parts) > 1 else []
+
 
+def figure_png(spec_id: str) -> dict:
+    """
+    PNG metadata for a stored figure spec. Rendered on the first request and cached in
+    the artifact store next to the spec; concurrent first requests share one render.
+    Raises KeyError when the spec does not exist.
+    """
+    if not spec_id.endswith(f".{SPEC_FORMAT}"):
+        raise KeyError(spec_id)
+    key = spec_id[:-len(SPEC_FORMAT) - 1]
+
+    cached = ARTIFACT_STORE.info(key, "png")
+    if cached is not None:
+        return cached
+
+    with _PNG_LOCK:
+        future = _PNG_INFLIGHT.get(key)
+        leader = future is None
+        if leader:
+            future = _PNG_INFLIGHT[key] = Future()
+    if not leader:
+        return future.result()
+
+    try:
+        spec = ARTIFACT_STORE.get(key, SPEC_FORMAT)
+        if spec is None:
+            raise KeyError(spec_id)
+        image = render_figure_json(gzip.decompress(spec).decode("utf-8"), format="png").result()
+        metadata = _store(key, image, "png", _run_tags(key))
+        future.set_result(metadata)
+        return metadata
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _PNG_LOCK:
+            _PNG_INFLIGHT.pop(key, None)
+
+
+def _resolve(value):
+    if isinstance(value, Future):
+        try:
+            return value.result()
+        except Exception as e:
+            print(f"[WARN] figure upload failed → {e}")
+            return None
+    if isinstance(value, list):
+        return [v for v in (_resolve(i) for i in value) if v is not None]
+    return value
+
+
+def resolve_figures(visual_outputs: list) -> list:
+    """
+    Wait for pending figure futures in `graph_file_path` and replace them with their metadata.
+    Failed figures are dropped from lists and become None for single entries.
+    """
+    return [
+        {key: _resolve(value) for key, value in block.items()}
+        for block in visual_outputs
+    ]
+
+def _public_ids(visual_outputs: list) -> list:
     public_ids = []
-    for block in doc["visual_outputs"]:
+    for block in visual_outputs or []:
         for v in block.values():
             if isinstance(v, list):
-                public_ids.extend([i["public_id"] for i in v if "public_id" in i])
+                public_ids.extend([i["public_id"] for i in v if isinstance(i, dict) and "public_id" in i])
             elif isinstance(v, dict) and "public_id" in v:
                 public_ids.append(v["public_id"])
+    return public_ids
+
+
+def _run_scoped(public_id: str) -> bool:
+    # `{PLOT_FOLDER}/{run_id}/{plot}`, legacy timestamped ids sit directly in PLOT_FOLDER
+    return public_id.startswith(f"{PLOT_FOLDER}/") and "/" in public_id[len(PLOT_FOLDER) + 1:]
+
+
+def delete_run_artifacts(run_id: str, visual_outputs: list = None, artifacts_run_id: str = None) -> int:
+    """
+    Delete every figure of a run: one tag/prefix operation for run-scoped figures, then any
+    pre-migration (timestamped, not run-scoped) ids listed in `visual_outputs` in
+    provider-sized batches.
+    A run served from the result cache (`artifacts_run_id` = the source run) shares the source
+    run's figures: only the figures it stored itself, under its own prefix, are deleted.
+    Returns the number of deleted figures.
+    """
+    prefix = f"{PLOT_FOLDER}/{run_id}/"
+    deleted = ARTIFACT_STORE.delete_run(run_id, prefix)
+    if artifacts_run_id and artifacts_run_id != run_id:
+        return deleted
+    legacy_ids = [i for i in _public_ids(visual_outputs) if not _run_scoped(i)]
+    if legacy_ids:
+        deleted += ARTIFACT_STORE.delete(legacy_ids)
+    return deleted
+
+
+def discard_figures(outputs: list) -> int:
+    """
+    Best-effort delete of figures uploaded for an update that was not stored.
+    Returns the number of deleted figures.
+    """
+    public_ids = [o["public_id"] for o in outputs if isinstance(o, dict) and "public_id" in o]
+    if not public_ids:
+        return 0
+    try:
+        return ARTIFACT_STORE.delete(public_ids)
+    except Exception as e:
+        print(f"[WARN] discarding figures failed → {e}")
+        return 0
+
+
+def figure_references(visual_outputs: list) -> tuple:
+    """
+    `visual_outputs` for an LLM prompt: every figure's URLs replaced by `figure://<plot name>`
+    references, which are the same for every run of the same data, so the prompt can be
+    answered from the LLM cache. Returns (blocks, {reference: URL}) for `restore_figure_urls`.
+    """
+    urls = {}
+
+    def reference(figure):
+        if not isinstance(figure, dict) or "public_id" not in figure:
+            return figure
+        name = quote(figure_name(figure["public_id"], figure.get("format")))
+        stand_in = {"format": figure.get("format")}
+        for field, suffix in (("url", ""), ("png_url", ".png")):
+            if field in figure:
+                stand_in[field] = f"{FIGURE_REFERENCE}{name}{suffix}"
+                urls[stand_in[field]] = figure[field]
+        return stand_in
+
+    blocks = [
+        {key: [reference(v) for v in value] if isinstance(value, list) else reference(value)
+         for key, value in block.items()}
+        for block in visual_outputs or []
+    ]
+    return blocks, urls
+
+
+def restore_figure_urls(text: str, urls: dict) -> str:
+    """
+    Replace the figure references of an LLM answer with this run's URLs.
+    """
+    if not urls or not isinstance(text, str):
+        return text
+    # longest first: `figure://x.png` before `figure://x`
+    pattern = re.compile("|".join(re.escape(r) for r in sorted(urls, key=len, reverse=True)))
+    return pattern.sub(lambda match: urls[match.group(0)], text)
+
+
+def delete_all_visual_outputs(run_id: str):
+    collection = get_collection()
+    doc = collection.find_one({"run_id": run_id}, PROJECTIONS["visual_outputs"])
+    if not doc or not doc.get("visual_outputs"):
+        return {"deleted": 0}
 
-    if public_ids:
-        cloudinary.api.delete_resources(public_ids, resource_type="image")
+    deleted = delete_run_artifacts(run_id, doc["visual_outputs"], doc.get("artifacts_run_id"))
 
     collection.update_one(
         {"run_id": run_id},
         {"$set": {"visual_outputs": []}}
     )
 
-    return {"deleted": len(public_ids)}
\ No newline at end of file
+    return {"deleted": deleted, "digest": doc.get("digest")}
@@ -0,0 +1,313 @@
+import numpy as np
+import pandas as pd
+
+from Backend.sketches import RunningMoments, QuantileSketch, HyperLogLog, HeavyHitters
+from Backend.categories import CategoryCounts
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class StreamingProfiler:
+    """
+    Chunk-at-a-time dataset profiler built on mergeable sketches.
+
+    Memory depends on the number of columns and the sketch sizes, never on the number of rows.
+    Column kinds are fixed by the first chunk; later chunks are coerced to them.
+    """
+
+    def __init__(self, quantile_k: int = 200, hll_p: int = 14, heavy_hitters_k: int = 100):
+        self.quantile_k = quantile_k
+        self.hll_p = hll_p
+        self.heavy_hitters_k = heavy_hitters_k
+
+        self.num_rows = 0
+        self.columns = None
+        self.data_types = {}
+        self.numerical_columns = []
+        self.categorical_columns = []
+
+        self.null_counts = {}
+        self.moments = {}
+        self.quantiles = {}
+        self.distinct = {}
+        self.heavy_hitters = {}
+        self.row_distinct = HyperLogLog(p=hll_p)
+
+    def _init_columns(self, columns: list, data_types: dict, numerical_columns: list):
+        self.columns = list(columns)
+        self.data_types = dict(data_types)
+        self.numerical_columns = list(numerical_columns)
+        self.categorical_columns = [c for c in self.columns if c not in self.numerical_columns]
+
+        for col in self.columns:
+            self.null_counts[col] = 0
+            self.distinct[col] = HyperLogLog(p=self.hll_p)
+        for col in self.numerical_columns:
+            self.moments[col] = RunningMoments()
+            self.quantiles[col] = QuantileSketch(k=self.quantile_k)
+        for col in self.categorical_columns:
+            self.heavy_hitters[col] = HeavyHitters(k=self.heavy_hitters_k)
+
+    def update(self, chunk: pd.DataFrame) -> "StreamingProfiler":
+        if self.columns is None:
+            self._init_columns(
+                chunk.columns.tolist(),
+                chunk.dtypes.astype(str).to_dict(),
+                chunk.select_dtypes(include="number").columns.tolist(),
+            )
+
+        self.num_rows += int(chunk.shape[0])
+        self.row_distinct.update_hashes(
+            pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        )
+
+        for col in self.columns:
+            series = chunk[col]
+            if col in self.moments:
+                series = pd.to_numeric(series, errors="coerce")
+                values = series.to_numpy(dtype=float, na_value=np.nan)
+                self.moments[col].update(values)
+                self.quantiles[col].update(values)
+            else:
+                self.heavy_hitters[col].update(series)
+            self.null_counts[col] += int(series.isna().sum())
+            self.distinct[col].update(series)
+        return self
+
+    def merge(self, other: "StreamingProfiler") -> "StreamingProfiler":
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self._init_columns(other.columns, other.data_types, other.numerical_columns)
+
+        self.num_rows += other.num_rows
+        self.row_distinct.merge(other.row_distinct)
+        for col in self.columns:
+            self.null_counts[col] += other.null_counts[col]
+            self.distinct[col].merge(other.distinct[col])
+        for col in self.numerical_columns:
+            self.moments[col].merge(other.moments[col])
+            self.quantiles[col].merge(other.quantiles[col])
+        for col in self.categorical_columns:
+            self.heavy_hitters[col].merge(other.heavy_hitters[col])
+        return self
+
+    def to_dict(self) -> dict:
+        """
+        Plain (document-storable) state; `from_dict` restores a profiler that keeps merging.
+        """
+        return {
+            "quantile_k": self.quantile_k,
+            "hll_p": self.hll_p,
+            "heavy_hitters_k": self.heavy_hitters_k,
+            "num_rows": self.num_rows,
+            "columns": self.columns,
+            "numerical_columns": self.numerical_columns,
+            # per-column maps as (column, state) pairs: column names are not always valid keys
+            "data_types": list(self.data_types.items()),
+            "null_counts": list(self.null_counts.items()),
+            "moments": [(col, m.to_dict()) for col, m in self.moments.items()],
+            "quantiles": [(col, q.to_dict()) for col, q in self.quantiles.items()],
+            "distinct": [(col, d.to_dict()) for col, d in self.distinct.items()],
+            "heavy_hitters": [(col, h.to_dict()) for col, h in self.heavy_hitters.items()],
+            "row_distinct": self.row_distinct.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "StreamingProfiler":
+        profiler = cls(
+            quantile_k=state["quantile_k"], hll_p=state["hll_p"], heavy_hitters_k=state["heavy_hitters_k"],
+        )
+        if state["columns"] is None:
+            return profiler
+        profiler._init_columns(state["columns"], state["data_types"], state["numerical_columns"])
+        profiler.num_rows = state["num_rows"]
+        profiler.null_counts = {col: count for col, count in state["null_counts"]}
+        profiler.moments = {col: RunningMoments.from_dict(m) for col, m in state["moments"]}
+        profiler.quantiles = {col: QuantileSketch.from_dict(q) for col, q in state["quantiles"]}
+        profiler.distinct = {col: HyperLogLog.from_dict(d) for col, d in state["distinct"]}
+        profiler.heavy_hitters = {col: HeavyHitters.from_dict(h) for col, h in state["heavy_hitters"]}
+        profiler.row_distinct = HyperLogLog.from_dict(state["row_distinct"])
+        return profiler
+
+    def column_profile(self) -> "SketchColumnProfile":
+        return SketchColumnProfile(self)
+
+    def overview(self) -> dict:
+        return {
+            "num_rows": self.num_rows,
+            "num_columns": len(self.columns or []),
+            "column_names": list(self.columns or []),
+            "data_types": dict(self.data_types),
+        }
+
+    def duplicated_rows(self) -> tuple:
+        """
+        (estimate, error bound) of the duplicated rows: rows minus the HyperLogLog count of
+        distinct rows. That difference is reported only beyond 3 standard errors of the count,
+        below it the sketch cannot tell duplicates from its own error and the estimate is 0.
+        """
+        n = self.num_rows
+        if not n:
+            return 0, 0
+        distinct = self.row_distinct.count()
+        bound = int(np.ceil(3 * self.row_distinct.relative_error() * distinct))
+        duplicated = int(round(n - distinct))
+        return (duplicated if duplicated > bound else 0), bound
+
+    def quality(self) -> dict:
+        n = self.num_rows
+        duplicated, bound = self.duplicated_rows()
+        return {
+            "missing_value": dict(self.null_counts),
+            "percentage_missing_data": {
+                col: (count / n * 100 if n else 0.0) for col, count in self.null_counts.items()
+            },
+            "duplicated_rows_estimate": duplicated,
+            "duplicated_rows_error_bound": bound,
+            "constant_columns": [
+                col for col in (self.columns or [])
+                if round(self.distinct[col].count()) <= 1
+            ],
+        }
+
+    def statistics(self) -> dict:
+        """
+        Same layout as `data_statistics`: {stat_name: {column: value}}.
+        """
+        stat = {name: {} for name in ["count", "mean", "std", "min", "25%", "50%", "75%", "max", "skewness", "kurtosis"]}
+        for col in self.numerical_columns:
+            moments = self.moments[col]
+            sketch = self.quantiles[col]
+            stat["count"][col] = float(moments.n)
+            stat["mean"][col] = moments.mean if moments.n else float("nan")
+            stat["std"][col] = moments.std()
+            stat["min"][col] = moments.min if moments.n else float("nan")
+            stat["25%"][col] = sketch.quantile(0.25)
+            stat["50%"][col] = sketch.quantile(0.50)
+            stat["75%"][col] = sketch.quantile(0.75)
+            stat["max"][col] = moments.max if moments.n else float("nan")
+            stat["skewness"][col] = moments.skew()
+            stat["kurtosis"][col] = moments.kurt()
+        return stat
+
+    def outliers(self) -> tuple:
+        """
+        IQR outlier report from the quantile sketches, same shape as `data_outlier`.
+        Counts are estimated from sketch ranks.
+        """
+        outlier_report = {}
+        columns_with_anomalies = []
+        for col in self.numerical_columns:
+            sketch = self.quantiles[col]
+            if sketch.n == 0:
+                continue
+            q1 = sketch.quantile(0.25)
+            q3 = sketch.quantile(0.75)
+            iqr = q3 - q1
+            lower = q1 - 1.5 * iqr
+            upper = q3 + 1.5 * iqr
+            below = sketch.rank(lower)
+            above = sketch.n - sketch.rank(upper, inclusive=True)
+            count = int(round(below + above))
+            has_outliers = count > 0
+
+            outlier_report[col] = {
+                "iqr_lower": lower,
+                "iqr_upper": upper,
+                "iqr_outliers": count,
+                "iqr_percent": round(count / sketch.n * 100, 2),
+                "has_outliers": has_outliers,
+            }
+            if has_outliers:
+                columns_with_anomalies.append(col)
+        return outlier_report, columns_with_anomalies
+
+    def categorical(self, top_k: int = 20) -> dict:
+        result = {}
+        for col in self.categorical_columns:
+            hitters = self.heavy_hitters[col]
+            result[col] = {
+                "top_values": {str(k): v for k, v in hitters.top(top_k)},
+                "distinct_estimate": int(round(self.distinct[col].count())),
+            }
+        return result
+
+    def error_bounds(self) -> dict:
+        return {
+            "moments": "exact",
+            "quantile_rank_error": max(
+                (s.rank_error() for s in self.quantiles.values()), default=0.0
+            ),
+            "iqr_outlier_count_error": {
+                col: round(s.rank_error() * s.n * 2, 2) for col, s in self.quantiles.items()
+            },
+            "distinct_relative_error": self.row_distinct.relative_error(),
+            "duplicated_rows_error": self.duplicated_rows()[1],
+            "heavy_hitter_count_error": {
+                col: round(h.error_bound(), 2) for col, h in self.heavy_hitters.items()
+            },
+        }
+
+    def report(self) -> dict:
+        outlier_report, anomaly_columns = self.outliers()
+        return {
+            "data_overview": self.overview(),
+            "data_quality_overview": self.quality(),
+            "data_stat_overview": self.statistics(),
+            "categorical_analysis_overview": self.categorical(),
+            "data_outlier_overview": [outlier_report, anomaly_columns],
+            "error_bounds": self.error_bounds(),
+        }
+
+
+class SketchColumnProfile:
+    """
+    ColumnProfile view of a StreamingProfiler for the tools_functions helpers that only read
+    the profile (statistics, categorical analysis, column ranking). There are no null masks.
+    Distinct counts are HyperLogLog estimates; category counts come from the heavy hitters, so
+    they are exact while a column has at most `heavy_hitters_k` distinct values.
+    """
+
+    def __init__(self, profiler: StreamingProfiler):
+        columns = list(profiler.columns or [])
+        self.num_rows = profiler.num_rows
+
+        self.numerical_columns = list(profiler.numerical_columns)
+        self.categorical_bool_columns = list(profiler.categorical_columns)
+        self.categorical_columns = [
+            c for c in self.categorical_bool_columns if profiler.data_types.get(c) != "bool"
+        ]
+
+        self.null_counts = pd.Series(
+            [profiler.null_counts[c] for c in columns], index=columns, dtype="int64"
+        )
+        self.null_fraction = self.null_counts / self.num_rows if self.num_rows else self.null_counts.astype(float)
+        self.distinct_counts = pd.Series(
+            [int(round(profiler.distinct[c].count())) for c in columns], index=columns, dtype="int64"
+        )
+
+        stat = pd.DataFrame(profiler.statistics()) if self.numerical_columns else pd.DataFrame()
+        self.describe = stat.drop(columns=["skewness", "kurtosis"], errors="ignore")
+        self.var = stat["std"] ** 2 if len(stat) else pd.Series(dtype=float)
+        self.skew = stat["skewness"] if len(stat) else pd.Series(dtype=float)
+        self.kurt = stat["kurtosis"] if len(stat) else pd.Series(dtype=float)
+
+        self.categories = {}
+        for col in self.categorical_bool_columns:
+            counts = profiler.heavy_hitters[col].top()
+            self.categories[col] = CategoryCounts(
+                pd.Index([k for k, _ in counts], dtype=object),
+                np.array([c for _, c in counts], dtype=np.int64),
+                null_count=profiler.null_counts[col],
+            )
+
+
+def profile_csv_stream(source, chunksize: int = DEFAULT_CHUNKSIZE, **read_csv_kwargs) -> StreamingProfiler:
+    """
+    Profile a CSV path or file object chunk by chunk without loading it into memory.
+    """
+    profiler = StreamingProfiler()
+    for chunk in pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs):
+        profiler.update(chunk)
+    return profiler
@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import functools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+try:
+    from opentelemetry import trace as otel_trace
+    TRACER = otel_trace.get_tracer("datamind")
+except ImportError:
+    TRACER = None
+
+TRACE_MAX_RUNS = int(os.getenv("TRACE_MAX_RUNS", "200"))
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+BYTES_BUCKETS = (1e3, 5e3, 2e4, 1e5, 5e5, 2e6, 1e7)
+
+NODE_DURATION = Histogram(
+    "datamind_node_duration_seconds", "Duration of each LangGraph node", ["node", "status"],
+    buckets=SECONDS_BUCKETS,
+)
+RUN_DURATION = Histogram(
+    "datamind_run_duration_seconds", "Duration of a whole EDA run", ["status"],
+    buckets=SECONDS_BUCKETS,
+)
+LLM_LATENCY = Histogram(
+    "datamind_llm_latency_seconds", "Latency of each LLM call", ["model", "status"],
+    buckets=SECONDS_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "datamind_llm_tokens_total", "LLM tokens by model and direction (input / output)", ["model", "direction"],
+)
+LLM_FALLBACKS = Counter(
+    "datamind_llm_fallbacks_total", "LLM calls that failed over to the next model", ["model"],
+)
+LLM_HEDGES = Counter(
+    "datamind_llm_hedges_total", "Hedge requests started after a model's p95 latency", ["model"],
+)
+LLM_COOLDOWNS = Counter(
+    "datamind_llm_cooldowns_total", "Circuit breakers opened (model put in cooldown)", ["model"],
+)
+CACHE_LOOKUPS = Counter(
+    "datamind_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"],
+)
+FIGURE_RENDER = Histogram(
+    "datamind_figure_render_seconds", "Time to render / serialize a figure", ["format"],
+    buckets=SECONDS_BUCKETS,
+)
+FIGURE_UPLOAD = Histogram(
+    "datamind_figure_upload_seconds", "Time to store a figure in the artifact store", ["backend"],
+    buckets=SECONDS_BUCKETS,
+)
+FIGURE_BYTES = Histogram(
+    "datamind_figure_bytes", "Size of stored figures", ["format"],
+    buckets=BYTES_BUCKETS,
+)
+
+_TRACES = OrderedDict()
+_TRACES_LOCK = threading.Lock()
+
+
+def metrics_payload() -> tuple:
+    """
+    (body, content type) of the Prometheus exposition.
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def _record_span(run_id: str, span: dict):
+    with _TRACES_LOCK:
+        spans = _TRACES.setdefault(run_id, [])
+        _TRACES.move_to_end(run_id)
+        spans.append(span)
+        while len(_TRACES) > TRACE_MAX_RUNS:
+            _TRACES.popitem(last=False)
+
+
+def get_trace(run_id: str) -> list:
+    """
+    Spans recorded in this process for a run, in completion order.
+    """
+    with _TRACES_LOCK:
+        return list(_TRACES.get(run_id, []))
+
+
+@contextmanager
+def span(name: str, run_id: str = None, **attributes):
+    """
+    Trace span: recorded in-process under `run_id` and exported through OpenTelemetry when it
+    is installed. Yields the attribute dict, so attributes can be added while the span runs.
+    """
+    attributes = {k: v for k, v in attributes.items() if v is not None}
+    if run_id:
+        attributes["run_id"] = run_id
+    started_at = time.time()
+    start = time.perf_counter()
+    status = "ok"
+    otel_span = TRACER.start_as_current_span(name) if TRACER is not None else None
+    active = otel_span.__enter__() if otel_span is not None else None
+    try:
+        yield attributes
+    except BaseException as e:
+        status = "error"
+        attributes["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        if active is not None:
+            for key, value in attributes.items():
+                active.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+            # marks the OpenTelemetry span as failed when an exception is propagating
+            otel_span.__exit__(*sys.exc_info())
+        if run_id:
+            _record_span(run_id, {
+                "name": name,
+                "started_at": started_at,
+                "duration_ms": round(duration * 1000, 3),
+                "status": status,
+                "attributes": attributes,
+            })
+
+
+def instrument_node(name: str, node):
+    """
+    Wrap a LangGraph node so each call is timed into NODE_DURATION and traced under the
+    state's run_id.
+    """
+    @functools.wraps(node)
+    def wrapper(state):
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            with span(f"node.{name}", run_id=state.get("run_id"), node=name):
+                return node(state)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            NODE_DURATION.labels(node=name, status=status).observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+def record_llm_call(model: str, seconds: float, response=None, error: Exception = None):
+    LLM_LATENCY.labels(model=model, status="error" if error is not None else "ok").observe(seconds)
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage.get("input_tokens"):
+        LLM_TOKENS.labels(model=model, direction="input").inc(usage["input_tokens"])
+    if usage.get("output_tokens"):
+        LLM_TOKENS.labels(model=model, direction="output").inc(usage["output_tokens"])
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
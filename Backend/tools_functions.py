@@ -1,8 +1,11 @@
+import time
 import numpy as np
 import pandas as pd
 import plotly as plt
 from statsmodels.stats.outliers_influence import variance_inflation_factor
 from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
+from Backend.profile import ColumnProfile, build_column_profile
+from Backend.missingness import nullity_patterns, co_missingness
 
 def data_overview(df:pd.DataFrame) -> dict:
     """
@@ -22,102 +25,107 @@ def data_overview(df:pd.DataFrame) -> dict:
 
     return overview
 
-def data_quality(df:pd.DataFrame) -> dict:
+def data_quality(df:pd.DataFrame, profile:ColumnProfile = None) -> dict:
     """
     Performs data quality checks:
     - Missing values
     - Duplicate rows
     - Constant / near-constant columns
+    - Nullity patterns and co-missingness (from the packed null masks)
 
     Returns a JSON-serializable dictionary.
     """
     # low_variance_columns = []
+    profile = profile or build_column_profile(df)
 
     quality = {
-        "missing_value" : df.isnull().sum(),
-        "percentage_missing_data" : df.isnull().mean() * 100,
-        "duplicated_rows" : df[df.duplicated()].shape[0],
-        "constant_columns" : [col for col in df.columns if df[col].nunique()<=1]
+        "missing_value" : profile.null_counts,
+        "percentage_missing_data" : profile.null_fraction * 100,
+        "duplicated_rows" : int(df.duplicated().sum()),
+        "constant_columns" : [col for col in df.columns if profile.distinct_counts[col]<=1]
     }
+    if profile.null_counts.sum() > 0:
+        quality["nullity_patterns"] = nullity_patterns(profile.null_masks)
+        quality["co_missingness"] = co_missingness(profile.null_masks).to_dict()
     return quality
 
-def data_statistics(df:pd.DataFrame) -> dict:
+def data_statistics(df:pd.DataFrame, profile:ColumnProfile = None) -> dict:
     """
     Compute descriptive statistics for numerical columns, including skewness and kurtosis.
     (mean, std, quartiles, min, max)
     """
-    df_num = df.select_dtypes(include="number")
-    stat = df_num.describe().T
-    stat["skewness"] = df_num.skew()
-    stat["kurtosis"] = df_num.kurt()
+    profile = profile or build_column_profile(df)
+    stat = profile.describe.copy()
+    stat["skewness"] = profile.skew
+    stat["kurtosis"] = profile.kurt
     return stat.to_dict()
 
-def get_important_numerical_columns(df, top_k=5):
+def get_important_numerical_columns(df, top_k=5, profile:ColumnProfile = None):
     """
     Select top-k important numerical features using variance, skewness, kurtosis, and missing values.
     """
-    num_df = df.select_dtypes(include="number")
-    n = len(num_df)
+    profile = profile or build_column_profile(df)
+    num_cols = profile.numerical_columns
+    n = profile.num_rows
     score = (
-        num_df.var().rank(ascending=False) +
-        num_df.skew().abs().rank(ascending=False) +
-        num_df.kurt().abs().rank(ascending=False) +
-        num_df.isnull().mean().rank(ascending=False)
+        profile.var.rank(ascending=False) +
+        profile.skew.abs().rank(ascending=False) +
+        profile.kurt.abs().rank(ascending=False) +
+        profile.null_fraction[num_cols].rank(ascending=False)
     )
-    id_like = num_df.nunique() / n > 0.9
+    id_like = profile.distinct_counts[num_cols] / n > 0.9
     score = score[~id_like]
     return score.sort_values().head(top_k).index.tolist()
 
 
-def data_categorical(df : pd.DataFrame, rare_threshold: float = 0.05) -> dict:
+def data_categorical(df : pd.DataFrame, rare_threshold: float = 0.05, profile:ColumnProfile = None) -> dict:
     """
     Analyze categorical features for cardinality, rare categories, and encoding recommendations.
+    Category counts are capped at the CATEGORY_TOP_K most frequent plus an "other" bucket.
     """
-    cat_df = df.select_dtypes(include=["object", "category"]).columns
+    profile = profile or build_column_profile(df)
     result = {}
-    for cat in cat_df :
+    for cat in profile.categorical_columns :
         cardinality = {}
-        unique = df[cat].value_counts(dropna=False)
-        cardinality.update({cat : df[cat].nunique()})
+        counts = profile.categories[cat]
+        n_unique = int(profile.distinct_counts[cat])
+        cardinality.update({cat : n_unique})
 
-        percentages = round((unique / len(df)) * 100, 2)
-        rare_categories = percentages[percentages < (rare_threshold * 100)].index.tolist()
+        rare = counts.rare(rare_threshold, num_rows=profile.num_rows, decimals=2)
 
-        if df[cat].nunique() <= 5:
+        if n_unique <= 5:
             encoding = "One-Hot Encoding"
-        elif df[cat].nunique() <= 20:
+        elif n_unique <= 20:
             encoding = "Target / Frequency Encoding"
         else:
             encoding = "Hashing / Embeddings (High Cardinality)"
 
         result[cat] = {
-            "unique_values_in_column":unique,
+            "unique_values_in_column":counts.top(),
             "Cardinality":cardinality,
-            "rare_categories":rare_categories,
+            "rare_categories":counts.labels_of(rare),
+            "rare_category_count":int(len(rare)),
             "possible_encoding":encoding,
         }
     
     return result
 
-def analyze_categorical_columns(df: pd.DataFrame,top_k: int = 5,rare_threshold: float = 0.05):
+def analyze_categorical_columns(df: pd.DataFrame,top_k: int = 5,rare_threshold: float = 0.05, profile:ColumnProfile = None):
     """
     Rank categorical columns by importance using cardinality, rarity, and dominance metrics.
     """
-    categorical_cols = df.select_dtypes(
-        include=["object", "category", "bool"]
-    ).columns
+    profile = profile or build_column_profile(df)
 
     results = []
 
-    for col in categorical_cols:
-        value_counts = df[col].value_counts(dropna=False)
-        total = value_counts.sum()
-        cardinality = len(value_counts)
+    for col in profile.categorical_bool_columns:
+        counts = profile.categories[col]
+        cardinality = counts.num_entries
 
         if cardinality < 2:
             continue
-        rare_count = (value_counts / total < rare_threshold).sum()
-        dominance = value_counts.iloc[0] / total
+        rare_count = len(counts.rare(rare_threshold))
+        dominance = counts.dominance()
         score = (cardinality * 1.0 +rare_count * 2.0 -dominance * 3.0)
 
         results.append({
@@ -126,64 +134,277 @@ def analyze_categorical_columns(df: pd.DataFrame,top_k: int = 5,rare_threshold:
             "rare_categories": rare_count,
             "dominant_ratio": round(dominance, 3),
             "importance_score": round(score, 2),
-            "value_counts": value_counts
+            "value_counts": counts.top()
         })
 
     results = sorted(results,key=lambda x: x["importance_score"],reverse=True)[:top_k]
     return results
 
-def data_outlier(df : pd.DataFrame) -> tuple:
+def _quantile_sorted(v: np.ndarray, q: float) -> float:
+    # linear interpolation, same as np.percentile / Series.quantile
+    pos = q * (len(v) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(v) - 1)
+    return float(v[lo] + (v[hi] - v[lo]) * (pos - lo))
+
+
+def _kth_deviation(v: np.ndarray, split: int, center: float, k: int) -> float:
+    """
+    k-th smallest (0-based) of |v - center| for sorted v, without building the deviations:
+    below `split` they ascend leftwards, from `split` on they ascend rightwards, so this is
+    the k-th element of two sorted sequences (binary search on how many come from the left).
+    """
+    n_left, n_right = split, len(v) - split
+
+    def left(i):
+        return center - v[split - 1 - i]
+
+    def right(j):
+        return v[split + j] - center
+
+    lo, hi = max(0, k + 1 - n_right), min(k + 1, n_left)
+    while lo < hi:
+        i = (lo + hi) // 2
+        j = k + 1 - i
+        if j > 0 and right(j - 1) > left(i):
+            lo = i + 1
+        else:
+            hi = i
+    i, j = lo, k + 1 - lo
+    return float(max(left(i - 1) if i > 0 else -np.inf, right(j - 1) if j > 0 else -np.inf))
+
+
+def _count_outside(v: np.ndarray, lower: float, upper: float) -> int:
+    # values of sorted v strictly below `lower` or strictly above `upper`
+    return int(np.searchsorted(v, lower, side="left") + len(v) - np.searchsorted(v, upper, side="right"))
+
+
+def _outlier_column(x: np.ndarray, z_thresholds: tuple, mad_threshold: float, top_k: int) -> dict:
+    """
+    IQR / z-score / MAD outlier metrics of one float column (NaN = missing).
+
+    The column is sorted once: quartiles, median and MAD are read from the sorted values and
+    every outlier count is two binary searches, so the sorted copy is the only column-sized
+    array kept.
+    """
+    missing = np.isnan(x)
+    v = x[~missing] if missing.any() else x.copy()
+    del missing
+    v.sort()
+    n = len(v)
+    if n == 0:
+        return {"count": 0}
+
+    q1, median, q3 = (_quantile_sorted(v, q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+    # MAD: median of |v - median|
+    split = int(np.searchsorted(v, median, side="left"))
+    mad = _kth_deviation(v, split, median, (n - 1) // 2)
+    if n % 2 == 0:
+        mad = (mad + _kth_deviation(v, split, median, n // 2)) / 2
+
+    mean = float(v.mean())
+    std = float(v.std(ddof=1)) if n > 1 else np.nan
+
+    mad_count = 0
+    if mad > 0:
+        reach = mad_threshold * mad / 0.6745
+        mad_count = _count_outside(v, median - reach, median + reach) if np.isfinite(reach) else 0
+
+    z_counts = {t: 0 for t in z_thresholds}
+    top = []
+    if std > 0:
+        for t in z_thresholds:
+            z_counts[t] = _count_outside(v, mean - t * std, mean + t * std)
+
+        # the most extreme rows are among the k smallest and the k largest values
+        k = min(top_k, n)
+        candidates = np.concatenate([v[:k], v[n - k:]])
+        chosen = candidates[np.argsort(-np.abs(candidates - mean), kind="stable")[:k]]
+        chosen = chosen[chosen != mean]
+        if len(chosen):
+            high, low = chosen[chosen > mean], chosen[chosen < mean]
+            hit = np.zeros(len(x), dtype=bool)
+            if len(high):
+                hit |= x >= high.min()
+            if len(low):
+                hit |= x <= low.max()
+            rows = np.flatnonzero(hit)
+            z = np.abs(x[rows] - mean) / std
+            order = np.argsort(-z, kind="stable")[:k]
+            top = [(int(rows[i]), float(z[i])) for i in order]
+
+    return {
+        "count": n, "lower": lower, "upper": upper,
+        "iqr_count": _count_outside(v, lower, upper),
+        "mad_count": mad_count, "z_counts": z_counts, "top": top,
+    }
+
+
+def data_outlier(
+    df : pd.DataFrame,
+    profile:ColumnProfile = None,
+    z_thresholds: tuple = (2, 3),
+    mad_threshold: float = 3.5,
+    top_k: int = 5,
+) -> tuple:
     """
     Outlier analysis function
 
     -calculate iqr
     - z scores
+    - robust (MAD) scores
     - has outlier or not
     - return outlier report and columns with anomalies
+
+    Each numerical column is sorted once and every metric is read from the sorted values;
+    only counts plus the `top_k` most extreme rows per column are returned.
     """
-    df_num = df.select_dtypes(include="number")
+    profile = profile or build_column_profile(df)
     outlier_report = {}
     columns_with_anomalies = []
 
-    for col in df_num.columns:
-        series = df_num[col].dropna()
-        if series.empty:
+    for col in profile.numerical_columns:
+        # a column of a 2-D block is a strided view: one contiguous copy keeps the passes cache-friendly
+        x = np.ascontiguousarray(df[col].to_numpy(dtype=float, na_value=np.nan))
+        res = _outlier_column(x, z_thresholds, mad_threshold, top_k)
+        n_valid = res["count"]
+        if n_valid == 0:
             continue
-        q1 = series.quantile(0.25)
-        q3 = series.quantile(0.75)
-        iqr = q3 - q1
-        lower = q1 - 1.5*iqr
-        upper = q3 + 1.5*iqr
-        mask = (series < lower) | (series > upper)
-
-        mean = series.mean()
-        std = series.std()
-        if std == 0:
-            z_scores = pd.Series([0]*len(series), index=series.index)
-        else:
-            z_scores = ((series - mean) / std).abs()
-        has_outliers = mask.sum() > 0
+        iqr_outliers = res["iqr_count"]
+        has_outliers = iqr_outliers > 0
 
         outlier_report[col] = {
-            "iqr_outliers": mask.sum(),
-            "iqr_percent": round((mask.sum() / len(series)) * 100, 2),
-            "zscore_outliers": z_scores,
+            "iqr_lower": res["lower"],
+            "iqr_upper": res["upper"],
+            "iqr_outliers": iqr_outliers,
+            "iqr_percent": round((iqr_outliers / n_valid) * 100, 2),
+            "zscore_outliers": res["z_counts"][max(z_thresholds)],
+            "zscore_outliers_by_threshold": {
+                str(t): res["z_counts"][t] for t in z_thresholds
+            },
+            "mad_outliers": res["mad_count"],
+            "top_offenders": [{
+                "index": df.index[i],
+                "value": float(x[i]),
+                "zscore": round(z, 3),
+            } for i, z in res["top"]],
             "has_outliers": has_outliers
         }
 
         if has_outliers:
             columns_with_anomalies.append(col)
-        
+
     return outlier_report,columns_with_anomalies
 
 
-def data_correlation(df: pd.DataFrame) -> dict:
+def _vif_status(vif_value: float) -> str:
+    return (
+        "Severe" if vif_value > 10 else
+        "High" if vif_value > 5 else
+        "Acceptable"
+    )
+
+
+def vif_entries(columns, vif_values) -> list:
+    entries = []
+    for col, vif_value in zip(columns, vif_values):
+        # inf (perfectly collinear) stays inf and is "Severe", undefined values become 0
+        if np.isnan(vif_value) or vif_value < 0:
+            vif_value = 0.0
+        entries.append({
+            "feature": col,
+            "vif": round(float(vif_value), 2),
+            "status": _vif_status(vif_value)
+        })
+    return entries
+
+
+def high_correlation_pairs(corr_matrix: pd.DataFrame, threshold: float = 0.8) -> list:
+    """
+    Column pairs whose absolute correlation is at least `threshold` (upper triangle only).
+    """
+    cols = corr_matrix.columns
+    values = corr_matrix.to_numpy()
+    rows_idx, cols_idx = np.nonzero(np.triu(np.abs(values) >= threshold, k=1))
+    return [
+        {
+            "feature_1": cols[i],
+            "feature_2": cols[j],
+            "correlation": round(float(values[i, j]), 3)
+        }
+        for i, j in zip(rows_idx, cols_idx)
+    ]
+
+
+def vif_from_correlation(R: np.ndarray, rtol: float = 1e-10) -> np.ndarray:
+    """
+    All VIFs at once: VIF_i is the i-th diagonal element of the inverse correlation matrix,
+    computed from the eigendecomposition of R.
+    When R is singular, the columns that load on its null space are exact linear combinations
+    of the others and get an infinite VIF. Columns without a valid correlation (zero variance)
+    get NaN.
+    """
+    R = np.asarray(R, dtype=float)
+    vif = np.full(R.shape[0], np.nan)
+    diag = np.diag(R)
+    ok = np.isfinite(diag) & (diag > 0)
+    if not ok.any():
+        return vif
+
+    sub = np.nan_to_num(R[np.ix_(ok, ok)], nan=0.0)
+    w, V = np.linalg.eigh(sub)
+    singular = w <= rtol * max(w[-1], 1.0)
+    values = (V[:, ~singular] ** 2 / w[~singular]).sum(axis=1)
+    if singular.any():
+        values[(V[:, singular] ** 2).sum(axis=1) > np.sqrt(rtol)] = np.inf
+    vif[ok] = values
+    return vif
+
+
+def _vif_closed_form(X: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        R = np.corrcoef(X, rowvar=False)
+    return vif_from_correlation(R)
+
+
+def _vif_ols(X: np.ndarray) -> np.ndarray:
+    """
+    One statsmodels OLS fit per column (slow, kept for comparison on small data).
+    """
+    values = []
+    for idx in range(X.shape[1]):
+        try:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values.append(variance_inflation_factor(X, idx))
+        except Exception:
+            values.append(0.0)
+    return np.asarray(values, dtype=float)
+
+
+def data_correlation(
+    df: pd.DataFrame,
+    profile:ColumnProfile = None,
+    threshold: float = 0.8,
+    method: str = "pearson",
+    spearman_sample: int = 100_000,
+    vif_method: str = "closed_form",
+) -> dict:
     """
     Safe correlation + VIF analysis.
     Never produces NaNs.
+
+    - method="spearman" ranks a random sample of at most `spearman_sample` rows
+    - vif_method="closed_form" reads every VIF off the inverse correlation matrix,
+      "ols" fits one statsmodels regression per column
+    - timings_ms reports how long each step took
     """
-    df_num = df.select_dtypes(include="number").copy()
-    df_num = df_num.loc[:, df_num.std(numeric_only=True) > 0]
+    profile = profile or build_column_profile(df)
+    timings = {}
+    valid_cols = profile.var[profile.var > 0].index
+    df_num = df[valid_cols]
     df_num = df_num.dropna(axis=1, how="all")
 
     if df_num.shape[1] < 2:
@@ -195,20 +416,24 @@ def data_correlation(df: pd.DataFrame) -> dict:
             "note": "Not enough valid numeric columns for correlation analysis"
         }
 
-    corr_matrix = df_num.corr().fillna(0)
-    threshold = 0.8
-    high_corr_features = []
-
-    cols = corr_matrix.columns
-    for i in range(len(cols)):
-        for j in range(i + 1, len(cols)):
-            corr_value = corr_matrix.iloc[i, j]
-            if abs(corr_value) >= threshold:
-                high_corr_features.append({
-                    "feature_1": cols[i],
-                    "feature_2": cols[j],
-                    "correlation": round(float(corr_value), 3)
-                })
+    start = time.perf_counter()
+    if method == "spearman":
+        sample = df_num
+        if len(df_num) > spearman_sample:
+            sample = df_num.sample(n=spearman_sample, random_state=0)
+        corr_matrix = sample.corr(method="spearman").fillna(0)
+    elif profile.null_counts[df_num.columns].sum() == 0:
+        # no missing values: one BLAS call instead of pandas' pairwise-complete loop
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.corrcoef(df_num.to_numpy(dtype=float), rowvar=False)
+        corr_matrix = pd.DataFrame(values, index=df_num.columns, columns=df_num.columns).fillna(0)
+    else:
+        corr_matrix = df_num.corr().fillna(0)
+    timings["correlation"] = round((time.perf_counter() - start) * 1000, 2)
+
+    start = time.perf_counter()
+    high_corr_features = high_correlation_pairs(corr_matrix, threshold)
+    timings["high_correlation_pairs"] = round((time.perf_counter() - start) * 1000, 2)
 
     redundant_features = list(
         set(pair["feature_2"] for pair in high_corr_features)
@@ -217,50 +442,37 @@ def data_correlation(df: pd.DataFrame) -> dict:
     vif_df = df_num.dropna()
 
     if vif_df.shape[1] < 2 or vif_df.shape[0] <= vif_df.shape[1]:
-        return [{"note": "VIF skipped (insufficient rows or columns)"}]
-
-    X = vif_df.values.astype(float)
-
-    for idx, col in enumerate(vif_df.columns):
-        try:
-            with np.errstate(divide='ignore', invalid='ignore'):
-                vif_value = variance_inflation_factor(X, idx)
-            if np.isnan(vif_value) or np.isinf(vif_value):
-                vif_value = 0.0
-
-        except Exception:
-            vif_value = 0.0
-
-        vif_factor.append({
-            "feature": col,
-            "vif": round(float(vif_value), 2),
-            "status": (
-                "Severe" if vif_value > 10 else
-                "High" if vif_value > 5 else
-                "Acceptable"
-            )
-        })
+        vif_factor = [{"note": "VIF skipped (insufficient rows or columns)"}]
+    else:
+        start = time.perf_counter()
+        X = vif_df.to_numpy(dtype=float)
+        vif_values = _vif_ols(X) if vif_method == "ols" else _vif_closed_form(X)
+        timings[f"vif_{vif_method}"] = round((time.perf_counter() - start) * 1000, 2)
+        vif_factor = vif_entries(vif_df.columns, vif_values)
 
     return {
         "correlation_matrix": corr_matrix,
         "high_correlation_features": high_corr_features,
         "redundant_features": redundant_features,
-        "VIF_factor": vif_factor
+        "VIF_factor": vif_factor,
+        "method": method,
+        "timings_ms": timings
     }
 
 
-def data_target_analysis(df: pd.DataFrame) -> dict:
+def data_target_analysis(df: pd.DataFrame, profile:ColumnProfile = None) -> dict:
     """
     Target column finding node
     Here we pass column name, datatype, unique values, missing percent of each column
     then return all the columns meta data in a dictionary format
     """
+    profile = profile or build_column_profile(df)
     metadata = []
     for col in df.columns:
         column_name = col
         data_type = df[col].dtype
-        unique_values = df[col].nunique()
-        missing_percent = round(df[col].isna().mean() * 100, 2)
+        unique_values = profile.distinct_counts[col]
+        missing_percent = round(profile.null_fraction[col] * 100, 2)
 
         metadata.append({
             "column_name":column_name,
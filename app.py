@@ -1,18 +1,26 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi import Body,Response, Cookie
-from fastapi.responses import JSONResponse
+from fastapi import Body,Response, Cookie, Request
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
-import os, shutil, uuid, time
-import pandas as pd
-import io
+import os, shutil, uuid, time, json, asyncio, hashlib, tempfile
 
 from Backend.state import ChatRequest
-from Backend.graph import eda_workflow
-from Backend.mongo import store_eda_data, delete_all_data
-from Backend.storage_graphs import delete_all_visual_outputs
+from Backend.jobs import submit_eda_job, submit_append_job, completed_job_from_cache, get_job, get_job_events, QueueFullError
+from Backend.incremental import ensure_state_indexes, run_state_columns
+from Backend.result_cache import get_cached_result, invalidate_cached_result
+from Backend.mongo import store_eda_data, delete_all_data_async, make_mongo_safe
+from Backend.db import ensure_indexes
+from Backend.lifecycle import run_expiry, start_reaper, stop_reaper
+from Backend.telemetry import metrics_payload, get_trace
+from Backend.ingest import UPLOAD_FORMATS, upload_format
+from typing import Optional
+from Backend.storage_graphs import delete_all_visual_outputs, figure_png
+from Backend.artifact_store import ARTIFACT_STORE, CONTENT_ENCODINGS, content_type_of, format_of
 from Backend.prompt import mongo_prompt,html_prompt
-from Backend.models import llm_groq_1,llm_google_2,llm_cohere
-from Backend.chat_nodes import chat_with_data
+from Backend.models import llm_groq_1,llm_google_2,llm_cohere, LLM_POOL, invoke_with_fallback
+from Backend.prompt import eda_insight_summary_prompt
+from Backend.streaming import profile_csv_stream, DEFAULT_CHUNKSIZE
+from Backend.chat_nodes import chat_with_data, stream_chat_with_data
 # from Backend.session_store import set_session
 
 app = FastAPI(title="DataMind EDA API", version="2.0")
@@ -25,62 +33,222 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# artifact keys are run-scoped and never rewritten
+ARTIFACT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@app.on_event("startup")
+def create_indexes():
+    try:
+        ensure_indexes()
+        ensure_state_indexes()
+    except Exception as e:
+        print(f"[WARN] MongoDB index creation failed → {e}")
+    start_reaper()
+
+
+@app.on_event("shutdown")
+def shutdown_reaper():
+    stop_reaper()
+
+
+async def spool_upload(file: UploadFile):
+    """
+    Copy an upload to a temporary file chunk by chunk while hashing it.
+    The file keeps the upload's extension so its reader can be picked from the path.
+    Returns (path, sha256 hex digest).
+    """
+    hasher = hashlib.sha256()
+    suffix = os.path.splitext(file.filename or "")[1].lower() or ".csv"
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            tmp.write(chunk)
+    return tmp.name, hasher.hexdigest()
+
+
 @app.post("/run-eda")
-async def run_eda(file: UploadFile = File(...),response: Response = None):
+async def run_eda(file: UploadFile = File(...),response: Response = None, columns: Optional[str] = None):
+    """
+    Queue an EDA run and return its job id right away.
+    Accepts CSV, Parquet, Feather and Arrow IPC files; `columns` (comma separated) limits
+    the analysis to those columns.
+    Poll GET /jobs/{job_id} or follow GET /jobs/{job_id}/events for per-node results.
+    Uploads whose content was analyzed before are answered from the result cache.
+    """
+    try:
+        if upload_format(file.filename or "") is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type, expected one of {sorted(UPLOAD_FORMATS)}"
+            )
+        selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+
+        path, digest = await spool_upload(file)
+        if selected:
+            # the same file analyzed on other columns is a different result
+            digest = hashlib.sha256(f"{digest}|{json.dumps(selected)}".encode()).hexdigest()
+
+        # Mongo lookups / writes run in a worker thread, off the event loop
+        cached = await asyncio.to_thread(get_cached_result, digest)
+        if cached is not None:
+            os.remove(path)
+            job = await asyncio.to_thread(completed_job_from_cache, file.filename, digest, cached)
+            return JSONResponse(
+                status_code=200,
+                content={
+                    "status": job["status"],
+                    "job_id": job["job_id"],
+                    **job["result"],
+                }
+            )
+
+        job = submit_eda_job(path, file.filename, digest, columns=selected)
+
+        return JSONResponse(
+            status_code=202,
+            content={
+                "status": job["status"],
+                "job_id": job["job_id"],
+                "run_id": job["run_id"],
+            }
+        )
+
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/runs/{run_id}/append")
+async def append_rows(run_id: str, file: UploadFile = File(...)):
+    """
+    Append the rows of an upload (same columns as the run) to an existing run and update its
+    results in place. Only the new rows are read: sections are recomputed from the run's stored
+    sketches and only the figures that changed are redrawn.
+    Returns a job id right away; follow GET /jobs/{job_id}/events for the changed sections.
+    """
+    try:
+        if upload_format(file.filename or "") is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type, expected one of {sorted(UPLOAD_FORMATS)}"
+            )
+        if await asyncio.to_thread(run_state_columns, run_id) is None:
+            raise HTTPException(status_code=404, detail="Run not found or it does not support appends")
+
+        path, _ = await spool_upload(file)
+        job = submit_append_job(run_id, path, file.filename)
+
+        return JSONResponse(
+            status_code=202,
+            content={
+                "status": job["status"],
+                "job_id": job["job_id"],
+                "run_id": run_id,
+            }
+        )
+
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Server-sent events: one event per finished LangGraph node, then `completed` or `failed`.
+    """
+    if get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        sent = 0
+        while True:
+            events, finished = get_job_events(job_id, start=sent)
+            if events is None:
+                break
+            for event in events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+            sent += len(events)
+            if finished and not events:
+                break
+            if await request.is_disconnected():
+                break
+            await asyncio.sleep(0.2)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.post("/run-eda-stream")
+def run_eda_stream(file: UploadFile = File(...), chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    Streaming EDA for files larger than RAM.
+    The upload is read in chunks into mergeable sketches, so memory stays bounded
+    whatever the file size. No figures are produced in this mode and approximate
+    results are reported together with their error bounds.
+    """
     try:
         if not file.filename.lower().endswith(".csv"):
             raise HTTPException(status_code=400, detail="Only CSV files are supported")
 
         run_id = f"eda_{uuid.uuid4().hex[:10]}"
-        # session_id = f"session_{uuid.uuid4().hex[:10]}"
-        # set_session(session_id, run_id)
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-
-        initial_state = {
-            "data": df,
-
-            "graph_file_path": [],
-            "data_overview": {},
-            "data_quality_overview": {},
-            "data_stat_overview": {},
-            "categorical_analysis_overview": {},
-            "data_outlier_overview": [],
-            "data_correlation_overview": {},
-            "data_target_overview": {},
-            "eda_insight_summary": ""
-        }
+        file.file.seek(0)
+        report = profile_csv_stream(file.file, chunksize=chunksize).report()
 
-        final_state = eda_workflow.invoke(initial_state)
+        summary_prompt = eda_insight_summary_prompt.format(
+            data_overview=report["data_overview"],
+            data_quality=report["data_quality_overview"],
+            numerical_stats=report["data_stat_overview"],
+            categorical_analysis=report["categorical_analysis_overview"],
+            outlier_analysis=report["data_outlier_overview"],
+            correlation_analysis="Not computed in streaming mode",
+            target_analysis={},
+            visual_outputs=[],
+        )
+        summary = invoke_with_fallback(llms=LLM_POOL, messages=summary_prompt).content
 
         mongo_doc = {
-            "dataset_overview": final_state["data_overview"],
-            "data_quality": final_state["data_quality_overview"],
-            "numerical_statistics": final_state["data_stat_overview"],
-            "categorical_analysis": final_state["categorical_analysis_overview"],
-            "outlier_analysis": final_state["data_outlier_overview"],
-            "correlation_analysis": final_state["data_correlation_overview"],
-            "target_analysis": final_state["data_target_overview"],
-            "EDA_summary": final_state["eda_insight_summary"],
-            "visual_outputs": final_state["graph_file_path"],
+            "dataset_overview": report["data_overview"],
+            "data_quality": report["data_quality_overview"],
+            "numerical_statistics": report["data_stat_overview"],
+            "categorical_analysis": report["categorical_analysis_overview"],
+            "outlier_analysis": report["data_outlier_overview"],
+            "error_bounds": report["error_bounds"],
+            "EDA_summary": summary,
         }
-
         prompt = mongo_prompt.format_prompt(mongo_doc=mongo_doc)
-        llm_response = llm_cohere.invoke(prompt)
-        # prompt_html = html_prompt.format_prompt(eda_summary_html = final_state["eda_insight_summary"])
-        # llm_response_html = llm_google_2.invoke(prompt_html)
+        llm_response = invoke_with_fallback(llms=[llm_cohere], messages=prompt)
 
+        created_at = time.time()
         document = {
             "run_id": run_id,
-            "created_at": time.time(),
+            "created_at": created_at,
+            "expires_at": run_expiry(created_at),
             "original_filename": file.filename,
+            "mode": "streaming",
             "llm_overview": llm_response.content,
-            "eda_summary": final_state["eda_insight_summary"],
-            # "eda_summary_html": llm_response_html.content,
-            "visual_outputs": final_state["graph_file_path"],
+            "eda_summary": summary,
+            "error_bounds": report["error_bounds"],
+            "visual_outputs": [],
         }
-
         mongo_id = store_eda_data(document)
 
         return JSONResponse(
@@ -89,11 +257,13 @@ async def run_eda(file: UploadFile = File(...),response: Response = None):
                 "status": "success",
                 "run_id": run_id,
                 "mongo_id": mongo_id,
-                "summary": final_state["eda_insight_summary"],
-                # "html": llm_response_html.content,
+                "summary": summary,
+                "error_bounds": make_mongo_safe(report["error_bounds"]),
             }
         )
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -114,10 +284,35 @@ def chat_endpoint(payload: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(payload: ChatRequest, request: Request):
+    """
+    Server-sent events: `token` events as the answer is generated, then `done` (or `error`).
+    Generation stops when the client disconnects.
+    """
+    async def event_stream():
+        tokens = stream_chat_with_data(run_id=payload.run_id, user_query=payload.message)
+        try:
+            async for token in tokens:
+                if await request.is_disconnected():
+                    break
+                yield f"event: token\ndata: {json.dumps(token)}\n\n"
+            else:
+                yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+        finally:
+            await tokens.aclose()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.delete("/cleanup-images/{run_id}")
 def cleanup_images(run_id: str):
     try:
         delete_result = delete_all_visual_outputs(run_id=run_id)
+        # cached results of the same upload point at the deleted images
+        if delete_result.get("digest"):
+            invalidate_cached_result(delete_result["digest"])
 
         return {
             "status": "success",
@@ -129,9 +324,9 @@ def cleanup_images(run_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/cleanup-data/{run_id}")
-def cleanup_data(run_id : str):
+async def cleanup_data(run_id : str):
     try:
-        delete_data = delete_all_data(run_id=run_id)
+        delete_data = await delete_all_data_async(run_id=run_id)
 
         return{
             "status": "success",
@@ -142,6 +337,102 @@ def cleanup_data(run_id : str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def parse_byte_range(header: str, size: int):
+    """
+    (start, end) of a single `bytes=` range, None when there is no usable range header.
+    Raises ValueError for unsatisfiable ranges.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes="):].strip().partition("-")
+    try:
+        if start:
+            start, end = int(start), (int(end) if end else size - 1)
+        else:
+            # suffix range: the last `end` bytes
+            start, end = max(size - int(end), 0), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+@app.get("/artifacts/{key:path}")
+def get_artifact(key: str, request: Request):
+    """
+    Serve an artifact of the local store with ETag / If-None-Match, Cache-Control and Range support.
+    """
+    if ARTIFACT_STORE.name != "local":
+        raise HTTPException(status_code=404, detail="Artifacts are not served by this backend")
+    try:
+        path = ARTIFACT_STORE.path(key)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    stat = path.stat()
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    headers = {"ETag": etag, "Cache-Control": ARTIFACT_CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    format = format_of(path.name)
+    if format in CONTENT_ENCODINGS:
+        # gzip figure specs are decoded by the browser
+        headers["Content-Encoding"] = CONTENT_ENCODINGS[format]
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    media_type = content_type_of(format)
+    range_header = request.headers.get("range")
+    if request.headers.get("if-range") not in (None, etag):
+        # the client's copy is stale, send the whole artifact
+        range_header = None
+    try:
+        byte_range = parse_byte_range(range_header, stat.st_size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    with open(path, "rb") as f:
+        f.seek(start)
+        content = f.read(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    return Response(content=content, status_code=206, media_type=media_type, headers=headers)
+
+
+@app.get("/figures/png/{spec_id:path}")
+def get_figure_png(spec_id: str):
+    """
+    PNG of a stored figure spec, rendered on first request and then served from the artifact store.
+    """
+    try:
+        png = figure_png(spec_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Figure not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return RedirectResponse(png["url"], status_code=307, headers={"Cache-Control": ARTIFACT_CACHE_CONTROL})
+
+
+@app.get("/metrics")
+def metrics():
+    body, content_type = metrics_payload()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/runs/{run_id}/trace")
+def run_trace(run_id: str):
+    spans = get_trace(run_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="No trace recorded for this run_id")
+    return {"run_id": run_id, "spans": spans}
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
@@ -0,0 +1,246 @@
+"""
+Time and memory benchmarks for the EDA pipeline on a synthetic dataset.
+
+Every public function of Backend/tools_functions.py, every node of `eda_workflow` and the
+whole run are measured against local fakes (FakeLLM, mongomock, local artifact store),
+so results only depend on this machine and the code.
+
+    python -m benchmarks.bench_eda --rows 1000000 --output benchmarks/results/baseline.json
+    python -m benchmarks.bench_eda --rows 1000000 --compare benchmarks/results/baseline.json
+
+Wall time is the best of `--repeat` runs; peak memory comes from a separate tracemalloc
+run (tracemalloc slows the code down, so it never overlaps with timing).
+With --compare the exit status is 1 when a benchmark got slower or bigger than the
+baseline by more than --tolerance.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import inspect
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import statistics as stats
+
+from benchmarks.synthetic import DEFAULT_DATASET, make_dataset
+from benchmarks.fakes import configure_environment, install_fakes
+
+# differences below these are noise, whatever the relative change
+MIN_SECONDS_DELTA = 0.005
+MIN_PEAK_MB_DELTA = 1.0
+
+
+def measure(fn, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": round(min(times), 6),
+        "median_seconds": round(stats.median(times), 6),
+        "peak_mb": round(peak / 2 ** 20, 3),
+    }
+
+
+def function_benchmarks(df, profile) -> dict:
+    from Backend import tools_functions as tf
+
+    corr_matrix = tf.data_correlation(df, profile=profile)["correlation_matrix"]
+    benchmarks = {
+        "data_overview": lambda: tf.data_overview(df),
+        "data_quality": lambda: tf.data_quality(df, profile=profile),
+        "data_statistics": lambda: tf.data_statistics(df, profile=profile),
+        "get_important_numerical_columns": lambda: tf.get_important_numerical_columns(df, profile=profile),
+        "data_categorical": lambda: tf.data_categorical(df, profile=profile),
+        "analyze_categorical_columns": lambda: tf.analyze_categorical_columns(df, profile=profile),
+        "data_outlier": lambda: tf.data_outlier(df, profile=profile),
+        "data_correlation": lambda: tf.data_correlation(df, profile=profile),
+        "high_correlation_pairs": lambda: tf.high_correlation_pairs(corr_matrix),
+        "vif_from_correlation": lambda: tf.vif_from_correlation(corr_matrix.to_numpy()),
+        "vif_entries": lambda: tf.vif_entries(corr_matrix.columns, tf.vif_from_correlation(corr_matrix.to_numpy())),
+        "data_target_analysis": lambda: tf.data_target_analysis(df, profile=profile),
+        "make_mongo_safe": lambda: tf.make_mongo_safe(tf.data_quality(df, profile=profile)),
+    }
+
+    public = {
+        name for name, fn in inspect.getmembers(tf, inspect.isfunction)
+        if fn.__module__ == tf.__name__ and not name.startswith("_")
+    }
+    for name in sorted(public - set(benchmarks)):
+        print(f"[WARN] no benchmark for tools_functions.{name}")
+    return benchmarks
+
+
+def node_benchmarks(df) -> dict:
+    """
+    One benchmark per graph node. Each node runs on the state the graph would give it and
+    includes waiting for its figures to be serialized and stored.
+    """
+    from Backend.graph import eda_workflow
+    from Backend.main_nodes import (
+        Overview, quality, statistics, categorical_analysis, outlier, correlation,
+        target_analysis, eda_insight_summary,
+    )
+    from Backend.pipeline import initial_eda_state
+    from Backend.storage_graphs import resolve_figures
+
+    nodes = {
+        "overview": Overview,
+        "quality": quality,
+        "stat": statistics,
+        "category": categorical_analysis,
+        "outlier": outlier,
+        "correlation": correlation,
+        "target_analysis": target_analysis,
+        "summary": eda_insight_summary,
+    }
+    graph_nodes = {n for n in eda_workflow.get_graph().nodes if not n.startswith("__")}
+    for name in sorted(graph_nodes - set(nodes)):
+        print(f"[WARN] no benchmark for node {name}")
+
+    state = initial_eda_state(df, run_id="benchmark")
+    state.update(Overview(state))
+    for name in ["quality", "stat", "category", "outlier", "correlation", "target_analysis"]:
+        update = nodes[name](state)
+        update["graph_file_path"] = resolve_figures(update.get("graph_file_path", []))
+        state.update({k: v for k, v in update.items() if k != "graph_file_path"})
+        state["graph_file_path"] = state["graph_file_path"] + update["graph_file_path"]
+
+    def run(node):
+        def call():
+            update = node(dict(state))
+            resolve_figures(update.get("graph_file_path", []))
+        return call
+
+    return {name: run(node) for name, node in nodes.items()}
+
+
+def run_benchmarks(dataset: dict, repeat: int, figure_format: str) -> dict:
+    workdir = tempfile.mkdtemp(prefix="datamind-bench-")
+    configure_environment(workdir, figure_format=figure_format)
+
+    from Backend.profile import build_column_profile
+    from Backend.pipeline import run_eda_pipeline
+
+    install_fakes()
+
+    start = time.perf_counter()
+    df = make_dataset(**dataset)
+    print(f"dataset {df.shape[0]} x {df.shape[1]} built in {time.perf_counter() - start:.2f}s "
+          f"({df.memory_usage(deep=True).sum() / 2 ** 20:.1f} MB)")
+
+    results = {}
+
+    def record(name, fn):
+        results[name] = measure(fn, repeat)
+        r = results[name]
+        print(f"{name:<50} {r['seconds'] * 1000:>10.1f} ms {r['peak_mb']:>10.1f} MB")
+
+    record("profile.build_column_profile", lambda: build_column_profile(df))
+    profile = build_column_profile(df)
+
+    for name, fn in function_benchmarks(df, profile).items():
+        record(f"tools_functions.{name}", fn)
+    for name, fn in node_benchmarks(df).items():
+        record(f"node.{name}", fn)
+
+    runs = iter(range(10 ** 6))
+    record("pipeline.run_eda_pipeline", lambda: run_eda_pipeline(df, f"benchmark-{next(runs)}", "synthetic.csv"))
+
+    # a daily refresh: 1% new rows appended to an existing run
+    from Backend.pipeline import append_to_run
+    delta = df.head(max(1, len(df) // 100))
+    record("pipeline.append_to_run", lambda: append_to_run("benchmark-0", delta))
+
+    import numpy
+    import pandas
+    return {
+        "meta": {
+            "dataset": dataset,
+            "repeat": repeat,
+            "figure_format": figure_format,
+            "python": platform.python_version(),
+            "numpy": numpy.__version__,
+            "pandas": pandas.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Benchmarks that are slower / use more memory than the baseline by more than `tolerance`
+    (relative) and by more than the noise floor (absolute).
+    """
+    if current["meta"]["dataset"] != baseline["meta"]["dataset"]:
+        print("[WARN] dataset parameters differ from the baseline, comparison is not meaningful")
+
+    regressions = []
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        for metric, floor in (("seconds", MIN_SECONDS_DELTA), ("peak_mb", MIN_PEAK_MB_DELTA)):
+            delta = now[metric] - before[metric]
+            if delta > floor and now[metric] > before[metric] * (1 + tolerance):
+                regressions.append({
+                    "benchmark": name,
+                    "metric": metric,
+                    "baseline": before[metric],
+                    "current": now[metric],
+                    "change": round(now[metric] / before[metric] - 1, 3) if before[metric] else None,
+                })
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    for key, default in DEFAULT_DATASET.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(default), default=default)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--figure-format", choices=["json", "png"], default="json")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "latest.json"))
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    dataset = {key: getattr(args, key) for key in DEFAULT_DATASET}
+    report = run_benchmarks(dataset, repeat=args.repeat, figure_format=args.figure_format)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    regressions = compare(report, baseline, args.tolerance)
+    for r in regressions:
+        change = f"{r['change']:+.0%}" if r["change"] is not None else "new"
+        print(f"[REGRESSION] {r['benchmark']} {r['metric']}: {r['baseline']} -> {r['current']} ({change})")
+    if not regressions:
+        print(f"no regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import os
+import json
+import time
+
+# backends the benchmarks run against, forced before any Backend module is imported
+BENCHMARK_ENVIRONMENT = {
+    # skip .env so real credentials are never picked up
+    "RAILWAY_ENVIRONMENT": "benchmark",
+    "MONGO_URI": "mongomock://benchmark",
+    "DB_NAME": "benchmark",
+    "COLLECTION_NAME": "eda_runs",
+    "ARTIFACT_BACKEND": "local",
+    "LLM_CACHE_BACKEND": "none",
+    "RUN_TTL_SECONDS": "0",
+    "GEMINI_API_KEY": "benchmark",
+    "COHERE_API_KEY": "benchmark",
+    "GROQ_API_KEY": "benchmark",
+}
+
+
+def configure_environment(workdir: str, figure_format: str = "json"):
+    """
+    Point Mongo at mongomock, artifacts at `workdir` and disable the LLM cache.
+    Must run before `Backend` is imported.
+    """
+    os.environ.update(BENCHMARK_ENVIRONMENT)
+    os.environ["ARTIFACT_DIR"] = os.path.join(workdir, "artifacts")
+    os.environ["FIGURE_FORMAT"] = figure_format
+
+
+def _fake_llm_class():
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class FakeLLM(BaseChatModel):
+        """
+        Deterministic chat model: answers the target-identification prompt with
+        `target_column` and every other prompt with a fixed-size summary.
+        """
+        model: str = "benchmark-fake"
+        target_column: str = "target"
+        latency: float = 0.0
+
+        @property
+        def _llm_type(self) -> str:
+            return "benchmark-fake"
+
+        def respond(self, prompt: str) -> str:
+            if '"target_column"' in prompt:
+                return json.dumps({
+                    "target_column": self.target_column,
+                    "task_type": "classification",
+                    "reason": "benchmark",
+                })
+            return f"Benchmark summary of a {len(prompt)} character prompt."
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            if self.latency:
+                time.sleep(self.latency)
+            prompt = "\n".join(str(m.content) for m in messages)
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.respond(prompt)))])
+
+    return FakeLLM
+
+
+def install_fakes(target_column: str = "target", latency: float = 0.0):
+    """
+    Replace every provider model the pipeline calls with one FakeLLM. Returns it.
+    """
+    import Backend.models as models
+    import Backend.pipeline as pipeline
+
+    fake = _fake_llm_class()(target_column=target_column, latency=latency)
+    models.LLM_POOL[:] = [fake]
+    models.llm_cohere = fake
+    pipeline.llm_cohere = fake
+    return fake
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_DATASET = {
+    "rows": 200_000,
+    "numeric": 12,
+    "categorical": 6,
+    "bools": 2,
+    "missing_rate": 0.05,
+    "cardinality": 50,
+    "outlier_rate": 0.01,
+    "seed": 0,
+}
+
+
+def _numeric_column(rng: np.random.Generator, i: int, rows: int, outlier_rate: float) -> np.ndarray:
+    kind = i % 4
+    if kind == 0:
+        values = rng.normal(loc=i, scale=1 + i % 5, size=rows)
+    elif kind == 1:
+        values = rng.lognormal(mean=0, sigma=0.75, size=rows)
+    elif kind == 2:
+        values = rng.integers(0, 1000, size=rows).astype(float)
+    else:
+        values = rng.uniform(-100, 100, size=rows)
+
+    n_outliers = int(rows * outlier_rate)
+    if n_outliers:
+        idx = rng.choice(rows, size=n_outliers, replace=False)
+        std = values.std() or 1.0
+        values[idx] = values.mean() + rng.choice([-1, 1], size=n_outliers) * rng.uniform(6, 12, size=n_outliers) * std
+    return values
+
+
+def _categorical_column(rng: np.random.Generator, rows: int, cardinality: int, prefix: str) -> np.ndarray:
+    # Zipf-like frequencies: a few dominant categories and a long tail of rare ones
+    weights = 1.0 / np.arange(1, cardinality + 1)
+    codes = rng.choice(cardinality, size=rows, p=weights / weights.sum())
+    categories = np.array([f"{prefix}_{k}" for k in range(cardinality)], dtype=object)
+    return categories[codes]
+
+
+def make_dataset(
+    rows: int = DEFAULT_DATASET["rows"],
+    numeric: int = DEFAULT_DATASET["numeric"],
+    categorical: int = DEFAULT_DATASET["categorical"],
+    bools: int = DEFAULT_DATASET["bools"],
+    missing_rate: float = DEFAULT_DATASET["missing_rate"],
+    cardinality: int = DEFAULT_DATASET["cardinality"],
+    outlier_rate: float = DEFAULT_DATASET["outlier_rate"],
+    seed: int = DEFAULT_DATASET["seed"],
+) -> pd.DataFrame:
+    """
+    Deterministic synthetic dataset for benchmarks.
+
+    - `numeric` float columns (normal, skewed, integer-valued, uniform) with `outlier_rate` extreme values
+    - two near-duplicate numeric columns so correlation / VIF have work to do
+    - `categorical` string columns with Zipf-distributed categories, cardinality growing from `cardinality`
+    - `bools` boolean columns and a binary `target` derived from the first numeric column
+    - missing values at `missing_rate`, half of them in blocks shared by column pairs
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+
+    for i in range(numeric):
+        data[f"num_{i}"] = _numeric_column(rng, i, rows, outlier_rate)
+    if numeric:
+        data["num_0_scaled"] = data["num_0"] * 2.5 + rng.normal(scale=0.01, size=rows)
+
+    for i in range(categorical):
+        data[f"cat_{i}"] = _categorical_column(rng, rows, cardinality * (1 + i), prefix=f"c{i}")
+
+    for i in range(bools):
+        data[f"flag_{i}"] = rng.random(rows) < 0.3 + 0.1 * i
+
+    df = pd.DataFrame(data)
+
+    if missing_rate > 0:
+        columns = [c for c in df.columns if not c.startswith("flag_")]
+        for j, col in enumerate(columns):
+            mask = rng.random(rows) < missing_rate / 2
+            if j % 2 == 1:
+                # co-missing with the previous column
+                mask |= df[columns[j - 1]].isna().to_numpy()
+            else:
+                mask |= rng.random(rows) < missing_rate / 2
+            df.loc[mask, col] = np.nan
+
+    if numeric:
+        signal = np.nan_to_num(df["num_0"].to_numpy(dtype=float)) + rng.normal(size=rows)
+        df["target"] = (signal > np.median(signal)).astype(int)
+    return df